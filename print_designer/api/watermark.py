@@ -80,22 +80,64 @@ def validate_watermark_settings(doc, method=None):
         frappe.throw(_("Validation error: {0}").format(str(e)))
 
 
+# Watermark configuration is cached per process and site. Each entry is tagged with
+# the version counter stored in redis, bumping the counter invalidates every worker.
+WATERMARK_CONFIG_VERSION_KEY = "print_designer:watermark_config_version"
+_watermark_config_cache = {}
+
+
+def get_watermark_config_version():
+    """Current config version, read from redis at most once per request"""
+    version = getattr(frappe.local, "pd_watermark_config_version", None)
+    if version is None:
+        cache = frappe.cache()
+        version = int(cache.get(cache.make_key(WATERMARK_CONFIG_VERSION_KEY)) or 0)
+        frappe.local.pd_watermark_config_version = version
+    return version
+
+
+def bump_watermark_config_version():
+    """Invalidate the watermark config cache of all workers"""
+    cache = frappe.cache()
+    cache.incr(cache.make_key(WATERMARK_CONFIG_VERSION_KEY))
+    frappe.local.pd_watermark_config_version = None
+
+
+def get_local_watermark_config(key, generator):
+    """
+    Return the cached value for `key`, building it with `generator` on a miss.
+    Values are shared by all requests of this process until the version is bumped.
+    """
+    version = get_watermark_config_version()
+    site_cache = _watermark_config_cache.get(frappe.local.site)
+    if not site_cache or site_cache["version"] != version:
+        site_cache = _watermark_config_cache[frappe.local.site] = {"version": version, "values": {}}
+
+    values = site_cache["values"]
+    if key not in values:
+        value = generator()
+        if isinstance(value, dict) and value.get("error"):
+            # don't keep failed lookups around until the next settings change
+            return value
+        values[key] = value
+
+    return values[key].copy()
+
+
 def clear_watermark_cache(doc=None, method=None):
     """
     Clear watermark cache when settings are updated
     Called automatically when Watermark Settings is saved
     """
     try:
+        bump_watermark_config_version()
+        # bump again once saved, so no worker keeps config it read before the commit
+        frappe.db.after_commit.add(bump_watermark_config_version)
+
         # Clear general watermark cache
         frappe.cache().delete_key("watermark_settings")
         frappe.cache().delete_key("watermark_templates")
 
-        # Clear print format specific caches
-        if doc and doc.print_format_configs:
-            for config in doc.print_format_configs:
-                cache_key = f"watermark_config_{config.print_format}"
-                frappe.cache().delete_key(cache_key)
-
         frappe.publish_realtime(
             "watermark_settings_updated",
             {"message": "Watermark settings have been updated"},
@@ -112,26 +154,43 @@ def clear_format_watermark_cache(doc, method=None):
     """
     try:
         if doc.name:
-            cache_key = f"watermark_config_{doc.name}"
-            frappe.cache().delete_key(cache_key)
+            bump_watermark_config_version()
+            frappe.db.after_commit.add(bump_watermark_config_version)
     except Exception as e:
         frappe.log_error(f"Error clearing format cache: {str(e)}")
 
 
-# Optional: Add caching to improve performance
 def get_cached_watermark_config(print_format):
     """
     Get watermark config with caching for better performance
     """
-    cache_key = f"watermark_config_{print_format}"
-    config = frappe.cache().get_value(cache_key)
+    return get_local_watermark_config(
+        ("print_format", print_format),
+        lambda: get_watermark_config_for_print_format(print_format),
+    )
+
+
+def get_cached_watermark_template_config(template_name):
+    """Cached get_watermark_template_config"""
+    return get_local_watermark_config(
+        ("template", template_name),
+        lambda: get_watermark_template_config(template_name),
+    )
 
-    if config is None:
-        config = get_watermark_config_for_print_format(print_format)
-        # Cache for 1 hour
-        frappe.cache().set_value(cache_key, config, expires_in_sec=3600)
 
-    return config
+def get_print_settings_watermark_config():
+    """Watermark fields of Print Settings, cached"""
+
+    def get_config():
+        print_settings = frappe.get_single("Print Settings")
+        return {
+            "watermark_settings": print_settings.get("watermark_settings", "None"),
+            "watermark_font_size": print_settings.get("watermark_font_size", 12),
+            "watermark_position": print_settings.get("watermark_position", "Top Right"),
+            "watermark_font_family": print_settings.get("watermark_font_family", "Sarabun"),
+        }
+
+    return get_local_watermark_config(("print_settings",), get_config)
 
 
 @frappe.whitelist()
@@ -299,64 +299,30 @@ def validate_thai_tax_id_checksum(tax_id):
 @frappe.whitelist()
 def get_wht_dashboard_data(company=None):
     """
-    Get dashboard data for WHT overview
+    Get dashboard data for WHT overview, read from the pre-aggregated WHT Monthly Summary
     """
     try:
-        from datetime import datetime, timedelta
+        from datetime import datetime
+
+        from print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary import (
+            get_wht_monthly_summary,
+        )
         
         # Current year data
         current_year = datetime.now().year
+        current_month = datetime.now().month
         year_start = f"{current_year}-01-01"
         year_end = f"{current_year}-12-31"
         
-        # Current month data
-        current_month_start = f"{current_year}-{datetime.now().month:02d}-01"
-        
-        filters = {"custom_is_withholding_tax": 1, "docstatus": 1}
-        if company:
-            filters["company"] = company
-        
-        # Year-to-date data
-        ytd_payments = frappe.get_all("Payment Entry",
-            filters=dict(filters, **{
-                "party_type": "Supplier",
-                "reference_date": ["between", [year_start, year_end]]
-            }),
-            fields=["paid_amount", "pd_custom_withholding_tax_amount"]
+        # Totals per month of the year, the current month is the last one
+        months = get_wht_monthly_summary(year_start, year_end, company, group_by="period")
+        month_to_date = next(
+            (month for month in months if getdate(month.period).month == current_month), {}
         )
-        
-        ytd_invoices = frappe.get_all("Purchase Invoice",
-            filters=dict(filters, **{
-                "posting_date": ["between", [year_start, year_end]]
-            }),
-            fields=["grand_total", "pd_custom_withholding_tax_amount"]
-        )
-        
-        # Calculate totals
-        ytd_total_base = sum(flt(p.paid_amount) for p in ytd_payments) + \
-                        sum(flt(i.grand_total) for i in ytd_invoices)
-        
-        ytd_total_wht = sum(flt(p.pd_custom_withholding_tax_amount) for p in ytd_payments) + \
-                       sum(flt(i.pd_custom_withholding_tax_amount) for i in ytd_invoices)
-        
-        # Month-to-date data
-        mtd_payments = frappe.get_all("Payment Entry",
-            filters=dict(filters, **{
-                "party_type": "Supplier", 
-                "reference_date": [">=", current_month_start]
-            }),
-            fields=["pd_custom_withholding_tax_amount"]
-        )
-        
-        mtd_invoices = frappe.get_all("Purchase Invoice",
-            filters=dict(filters, **{
-                "posting_date": [">=", current_month_start]
-            }),
-            fields=["pd_custom_withholding_tax_amount"]
-        )
-        
-        mtd_total_wht = sum(flt(p.pd_custom_withholding_tax_amount) for p in mtd_payments) + \
-                       sum(flt(i.pd_custom_withholding_tax_amount) for i in mtd_invoices)
+
+        ytd_total_documents = sum(int(month.document_count or 0) for month in months)
+        ytd_total_base = sum(flt(month.total_base_amount) for month in months)
+        ytd_total_wht = sum(flt(month.total_wht_amount) for month in months)
         
         # Top suppliers by WHT amount
         top_suppliers = get_top_suppliers_by_wht(year_start, year_end, company)
@@ -365,17 +331,18 @@ def get_wht_dashboard_data(company=None):
             "success": True,
             "dashboard": {
                 "year_to_date": {
-                    "total_documents": len(ytd_payments) + len(ytd_invoices),
+                    "total_documents": ytd_total_documents,
                     "total_base_amount": ytd_total_base,
                     "total_wht_amount": ytd_total_wht,
                     "average_rate": (ytd_total_wht / ytd_total_base * 100) if ytd_total_base else 0
                 },
                 "month_to_date": {
-                    "total_documents": len(mtd_payments) + len(mtd_invoices),
-                    "total_wht_amount": mtd_total_wht
+                    "total_documents": int(month_to_date.get("document_count") or 0),
+                    "total_wht_amount": flt(month_to_date.get("total_wht_amount"))
                 },
+                "monthly": months,
                 "top_suppliers": top_suppliers,
-                "period": {"year": current_year, "month": datetime.now().month}
+                "period": {"year": current_year, "month": current_month}
             }
         }
         
@@ -389,38 +356,33 @@ def get_top_suppliers_by_wht(from_date, to_date, company=None):
     Get top 5 suppliers by WHT amount
     """
     try:
-        filters = {
-            "custom_is_withholding_tax": 1,
-            "docstatus": 1,
-            "reference_date": ["between", [from_date, to_date]]
-        }
-        
-        if company:
-            filters["company"] = company
-        
-        # Get payment entries grouped by supplier
-        suppliers_data = frappe.db.sql("""
-            SELECT 
-                party as supplier,
-                party_name as supplier_name,
-                SUM(pd_custom_withholding_tax_amount) as total_wht,
-                COUNT(*) as transaction_count,
-                SUM(paid_amount) as total_payments
-            FROM `tabPayment Entry`
-            WHERE custom_is_withholding_tax = 1 
-            AND docstatus = 1
-            AND party_type = 'Supplier'
-            AND reference_date BETWEEN %s AND %s
-            {}
-            GROUP BY party, party_name
-            ORDER BY total_wht DESC
-            LIMIT 5
-        """.format("AND company = %(company)s" if company else ""), 
-        {"from_date": from_date, "to_date": to_date, "company": company} if company 
-        else {"from_date": from_date, "to_date": to_date}, as_dict=True)
-        
-        return suppliers_data
+        from print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary import (
+            get_wht_monthly_summary,
+        )
+
+        suppliers = get_wht_monthly_summary(from_date, to_date, company, group_by="supplier")
+        suppliers = sorted(suppliers, key=lambda row: flt(row.total_wht_amount), reverse=True)[:5]
+
+        supplier_names = dict(
+            frappe.get_all(
+                "Supplier",
+                filters={"name": ["in", [row.supplier for row in suppliers if row.supplier]]},
+                fields=["name", "supplier_name"],
+                as_list=True,
+            )
+        ) if suppliers else {}
+
+        return [
+            {
+                "supplier": row.supplier,
+                "supplier_name": supplier_names.get(row.supplier) or row.supplier,
+                "total_wht": flt(row.total_wht_amount),
+                "transaction_count": int(row.document_count or 0),
+                "total_payments": flt(row.total_base_amount),
+            }
+            for row in suppliers
+        ]
         
     except Exception as e:
         frappe.log_error(f"Error getting top suppliers: {str(e)}")
-        return []
\ No newline at end of file
+        return []
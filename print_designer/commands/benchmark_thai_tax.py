@@ -0,0 +1,158 @@
+"""
+Benchmark the Thai tax calculation engine
+Compares the per doctype Sales Invoice maths the engine replaced with batch evaluation
+over synthetic documents, and diffs their amounts
+"""
+
+import random
+import statistics
+import time
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+from frappe.utils import flt
+
+
+@click.command("benchmark-thai-tax")
+@click.option("--documents", default=10000, type=int, help="Synthetic documents per run")
+@click.option("--runs", default=5, type=int, help="Timed runs per path")
+@click.option("--site", help="Site name")
+@pass_context
+def benchmark_thai_tax(context, documents=10000, runs=5, site=None):
+    """Compare WHT / retention calculation time of the validate path and the batch engine"""
+    if not site:
+        site = get_site(context)
+    runs = max(runs, 1)
+
+    frappe.init(site=site)
+    frappe.connect()
+
+    try:
+        from print_designer.utils.thai_tax import (
+            THAI_TAX_FIELDS,
+            calculate_thai_tax_batch,
+            get_currency_precision,
+            get_sales_tax_arguments,
+        )
+
+        rows = make_documents(documents)
+        precision = get_currency_precision()
+
+        def baseline():
+            return [calculate_baseline_amounts(row, precision) for row in rows]
+
+        def batch_engine():
+            return calculate_thai_tax_batch(
+                [get_sales_tax_arguments(row, keep_close_amounts=True) for row in rows],
+                precision=precision,
+            )
+
+        mismatches = sum(
+            any(expected[fieldname] != amounts[fieldname] for fieldname in THAI_TAX_FIELDS)
+            for expected, amounts in zip(baseline(), batch_engine())
+        )
+
+        click.echo(f"\nThai tax calculation of {documents} documents, {runs} runs")
+        click.echo("-" * 60)
+
+        for label, calculate in (("baseline", baseline), ("batch engine", batch_engine)):
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                calculate()
+                timings.append((time.perf_counter() - start) * 1000)
+
+            median = statistics.median(timings)
+            click.echo(
+                f"{label:<14} median {median:>9.1f} ms   min {min(timings):>9.1f} ms   "
+                f"{median * 1000 / (documents or 1):>7.2f} µs/document"
+            )
+
+        click.echo(f"mismatched documents: {mismatches}")
+
+    finally:
+        frappe.destroy()
+
+
+def make_documents(count, seed=42):
+    """
+    Synthetic Sales Invoice values: 7% VAT, common WHT rates, some with retention
+    and some with a stored WHT amount within 0.01 of the calculated one
+    """
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        net_total = round(rng.uniform(100, 500000), 2)
+        wht_rate = rng.choice((1, 2, 3, 5))
+        row = {
+            "name": f"BENCH-{index:06d}",
+            "net_total": net_total,
+            "grand_total": round(net_total * 1.07, 2),
+            "pd_custom_subject_to_wht": 1,
+            "pd_custom_withholding_tax_pct": wht_rate,
+            "pd_custom_subject_to_retention": int(rng.random() < 0.3),
+            "pd_custom_retention_pct": 5,
+        }
+        if rng.random() < 0.2:
+            row["pd_custom_withholding_tax_amount"] = round(net_total * wht_rate / 100, 2) + 0.005
+        rows.append(row)
+    return rows
+
+
+def calculate_baseline_amounts(values, precision=2):
+    """
+    Amounts of the per doctype Sales Invoice calculation the engine replaced
+    (WHT, retention and payment steps of sales_invoice_calculations before the engine),
+    without its logging, kept as the reference the engine is compared with
+    """
+    doc = frappe._dict(values)
+
+    def thai_flt(value):
+        return flt(value, precision, rounding_method="Commercial Rounding")
+
+    # calculate_withholding_tax_amounts_for_sales_invoice
+    if doc.get("pd_custom_subject_to_wht") and doc.pd_custom_withholding_tax_pct and doc.net_total:
+        expected_wht_amount = thai_flt(flt(doc.net_total) * flt(doc.pd_custom_withholding_tax_pct) / 100)
+        current_wht_amount = flt(doc.get("pd_custom_withholding_tax_amount"))
+        if not current_wht_amount or abs(current_wht_amount - expected_wht_amount) > 0.01:
+            doc.pd_custom_withholding_tax_amount = expected_wht_amount
+    else:
+        doc.pd_custom_withholding_tax_amount = 0
+
+    # calculate_retention_amounts_for_sales_invoice
+    if doc.get("pd_custom_subject_to_retention") and doc.get("pd_custom_retention_pct") and doc.net_total:
+        doc.pd_custom_retention_amount = thai_flt(flt(doc.net_total) * flt(doc.pd_custom_retention_pct) / 100)
+    else:
+        doc.pd_custom_retention_amount = 0
+
+    # calculate_final_payment_amounts_for_sales_invoice
+    grand_total = flt(doc.grand_total)
+    wht_amount = flt(doc.pd_custom_withholding_tax_amount)
+    retention_amount = flt(doc.pd_custom_retention_amount)
+
+    expected_net_total_after_wht = thai_flt(grand_total - wht_amount)
+    current_net_total_after_wht = flt(doc.get("pd_custom_net_total_after_wht"))
+    if not current_net_total_after_wht or abs(current_net_total_after_wht - expected_net_total_after_wht) > 0.01:
+        doc.pd_custom_net_total_after_wht = expected_net_total_after_wht
+
+    if doc.get("pd_custom_subject_to_retention") and retention_amount > 0:
+        doc.pd_custom_net_after_wht_retention = thai_flt(grand_total - wht_amount - retention_amount)
+        doc.pd_custom_payment_amount = doc.pd_custom_net_after_wht_retention
+    else:
+        doc.pd_custom_net_after_wht_retention = 0
+        doc.pd_custom_payment_amount = doc.pd_custom_net_total_after_wht
+
+    if doc.pd_custom_payment_amount < 0:
+        doc.pd_custom_payment_amount = 0
+
+    return {
+        fieldname: doc[fieldname]
+        for fieldname in (
+            "pd_custom_withholding_tax_amount",
+            "pd_custom_retention_amount",
+            "pd_custom_net_total_after_wht",
+            "pd_custom_net_after_wht_retention",
+            "pd_custom_payment_amount",
+        )
+    }
@@ -0,0 +1,69 @@
+"""
+Benchmark watermarked PDF downloads for Print Designer
+Compares the legacy wkhtmltopdf path with the generator configured for the Print Format
+"""
+
+import statistics
+import time
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("benchmark-watermark-pdf")
+@click.argument("doctype")
+@click.argument("name")
+@click.option("--format", "print_format", help="Print Format to render")
+@click.option("--watermark", default="Original,Copy on Sequence", help="Watermark setting to apply")
+@click.option("--runs", default=5, type=int, help="Timed runs per generator")
+@click.option("--site", help="Site name")
+@pass_context
+def benchmark_watermark_pdf(context, doctype, name, print_format=None, watermark=None, runs=5, site=None):
+	"""Compare watermarked PDF latency of wkhtmltopdf and the configured PDF generator"""
+	if not site:
+		site = get_site(context)
+	runs = max(runs, 1)
+
+	frappe.init(site=site)
+	frappe.connect()
+
+	try:
+		from frappe.utils import get_url, set_request
+
+		from print_designer.pdf_generator_manager import PDFGeneratorManager
+		from print_designer.utils.signature_stamp import render_watermarked_pdf
+
+		# chrome resolves assets against frappe.request.host_url
+		set_request(method="GET", path="/", base_url=get_url())
+
+		configured = PDFGeneratorManager.resolve_generator(print_format)
+		generators = ["wkhtmltopdf"] if configured == "wkhtmltopdf" else ["wkhtmltopdf", configured]
+
+		click.echo(f"\nWatermarked PDF latency for {doctype} {name} ({watermark}), {runs} runs")
+		click.echo("-" * 60)
+
+		for generator in generators:
+			timings = []
+			# first run includes overlay rendering, chrome starts a browser per run
+			# unless use_persistent_chromium is set, as on download
+			for _ in range(runs + 1):
+				start = time.perf_counter()
+				pdf = render_watermarked_pdf(
+					doctype,
+					name,
+					format=print_format,
+					watermark_settings=watermark,
+					pdf_generator=generator,
+					fallback=False,
+				)
+				timings.append((time.perf_counter() - start) * 1000)
+
+			click.echo(
+				f"{generator:<12} first {timings[0]:>8.1f} ms   "
+				f"median {statistics.median(timings[1:]):>8.1f} ms   "
+				f"min {min(timings[1:]):>8.1f} ms   size {len(pdf) // 1024} KB"
+			)
+
+	finally:
+		frappe.destroy()
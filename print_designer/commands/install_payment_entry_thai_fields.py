@@ -261,6 +261,17 @@ def create_payment_entry_thai_fields():
                 "no_copy": 0,
                 "print_hide": 1,
             },
+            {
+                "fieldname": "pd_custom_wht_filing_income_type",
+                "label": "WHT Filing Income Type",
+                "fieldtype": "Data",
+                "insert_after": "pd_custom_income_type",
+                "description": "Income type used for annual WHT filing, stored on submit",
+                "read_only": 1,
+                "hidden": 1,
+                "no_copy": 1,
+                "print_hide": 1,
+            },
         ]
     }
 
@@ -350,6 +361,7 @@ def remove_thai_fields():
         "pd_custom_retention_account",
         "pd_custom_output_vat_undue_account",
         "pd_custom_output_vat_account",
+        "pd_custom_wht_filing_income_type",
     ]
 
     for field in fields_to_remove:
@@ -381,6 +381,17 @@ def install_purchase_invoice_thai_tax_fields():
                 "length": 0,
                 "bold": 0,
             },
+            {
+                "fieldname": "pd_custom_wht_filing_income_type",
+                "label": "WHT Filing Income Type",
+                "fieldtype": "Data",
+                "insert_after": "pd_custom_wht_income_type",
+                "description": "Income type used for annual WHT filing, stored on submit",
+                "read_only": 1,
+                "hidden": 1,
+                "no_copy": 1,
+                "print_hide": 1,
+            },
         ]
     }
 
@@ -427,6 +438,7 @@ def remove_purchase_invoice_thai_tax_fields():
         "pd_custom_vat_treatment",
         "pd_custom_subject_to_wht",
         "pd_custom_wht_income_type",
+        "pd_custom_wht_filing_income_type",
         "pd_custom_wht_description",
         "pd_custom_net_total_after_wht",
         "pd_custom_net_total_after_wht_words",
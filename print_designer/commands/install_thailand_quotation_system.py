@@ -272,9 +272,7 @@ def check_calculation_system_status():
         
         try:
             from print_designer.custom.quotation_calculations import (
-                calculate_withholding_tax_amounts,
-                calculate_retention_amounts,
-                calculate_final_payment_amounts,
+                calculate_thailand_tax_amounts,
                 quotation_calculate_thailand_amounts
             )
             print("✅ Calculation modules: All imported successfully")
@@ -0,0 +1,28 @@
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command('rebuild-wht-monthly-summary')
+@click.option('--company', help='Only rows of this company')
+@click.option('--from-date', help='First month to rebuild (any date in the month)')
+@click.option('--to-date', help='Last month to rebuild (any date in the month)')
+@click.option('--site', help='Site name')
+@pass_context
+def rebuild_wht_monthly_summary(context, company=None, from_date=None, to_date=None, site=None):
+    """Recompute WHT Monthly Summary rows from submitted Payment Entries and Purchase Invoices"""
+
+    if not site:
+        site = get_site(context)
+
+    with frappe.init_site(site):
+        frappe.connect()
+
+        from print_designer.print_designer.doctype.wht_monthly_summary import wht_monthly_summary
+
+        click.echo("🔄 Rebuilding WHT Monthly Summary")
+        rows = wht_monthly_summary.rebuild_wht_monthly_summary(
+            company=company, from_date=from_date, to_date=to_date
+        )
+        frappe.db.commit()
+        click.echo(f"✅ Wrote {rows} WHT Monthly Summary rows")
@@ -0,0 +1,64 @@
+import os
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command('regenerate-qr-codes')
+@click.argument('doctype', type=click.Choice(["Sales Invoice", "Delivery Note"]))
+@click.option('--company', help='Only documents of this company')
+@click.option('--from-date', help='Only documents posted on or after this date')
+@click.option('--to-date', help='Only documents posted on or before this date')
+@click.option('--batch-size', default=500, type=int, help='Documents rendered and committed per batch')
+@click.option('--processes', default=min(os.cpu_count() or 1, 4), type=int, help='QR rendering processes')
+@click.option('--resume', is_flag=True, help='Continue after the last committed batch of an interrupted run')
+@click.option('--background', is_flag=True, help='Run as a background job on the long queue')
+@click.option('--site', help='Site name')
+@pass_context
+def regenerate_qr_codes(
+    context, doctype, company=None, from_date=None, to_date=None, batch_size=500,
+    processes=1, resume=False, background=False, site=None
+):
+    """Regenerate stored QR codes, e.g. after a tax ID correction or a site URL change"""
+
+    if not site:
+        site = get_site(context)
+
+    with frappe.init_site(site):
+        frappe.connect()
+
+        from print_designer.custom import qr_regeneration
+
+        filters = {}
+        if company:
+            filters["company"] = company
+        if from_date and to_date:
+            filters["posting_date"] = ["between", [from_date, to_date]]
+        elif from_date:
+            filters["posting_date"] = [">=", from_date]
+        elif to_date:
+            filters["posting_date"] = ["<=", to_date]
+
+        if background:
+            frappe.set_user("Administrator")
+            qr_regeneration.enqueue_qr_regeneration(
+                doctype, filters=filters, resume=resume, processes=processes, batch_size=batch_size
+            )
+            frappe.db.commit()
+            click.echo(f"✅ {doctype} QR code regeneration queued")
+            return
+
+        def progress(done, total):
+            click.echo(f"\r   {done}/{total} {doctype} processed", nl=False)
+
+        click.echo(f"🔄 Regenerating {doctype} QR codes ({processes} processes, batches of {batch_size})")
+        updated = qr_regeneration.regenerate_qr_codes(
+            doctype,
+            filters=filters,
+            batch_size=batch_size,
+            processes=processes,
+            resume=resume,
+            progress=progress,
+        )
+        click.echo(f"\n✅ Regenerated {updated} {doctype} QR codes")
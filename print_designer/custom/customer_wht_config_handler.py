@@ -6,60 +6,57 @@ import frappe
 from frappe import _
 from frappe.utils import flt
 
+from print_designer.utils.thai_tax import (
+    THAI_TAX_FIELDS,
+    calculate_thai_tax_batch,
+    get_currency_precision,
+    get_sales_tax_arguments,
+)
+
+WHT_CONFIG_FIELDS = ['pd_custom_subject_to_wht', 'pd_custom_wht_income_type', 'custom_wht_rate', 'is_juristic_person']
+RECALCULATION_BATCH_SIZE = 500
+
+# Open sales documents recalculated when a customer's WHT configuration changes:
+# doctype -> (customer field, amounts within 0.01 of the expected value are kept)
+# as in quotation / sales_order / sales_invoice_calculations
+WHT_RECALCULATION_DOCTYPES = {
+    "Quotation": ("party_name", False),
+    "Sales Order": ("customer", True),
+    "Sales Invoice": ("customer", True),
+}
+
+# Document values read by calculate_thai_amounts
+THAI_AMOUNT_INPUT_FIELDS = [
+    "net_total",
+    "grand_total",
+    "pd_custom_subject_to_wht",
+    "pd_custom_subject_to_retention",
+]
+
+# Values written by calculate_thai_amounts
+THAI_AMOUNT_FIELDS = ["pd_custom_withholding_tax_pct", "pd_custom_retention_pct"] + THAI_TAX_FIELDS
+
 
 def handle_customer_wht_config_changes(doc, method=None):
     """
     Handle changes to customer WHT configuration
-    Update related open sales documents
-    Consolidated from thai_wht_events.py
+    Open sales documents of the customer are recalculated in a background job,
+    saving a customer with many drafts doesn't wait for them
     """
     try:
-        if method not in ['on_update', 'validate']:
+        if method != 'on_update':
             return
-        
-        # Check if WHT-related fields changed
-        wht_fields = [
-            'pd_custom_subject_to_wht', 'pd_custom_wht_income_type', 'custom_wht_rate', 'is_juristic_person'
-        ]
-        
-        field_changed = False
-        if hasattr(doc, '_doc_before_save') and doc._doc_before_save:
-            for field in wht_fields:
-                old_value = doc._doc_before_save.get(field)
-                new_value = getattr(doc, field, None)
-                if old_value != new_value:
-                    field_changed = True
-                    break
-        
-        if not field_changed:
+
+        if not any(doc.has_value_changed(field) for field in WHT_CONFIG_FIELDS):
             return
-        
-        # Update related documents
-        total_updated = 0
-        
-        # Update Quotations
-        from .quotation_calculations import handle_customer_wht_config_change_for_quotation
-        quotation_count = handle_customer_wht_config_change_for_quotation(doc.name)
-        total_updated += quotation_count
-        
-        # Update Sales Orders
-        from .sales_order_calculations import handle_customer_wht_config_change_for_sales_order
-        sales_order_count = handle_customer_wht_config_change_for_sales_order(doc.name)
-        total_updated += sales_order_count
-        
-        # Update Sales Invoices
-        from .sales_invoice_calculations import handle_customer_wht_config_change_for_sales_invoice
-        sales_invoice_count = handle_customer_wht_config_change_for_sales_invoice(doc.name)
-        total_updated += sales_invoice_count
-        
-        if total_updated > 0:
-            frappe.msgprint(
-                _(f"Updated WHT configuration for {total_updated} open sales documents "
-                  f"(Quotations: {quotation_count}, Sales Orders: {sales_order_count}, Sales Invoices: {sales_invoice_count})"),
-                title=_("WHT Configuration Updated"),
-                indicator="green"
-            )
-        
+
+        enqueue_customer_wht_recalculation(doc.name)
+        frappe.msgprint(
+            _("Open Quotations, Sales Orders and Sales Invoices of {0} will be updated for the new WHT configuration").format(doc.name),
+            title=_("WHT Configuration Updated"),
+            indicator="green"
+        )
+
     except Exception as e:
         frappe.log_error(
             f"Error handling customer WHT config change for {doc.name}: {str(e)}",
@@ -67,6 +64,160 @@ def handle_customer_wht_config_changes(doc, method=None):
         )
 
 
+def enqueue_customer_wht_recalculation(customer):
+    """Queue recalculation of the customer's open sales documents, once per customer"""
+    frappe.enqueue(
+        "print_designer.custom.customer_wht_config_handler.recalculate_customer_wht_documents",
+        queue="long",
+        job_id=f"customer_wht_recalculation:{frappe.local.site}:{customer}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        customer=customer,
+        publish_progress=True,
+    )
+
+
+def recalculate_customer_wht_documents(customer, batch_size=RECALCULATION_BATCH_SIZE, publish_progress=False):
+    """
+    Recalculate the Thai WHT / retention amounts of the customer's draft Quotations,
+    Sales Orders and Sales Invoices. Documents are read in batches and only the
+    amounts that changed are written, one bulk update and commit per batch.
+
+    Returns:
+        {doctype: number of documents updated}
+    """
+    filters = {
+        doctype: {WHT_RECALCULATION_DOCTYPES[doctype][0]: customer, "docstatus": 0}
+        for doctype in WHT_RECALCULATION_DOCTYPES
+    }
+    filters["Quotation"]["quotation_to"] = "Customer"
+
+    precision = get_currency_precision()
+    total = sum(frappe.db.count(doctype, doctype_filters) for doctype, doctype_filters in filters.items())
+    company_defaults = {}
+    updated = {}
+    done = 0
+
+    for doctype, doctype_filters in filters.items():
+        keep_close_amounts = WHT_RECALCULATION_DOCTYPES[doctype][1]
+        meta = frappe.get_meta(doctype)
+        fields = ["name", "company"] + [
+            fieldname for fieldname in THAI_AMOUNT_INPUT_FIELDS + THAI_AMOUNT_FIELDS if meta.has_field(fieldname)
+        ]
+        updated[doctype] = 0
+
+        for rows in iter_document_batches(doctype, doctype_filters, fields, batch_size):
+            for company in {row.company for row in rows} - set(company_defaults):
+                company_defaults[company] = get_company_thai_defaults(company)
+
+            updates = {}
+            for row, amounts in zip(
+                rows, calculate_thai_amounts_batch(rows, company_defaults, precision, keep_close_amounts)
+            ):
+                changed = {
+                    fieldname: value for fieldname, value in amounts.items()
+                    if fieldname in row and flt(row[fieldname]) != value
+                }
+                if changed:
+                    changed.update(get_amounts_in_words(meta, row, amounts))
+                    updates[row.name] = changed
+
+            if updates:
+                frappe.db.bulk_update(doctype, updates, update_modified=False)
+            frappe.db.commit()
+
+            updated[doctype] += len(updates)
+            done += len(rows)
+            if publish_progress:
+                frappe.publish_progress(
+                    done * 100 / (total or 1),
+                    title=_("Updating WHT of {0}").format(customer),
+                    description=_("{0} of {1} documents").format(done, total),
+                )
+
+    frappe.logger().info(f"Customer WHT recalculation for {customer}: {updated}")
+    return updated
+
+
+def iter_document_batches(doctype, filters, fields, batch_size=RECALCULATION_BATCH_SIZE):
+    """Yield batches of document rows, paginated on name"""
+    filters = dict(filters)
+    while True:
+        rows = frappe.get_all(doctype, filters=filters, fields=fields, order_by="name asc", limit=batch_size)
+        if not rows:
+            return
+        yield rows
+        filters["name"] = [">", rows[-1].name]
+
+
+def get_company_thai_defaults(company):
+    """Company default WHT / retention rates applied to documents that don't set them"""
+    company_doc = frappe.get_cached_doc("Company", company)
+    return {
+        "default_wht_rate": flt(company_doc.get("default_wht_rate")),
+        "default_retention_rate": flt(company_doc.get("default_retention_rate")),
+    }
+
+
+def calculate_thai_amounts(values, company_defaults, precision=2, keep_close_amounts=False):
+    """
+    WHT, retention and payment amounts of a sales document, without touching the
+    document or the database. Same rules as the validate calculations of Quotation,
+    Sales Order and Sales Invoice.
+
+    Args:
+        values: document values, THAI_AMOUNT_INPUT_FIELDS and the current THAI_AMOUNT_FIELDS
+        company_defaults: get_company_thai_defaults of the document company
+        precision: currency precision
+        keep_close_amounts: keep current amounts within 0.01 of the calculated value
+
+    Returns:
+        {fieldname: value} of THAI_AMOUNT_FIELDS
+    """
+    return calculate_thai_amounts_batch(
+        [values], {values.get("company"): company_defaults}, precision, keep_close_amounts
+    )[0]
+
+
+def calculate_thai_amounts_batch(rows, company_defaults, precision=2, keep_close_amounts=False):
+    """calculate_thai_amounts of every row, evaluated in one batch by the Thai tax engine"""
+    arguments = []
+    for row in rows:
+        defaults = company_defaults.get(row.get("company")) or {}
+        row_arguments = get_sales_tax_arguments(row, keep_close_amounts)
+        # Company default rates when the document doesn't set them, as apply_company_defaults
+        row_arguments["wht_rate"] = flt(row_arguments["wht_rate"]) or defaults.get("default_wht_rate") or 0
+        row_arguments["retention_rate"] = (
+            flt(row_arguments["retention_rate"]) or defaults.get("default_retention_rate") or 0
+        )
+        arguments.append(row_arguments)
+
+    return [
+        {
+            "pd_custom_withholding_tax_pct": row_arguments["wht_rate"],
+            "pd_custom_retention_pct": row_arguments["retention_rate"],
+            **{fieldname: amounts[fieldname] for fieldname in THAI_TAX_FIELDS},
+        }
+        for row_arguments, amounts in zip(arguments, calculate_thai_tax_batch(arguments, precision))
+    ]
+
+
+def get_amounts_in_words(meta, values, amounts):
+    """In words fields of recalculated amounts, as convert_amounts_to_words"""
+    from frappe.utils import money_in_words
+
+    in_words = {}
+    if meta.has_field("pd_custom_net_total_after_wht_words") and amounts["pd_custom_net_total_after_wht"]:
+        in_words["pd_custom_net_total_after_wht_words"] = money_in_words(amounts["pd_custom_net_total_after_wht"])
+    if meta.has_field("pd_custom_net_after_wht_retention_words"):
+        in_words["pd_custom_net_after_wht_retention_words"] = (
+            money_in_words(amounts["pd_custom_net_after_wht_retention"])
+            if values.get("pd_custom_subject_to_retention") and amounts["pd_custom_net_after_wht_retention"]
+            else ""
+        )
+    return in_words
+
+
 @frappe.whitelist()
 def bulk_refresh_customer_wht_config(customer=None, company=None):
     """
@@ -82,30 +233,25 @@ def bulk_refresh_customer_wht_config(customer=None, company=None):
             # For now, we'll update all customers
             pass
         
-        customers = frappe.get_all("Customer", filters=filters, fields=["name"])
-        
-        total_updated = 0
+        customers = frappe.get_all("Customer", filters=filters, pluck="name")
         
-        for customer_info in customers:
+        for customer_name in customers:
             try:
-                customer_doc = frappe.get_doc("Customer", customer_info['name'])
-                
-                # Trigger the update manually
-                handle_customer_wht_config_changes(customer_doc, method='validate')
+                enqueue_customer_wht_recalculation(customer_name)
                 
             except Exception as e:
                 frappe.log_error(
-                    f"Error in bulk refresh for Customer {customer_info['name']}: {str(e)}",
+                    f"Error in bulk refresh for Customer {customer_name}: {str(e)}",
                     "Bulk Customer WHT Config Error"
                 )
         
         frappe.msgprint(
-            _(f"Bulk customer WHT configuration refresh complete. Updated {total_updated} documents."),
-            title=_("Bulk Update Complete"),
+            _("WHT recalculation of open sales documents queued for {0} customers").format(len(customers)),
+            title=_("Bulk Update Queued"),
             indicator="green"
         )
         
-        return total_updated
+        return len(customers)
         
     except Exception as e:
         frappe.throw(_(f"Error in bulk customer WHT refresh: {str(e)}"))
@@ -18,24 +18,22 @@ def on_submit_delivery_note(doc, method=None):
 	- Grid access errors (accessing grid before it's loaded)
 	- Disruptive modal popups during warehouse workflow
 
-	The QR code is generated silently and can be viewed on-demand
-	via the "Show QR Code" button.
+	The QR code is generated silently in a background job and can be
+	viewed on-demand via the "Show QR Code" button.
 
 	Triggered by: doc_events hook on Delivery Note on_submit
 	"""
 	try:
-		# Import the QR generation function
-		from print_designer.custom.delivery_note_qr import generate_delivery_approval_qr
-
-		# Generate QR code (server-side, no client interaction)
-		result = generate_delivery_approval_qr(doc.name)
-
-		if result and result.get('qr_code'):
-			frappe.msgprint(
-				_("Delivery approval QR code generated. View it using 'Show QR Code' button."),
-				alert=True,
-				indicator="green"
-			)
+		from print_designer.custom.delivery_note_qr import enqueue_delivery_approval_qr
+
+		# Generated in a background job after the submit commits
+		enqueue_delivery_approval_qr(doc.name)
+
+		frappe.msgprint(
+			_("Delivery approval QR code is being generated. View it using 'Show QR Code' button."),
+			alert=True,
+			indicator="green"
+		)
 
 	except Exception as e:
 		# Don't block DN submission if QR generation fails
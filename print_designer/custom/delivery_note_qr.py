@@ -4,9 +4,10 @@
 import frappe
 from frappe import _
 import qrcode
-from io import BytesIO
 import base64
 
+from print_designer.utils.qr_file import get_qr_data_url, make_qr_png, save_qr_file
+
 @frappe.whitelist()
 def generate_delivery_approval_qr(delivery_note_name):
     """
@@ -36,35 +37,24 @@ def generate_delivery_approval_qr(delivery_note_name):
     # Get approval URL
     approval_url = approval.get_approval_url()
     
-    # Generate QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(approval_url)
-    qr.make(fit=True)
-    
-    # Create QR code image
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to base64
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    img_str = base64.b64encode(buffer.getvalue()).decode()
+    # Generate QR code, stored as a file attached to the delivery note
+    png = make_qr_png(approval_url, error_correction=qrcode.constants.ERROR_CORRECT_L)
+    img_str = base64.b64encode(png).decode()
     
     # Save with proper handling for submitted documents - use db_set directly
+    file_url = None
     try:
-        # Use only the custom field that we know has the right field type
-        delivery_note.db_set('custom_approval_qr_code', img_str, update_modified=False)
-        delivery_note.db_set('custom_approval_url', approval_url, update_modified=False)
+        file_url = save_qr_file("Delivery Note", delivery_note_name, "custom_approval_qr_code", png)
+        delivery_note.db_set(
+            {"custom_approval_qr_code": file_url, "custom_approval_url": approval_url},
+            update_modified=False,
+        )
     except Exception as e:
-        # Minimal error logging to avoid length issues
-        pass
+        frappe.log_error(f"QR Save Error: {delivery_note_name}", "Delivery Note QR Generation")
     
     return {
         "qr_code": img_str,
+        "qr_file_url": file_url,
         "approval_url": approval_url,
         "approval_token": approval.approval_token
     }
@@ -107,11 +97,22 @@ def reject_delivery_goods(delivery_note_name, customer_name, remarks):
     # Use the DocType's rejection method
     return approval.reject_delivery(customer_name, remarks)
 
-@frappe.whitelist()
-def get_delivery_status(delivery_note_name):
+@frappe.whitelist(allow_guest=True)
+def get_delivery_status(delivery_note_name, token=None):
     """
-    Get current delivery status from approval records
+    Get current delivery status from approval records.
+    With an approval token (guest approval page) the status is served from the token cache.
     """
+    if token:
+        from print_designer.print_designer.doctype.delivery_note_approval.delivery_note_approval import get_delivery_status_by_token
+        status = get_delivery_status_by_token(token, delivery_note_name)
+        if not status:
+            frappe.throw(_("Invalid approval token"), frappe.PermissionError)
+        return status
+
+    if frappe.session.user == "Guest":
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
     delivery_note = frappe.get_doc("Delivery Note", delivery_note_name)
     
     # Get the latest approval record
@@ -153,10 +154,11 @@ def get_qr_code_image(delivery_note_name):
     # Check the custom QR code field
     qr_code = delivery_note.custom_approval_qr_code
     if qr_code:
+        data_url = get_qr_data_url(qr_code)
         return {
-            "qr_code": qr_code,
+            "qr_code": data_url.split(",", 1)[-1],
             "approval_url": delivery_note.custom_approval_url,
-            "data_url": f"data:image/png;base64,{qr_code}"
+            "data_url": data_url
         }
     else:
         # Generate QR code if not exists
@@ -169,15 +171,28 @@ def get_qr_code_image(delivery_note_name):
 
 def add_qr_to_delivery_note(doc, method):
     """
-    Automatically add QR code when delivery note is submitted
+    Queue QR code generation when delivery note is submitted
     """
     if doc.docstatus == 1:  # Only when submitted
         try:
-            # Generate QR code automatically
-            generate_delivery_approval_qr(doc.name)
+            enqueue_delivery_approval_qr(doc.name)
         except Exception as e:
             frappe.log_error(f"QR Error: {doc.name}", "QR Generation Hook")
 
+def enqueue_delivery_approval_qr(delivery_note_name):
+    """
+    Generate the approval QR in a background job after the submit commits,
+    so the approval record and QR image are not created inside the submit request
+    """
+    frappe.enqueue(
+        "print_designer.custom.delivery_note_qr.generate_delivery_approval_qr",
+        queue="short",
+        job_id=f"delivery_approval_qr:{frappe.local.site}:{delivery_note_name}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        delivery_note_name=delivery_note_name,
+    )
+
 @frappe.whitelist(allow_guest=True)
 def get_approval_by_token(token):
     """
@@ -0,0 +1,247 @@
+"""
+Bulk QR Code Regeneration for Sales Invoice and Delivery Note
+
+Used after a tax ID correction or a site URL change, when thousands of stored QR codes
+are stale. Document names are streamed in batches (keyset pagination on name), the QR
+images are rendered in a process pool and the QR fields are written back with one bulk
+update per batch. The last processed name is saved with every batch commit, so an
+interrupted run continues where it stopped with `resume`.
+"""
+
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import frappe
+import qrcode
+from frappe import _
+from frappe.utils import now_datetime
+
+from print_designer.custom.sales_invoice_qr import build_invoice_qr_data, get_verification_url
+from print_designer.print_designer.doctype.delivery_note_approval.delivery_note_approval import (
+    get_approval_url,
+)
+from print_designer.utils.qr_file import make_qr_png, save_qr_files
+
+DEFAULT_BATCH_SIZE = 500
+CHECKPOINT_KEY = "print_designer_qr_regeneration:{doctype}:{filters_hash}"
+
+SALES_INVOICE_FIELDS = [
+    "name",
+    "posting_date",
+    "company",
+    "customer",
+    "grand_total",
+    "total_taxes_and_charges",
+    "net_total",
+    "currency",
+]
+
+
+def regenerate_qr_codes(
+    doctype, filters=None, batch_size=DEFAULT_BATCH_SIZE, processes=1, resume=False, progress=None
+):
+    """
+    Regenerate QR codes of submitted `doctype` documents matching `filters`
+
+    Args:
+        doctype: 'Sales Invoice' or 'Delivery Note'
+        filters: extra document filters, e.g. {"company": "..."}
+        batch_size: documents fetched, rendered and written per commit
+        processes: QR rendering processes, 1 renders in this process
+        resume: continue after the last committed batch of the previous run
+        progress: callback(done, total) called after every batch
+
+    Returns:
+        Number of documents whose QR code was regenerated
+    """
+    get_payloads, write_qr_codes, render = get_qr_handler(doctype)
+
+    filters = dict(frappe.parse_json(filters) or {})
+    # runs with other filters keep their own position
+    checkpoint_key = CHECKPOINT_KEY.format(doctype=doctype, filters_hash=get_filters_hash(filters))
+    filters["docstatus"] = 1
+    after = frappe.db.get_global(checkpoint_key) if resume else None
+    if after:
+        filters["name"] = [">", after]
+
+    total = frappe.db.count(doctype, filters)
+    done = updated = 0
+
+    executor = ProcessPoolExecutor(processes) if processes > 1 else None
+    try:
+        for names in iter_document_names(doctype, filters, batch_size):
+            payloads = get_payloads(names)
+            images = render_qr_images(payloads, render, executor)
+            write_qr_codes(payloads, images)
+
+            frappe.db.set_global(checkpoint_key, names[-1])
+            frappe.db.commit()
+
+            done += len(names)
+            updated += len(payloads)
+            if progress:
+                progress(done, total)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    # finished, the next run starts from the beginning
+    frappe.db.set_global(checkpoint_key, None)
+    frappe.db.commit()
+    return updated
+
+
+def get_filters_hash(filters):
+    """Short stable hash of document filters, for checkpoint keys and job ids"""
+    filters = frappe.parse_json(filters) or {}
+    return hashlib.md5(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()[:10]
+
+
+def get_qr_handler(doctype):
+    """(get_payloads, write_qr_codes, render) for a QR doctype"""
+    if doctype == "Sales Invoice":
+        render = partial(make_qr_png, error_correction=qrcode.constants.ERROR_CORRECT_M, border=2)
+        return get_sales_invoice_payloads, write_sales_invoice_qr_codes, render
+    if doctype == "Delivery Note":
+        render = partial(make_qr_png, error_correction=qrcode.constants.ERROR_CORRECT_L)
+        return get_delivery_note_payloads, write_delivery_note_qr_codes, render
+
+    frappe.throw(_("QR codes can only be regenerated for Sales Invoice and Delivery Note"))
+
+
+def iter_document_names(doctype, filters, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield document names in batches, ordered by name so the position can be saved"""
+    filters = dict(filters)
+    while True:
+        names = frappe.get_all(
+            doctype, filters=filters, order_by="name asc", limit=batch_size, pluck="name"
+        )
+        if not names:
+            return
+        yield names
+        filters["name"] = [">", names[-1]]
+
+
+def render_qr_images(payloads, render, executor=None):
+    """{name: png} for {name: qr text}, in the process pool if there is one"""
+    names = list(payloads)
+    texts = [payloads[name] for name in names]
+    if executor:
+        images = executor.map(render, texts, chunksize=max(len(texts) // 16, 1))
+    else:
+        images = map(render, texts)
+    return dict(zip(names, images))
+
+
+def get_sales_invoice_payloads(names):
+    """Thai e-Tax QR text per invoice, tax IDs fetched once for the batch"""
+    invoices = frappe.get_all(
+        "Sales Invoice", filters={"name": ["in", names]}, fields=SALES_INVOICE_FIELDS
+    )
+    company_tax_ids = _get_tax_ids("Company", {invoice.company for invoice in invoices})
+    customer_tax_ids = _get_tax_ids("Customer", {invoice.customer for invoice in invoices})
+
+    payloads = {}
+    for invoice in invoices:
+        qr_data = build_invoice_qr_data(
+            invoice,
+            company_tax_id=company_tax_ids.get(invoice.company) or "",
+            customer_tax_id=customer_tax_ids.get(invoice.customer) or "",
+        )
+        payloads[invoice.name] = json.dumps(qr_data, ensure_ascii=False, separators=(',', ':'))
+    return payloads
+
+
+def _get_tax_ids(doctype, names):
+    names = [name for name in names if name]
+    if not names:
+        return {}
+    return dict(
+        frappe.get_all(doctype, filters={"name": ["in", names]}, fields=["name", "tax_id"], as_list=True)
+    )
+
+
+def write_sales_invoice_qr_codes(payloads, images):
+    generated_on = now_datetime()
+    updates = {}
+    file_urls = save_qr_files("Sales Invoice", "custom_invoice_qr_image", images)
+    for name, file_url in file_urls.items():
+        updates[name] = {
+            "custom_invoice_qr_code": file_url,
+            "custom_invoice_qr_image": file_url,
+            "custom_invoice_qr_url": get_verification_url(name),
+            "custom_invoice_qr_generated_on": generated_on,
+            "custom_invoice_qr_data_version": "1.0",
+        }
+
+    if updates:
+        frappe.db.bulk_update("Sales Invoice", updates, update_modified=False)
+
+
+def get_delivery_note_payloads(names):
+    """
+    Approval URL per delivery note with a pending approval, notes that are already
+    approved / rejected don't need a QR and are skipped
+    """
+    approvals = frappe.get_all(
+        "Delivery Note Approval",
+        filters={"delivery_note": ["in", names], "status": "Pending"},
+        fields=["delivery_note", "approval_token"],
+        order_by="creation asc",
+    )
+    return {
+        approval.delivery_note: get_approval_url(approval.delivery_note, approval.approval_token)
+        for approval in approvals
+    }
+
+
+def write_delivery_note_qr_codes(payloads, images):
+    updates = {}
+    file_urls = save_qr_files("Delivery Note", "custom_approval_qr_code", images)
+    for name, file_url in file_urls.items():
+        updates[name] = {"custom_approval_qr_code": file_url, "custom_approval_url": payloads[name]}
+
+    if updates:
+        frappe.db.bulk_update("Delivery Note", updates, update_modified=False)
+
+
+@frappe.whitelist()
+def enqueue_qr_regeneration(doctype, filters=None, resume=False, processes=1, batch_size=DEFAULT_BATCH_SIZE):
+    """Regenerate QR codes in a background job, progress is published to the user"""
+    frappe.only_for("System Manager")
+    get_qr_handler(doctype)
+
+    frappe.enqueue(
+        "print_designer.custom.qr_regeneration.regenerate_qr_codes_job",
+        queue="long",
+        timeout=4 * 60 * 60,
+        job_id=f"qr_regeneration:{frappe.local.site}:{doctype}:{get_filters_hash(filters)}",
+        deduplicate=True,
+        doctype=doctype,
+        filters=filters,
+        resume=frappe.utils.cint(resume),
+        processes=max(frappe.utils.cint(processes), 1),
+        batch_size=frappe.utils.cint(batch_size) or DEFAULT_BATCH_SIZE,
+    )
+    return {"success": True, "message": _("QR code regeneration for {0} has been queued").format(_(doctype))}
+
+
+def regenerate_qr_codes_job(doctype, filters=None, resume=False, processes=1, batch_size=DEFAULT_BATCH_SIZE):
+    def progress(done, total):
+        frappe.publish_progress(
+            done * 100 / (total or 1),
+            title=_("Regenerating QR Codes"),
+            description=_("{0} of {1} {2}").format(done, total, _(doctype)),
+        )
+
+    updated = regenerate_qr_codes(
+        doctype,
+        filters=filters,
+        batch_size=batch_size,
+        processes=processes,
+        resume=resume,
+        progress=progress,
+    )
+    frappe.logger().info(f"Regenerated {updated} {doctype} QR codes")
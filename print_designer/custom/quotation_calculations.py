@@ -7,6 +7,13 @@ import frappe
 from frappe import _
 from frappe.utils import flt, cint
 
+from print_designer.utils.thai_tax import (
+    THAI_TAX_FIELDS,
+    calculate_thai_tax,
+    get_currency_precision,
+    get_sales_tax_arguments,
+)
+
 
 def quotation_calculate_thailand_amounts(doc, method=None):
     """
@@ -41,14 +48,8 @@ def quotation_calculate_thailand_amounts(doc, method=None):
     # Apply Company defaults if Quotation fields are not specified
     apply_company_defaults(doc)
     
-    # Calculate withholding tax amounts
-    calculate_withholding_tax_amounts(doc)
-    
-    # Calculate retention amounts  
-    calculate_retention_amounts(doc)
-    
-    # Calculate final payment amounts
-    calculate_final_payment_amounts(doc)
+    # Calculate withholding tax, retention and final payment amounts
+    calculate_thailand_tax_amounts(doc)
     
     # DEBUG: Log final state
     frappe.logger().info(f"🔍 Quotation Calc: AFTER - pd_custom_subject_to_wht = {getattr(doc, 'pd_custom_subject_to_wht', 'NOT_SET')}")
@@ -91,71 +92,15 @@ def apply_company_defaults(doc):
         # Don't fail validation - just continue without defaults
 
 
-def calculate_withholding_tax_amounts(doc):
-    """Calculate withholding tax amounts based on pd_custom_withholding_tax_pct percentage"""
-    try:
-        # Only calculate WHT if user has enabled pd_custom_subject_to_wht
-        if doc.get('pd_custom_subject_to_wht') and doc.pd_custom_withholding_tax_pct and doc.net_total:
-            wht_rate = flt(doc.pd_custom_withholding_tax_pct)  # Already in percentage
-            base_amount = flt(doc.net_total)
-            
-            # Calculate WHT amount
-            doc.pd_custom_withholding_tax_amount = flt((base_amount * wht_rate) / 100, 2)
-        else:
-            doc.pd_custom_withholding_tax_amount = 0
-            
-    except Exception as e:
-        frappe.log_error(f"Error calculating withholding tax amounts for Quotation {doc.name}: {str(e)}")
-        # Don't fail validation, just clear WHT fields
-        doc.pd_custom_withholding_tax_amount = 0
-
-
-def calculate_retention_amounts(doc):
-    """Calculate retention amounts when pd_custom_subject_to_retention is enabled"""
+def calculate_thailand_tax_amounts(doc):
+    """Calculate WHT, retention and final payment amounts with the Thai tax engine"""
     try:
-        if doc.pd_custom_subject_to_retention and doc.pd_custom_retention_pct and doc.net_total:
-            retention_rate = flt(doc.pd_custom_retention_pct)  # Already in percentage
-            base_amount = flt(doc.net_total)
-            
-            # Calculate retention amount: pd_custom_retention_amount = net_total * pd_custom_retention_pct
-            doc.pd_custom_retention_amount = flt((base_amount * retention_rate) / 100, 2)
-        else:
-            doc.pd_custom_retention_amount = 0
-            
-    except Exception as e:
-        frappe.log_error(f"Error calculating retention amounts for Quotation {doc.name}: {str(e)}")
-        # Don't fail validation, just clear retention fields
-        doc.pd_custom_retention_amount = 0
-
-
-def calculate_final_payment_amounts(doc):
-    """Calculate final payment amounts after WHT and retention deductions"""
-    try:
-        # Start with grand total (includes VAT)
-        grand_total = flt(doc.grand_total)
-        
-        # Get deduction amounts
-        wht_amount = flt(doc.pd_custom_withholding_tax_amount)
-        retention_amount = flt(doc.pd_custom_retention_amount)
-        
-        # Calculate pd_custom_net_total_after_wht: grand_total - pd_custom_withholding_tax_amount
-        doc.pd_custom_net_total_after_wht = flt(grand_total - wht_amount, 2)
-        
-        # Calculate payment amount based on retention status
-        if doc.pd_custom_subject_to_retention and retention_amount > 0:
-            # 5.2 pd_custom_net_after_wht_retention = grand_total - pd_custom_withholding_tax_amount - pd_custom_retention_amount
-            doc.pd_custom_net_after_wht_retention = flt(grand_total - wht_amount - retention_amount, 2)
-            
-            # 5.3 pd_custom_payment_amount = pd_custom_net_after_wht_retention
-            doc.pd_custom_payment_amount = doc.pd_custom_net_after_wht_retention
-        else:
-            # No retention: pd_custom_payment_amount = pd_custom_net_total_after_wht
-            doc.pd_custom_net_after_wht_retention = 0
-            doc.pd_custom_payment_amount = doc.pd_custom_net_total_after_wht
+        amounts = calculate_thai_tax(
+            precision=get_currency_precision(), **get_sales_tax_arguments(doc)
+        )
+        doc.update({fieldname: amounts[fieldname] for fieldname in THAI_TAX_FIELDS})
         
-        # Ensure payment amount is not negative
-        if doc.pd_custom_payment_amount < 0:
-            doc.pd_custom_payment_amount = 0
+        if amounts["deductions_exceed_total"]:
             frappe.msgprint(
                 _("Warning: Total deductions exceed quotation amount. Payment amount set to zero."),
                 alert=True, indicator="orange"
@@ -165,8 +110,10 @@ def calculate_final_payment_amounts(doc):
         convert_amounts_to_words(doc)
             
     except Exception as e:
-        frappe.log_error(f"Error calculating final payment amounts for Quotation {doc.name}: {str(e)}")
+        frappe.log_error(f"Error calculating Thailand amounts for Quotation {doc.name}: {str(e)}")
         # Fallback to grand total
+        doc.pd_custom_withholding_tax_amount = 0
+        doc.pd_custom_retention_amount = 0
         doc.pd_custom_net_total_after_wht = flt(doc.grand_total)
         doc.pd_custom_payment_amount = flt(doc.grand_total)
         doc.pd_custom_net_after_wht_retention = 0
@@ -5,50 +5,14 @@
 
 import frappe
 from frappe import _
-from frappe.utils import flt, cint
+from frappe.utils import flt
 
-
-def get_currency_precision():
-    """
-    Get currency precision from System Settings.
-
-    Respects the user's Float Precision and Currency Precision settings
-    in System Settings (0-9 range).
-
-    Priority:
-    1. currency_precision from System Settings (for Currency fields)
-    2. Fallback to 2 (standard for most currencies)
-    """
-    precision = cint(frappe.db.get_default("currency_precision"))
-    if not precision:
-        # Fallback to 2 if not set (standard for most currencies like THB)
-        precision = 2
-    return precision
-
-
-def thai_flt(value, precision=None):
-    """
-    Float with Thai Commercial Rounding (round half up).
-
-    Respects System Settings currency_precision (0-9) if precision not specified.
-
-    Thailand uses "round half up" rounding:
-    - 100.505 → 100.51 (not 100.50 like banker's rounding)
-    - 100.504 → 100.50
-    - 100.495 → 100.50
-
-    This is the standard for Thai tax calculations (WHT, VAT, Retention).
-
-    Args:
-        value: The numeric value to round
-        precision: Optional precision override. If None, uses System Settings currency_precision.
-
-    Returns:
-        Float rounded using Thai Commercial Rounding with specified precision.
-    """
-    if precision is None:
-        precision = get_currency_precision()
-    return flt(value, precision, rounding_method="Commercial Rounding")
+from print_designer.utils.thai_tax import (
+    THAI_TAX_FIELDS,
+    calculate_thai_tax,
+    get_currency_precision,
+    get_sales_tax_arguments,
+)
 
 
 def sales_invoice_calculate_thailand_amounts(doc, method=None):
@@ -79,18 +43,12 @@ def sales_invoice_calculate_thailand_amounts(doc, method=None):
     # Apply Company defaults if Sales Invoice fields are not specified
     apply_company_defaults_for_sales_invoice(doc)
     
-    # Calculate withholding tax amounts
-    calculate_withholding_tax_amounts_for_sales_invoice(doc)
+    # Calculate withholding tax, retention and final payment amounts
+    calculate_thailand_tax_amounts_for_sales_invoice(doc)
     
     # Calculate WHT preview (using preview system)
     calculate_wht_preview_for_sales_invoice(doc)
     
-    # Calculate retention amounts if applicable
-    calculate_retention_amounts_for_sales_invoice(doc)
-    
-    # Calculate final payment amounts
-    calculate_final_payment_amounts_for_sales_invoice(doc)
-    
     # DEBUG: Log final state
     frappe.logger().info(f"🔍 Sales Invoice Calc: AFTER - pd_custom_subject_to_wht = {getattr(doc, 'pd_custom_subject_to_wht', 'NOT_SET')}")
     frappe.logger().info(f"🔍 Sales Invoice Calc: Final amounts - pd_custom_net_total_after_wht = {getattr(doc, 'pd_custom_net_total_after_wht', 'NOT_SET')}")
@@ -126,45 +84,34 @@ def apply_company_defaults_for_sales_invoice(doc):
         frappe.log_error(f"Error applying Company defaults to Sales Invoice {doc.name}: {str(e)}")
 
 
-def calculate_withholding_tax_amounts_for_sales_invoice(doc):
-    """Calculate withholding tax amounts based on pd_custom_withholding_tax_pct percentage"""
+def calculate_thailand_tax_amounts_for_sales_invoice(doc):
+    """
+    Calculate WHT, retention and final payment amounts with the Thai tax engine.
+    Current amounts within 0.01 of the calculated value are preserved.
+    """
     try:
-        # Only calculate WHT if user has enabled pd_custom_subject_to_wht
-        if doc.get('pd_custom_subject_to_wht') and doc.pd_custom_withholding_tax_pct and doc.net_total:
-            wht_rate = flt(doc.pd_custom_withholding_tax_pct)  # Already in percentage
-            current_net_total = flt(doc.net_total)
-
-            # Calculate what the WHT amount SHOULD be based on current net_total
-            # Use Thai Commercial Rounding: 100.505 → 100.51
-            expected_wht_amount = thai_flt((current_net_total * wht_rate) / 100)
-            current_wht_amount = flt(doc.get('pd_custom_withholding_tax_amount', 0))
-            
-            # Check if current amount is significantly different from expected (more than 0.01 difference)
-            amount_mismatch = abs(current_wht_amount - expected_wht_amount) > 0.01
-            
-            # Calculate if:
-            # 1. No amount is set yet (new document), OR
-            # 2. Current amount doesn't match what it should be based on net_total (after refresh/item changes)
-            if not current_wht_amount or amount_mismatch:
-                doc.pd_custom_withholding_tax_amount = expected_wht_amount
-                
-                if amount_mismatch and current_wht_amount > 0:
-                    print(f"  - RECALCULATED pd_custom_withholding_tax_amount = {expected_wht_amount} (expected {expected_wht_amount} vs current {current_wht_amount})")
-                    frappe.logger().info(f"Sales Invoice Calc: Recalculated due to amount mismatch: expected {expected_wht_amount} vs current {current_wht_amount}")
-                else:
-                    print(f"  - CALCULATED pd_custom_withholding_tax_amount = {expected_wht_amount} (net_total {current_net_total} * rate {wht_rate}%)")
-                    frappe.logger().info(f"Sales Invoice Calc: Calculated pd_custom_withholding_tax_amount = {expected_wht_amount}")
-            else:
-                print(f"  - PRESERVED pd_custom_withholding_tax_amount = {current_wht_amount} (already correct value)")
-                frappe.logger().info(f"Sales Invoice Calc: Preserved pd_custom_withholding_tax_amount = {current_wht_amount}")
-        else:
-            # Clear amount if conditions not met
-            doc.pd_custom_withholding_tax_amount = 0
+        amounts = calculate_thai_tax(
+            precision=get_currency_precision(), **get_sales_tax_arguments(doc, keep_close_amounts=True)
+        )
+        doc.update({fieldname: amounts[fieldname] for fieldname in THAI_TAX_FIELDS})
+        
+        if amounts["deductions_exceed_total"]:
+            frappe.msgprint(
+                _("Warning: Total deductions exceed sales invoice amount. Payment amount set to zero."),
+                alert=True, indicator="orange"
+            )
+        
+        # Convert amounts to words (Thai language support)
+        convert_amounts_to_words_for_sales_invoice(doc)
             
     except Exception as e:
-        frappe.log_error(f"Error calculating withholding tax amounts for Sales Invoice {doc.name}: {str(e)}")
-        # Don't fail validation, just clear WHT fields
+        frappe.log_error(f"Error calculating Thailand amounts for Sales Invoice {doc.name}: {str(e)}")
+        # Fallback to grand total
         doc.pd_custom_withholding_tax_amount = 0
+        doc.pd_custom_retention_amount = 0
+        doc.pd_custom_net_total_after_wht = flt(doc.grand_total)
+        doc.pd_custom_payment_amount = flt(doc.grand_total)
+        doc.pd_custom_net_after_wht_retention = 0
 
 
 def calculate_wht_preview_for_sales_invoice(doc):
@@ -197,86 +144,6 @@ def calculate_wht_preview_for_sales_invoice(doc):
         )
 
 
-def calculate_retention_amounts_for_sales_invoice(doc):
-    """Calculate retention amounts when pd_custom_subject_to_retention is enabled"""
-    try:
-        if doc.get('pd_custom_subject_to_retention') and doc.get('pd_custom_retention_pct') and doc.net_total:
-            retention_rate = flt(doc.pd_custom_retention_pct)
-            base_amount = flt(doc.net_total)
-
-            # Calculate retention amount with Thai Commercial Rounding: 100.505 → 100.51
-            doc.pd_custom_retention_amount = thai_flt((base_amount * retention_rate) / 100)
-        else:
-            doc.pd_custom_retention_amount = 0
-            
-    except Exception as e:
-        frappe.log_error(f"Error calculating retention amounts for Sales Invoice {doc.name}: {str(e)}")
-        doc.pd_custom_retention_amount = 0
-
-
-def calculate_final_payment_amounts_for_sales_invoice(doc):
-    """Calculate final payment amounts after WHT and retention deductions"""
-    try:
-        # Start with grand total (includes VAT)
-        grand_total = flt(doc.grand_total)
-        
-        # Get deduction amounts - use correct field name: pd_custom_withholding_tax_amount (not estimated_wht_amount)
-        wht_amount = flt(getattr(doc, 'pd_custom_withholding_tax_amount', 0))
-        retention_amount = flt(getattr(doc, 'pd_custom_retention_amount', 0))
-        
-        # Calculate what pd_custom_net_total_after_wht SHOULD be based on current grand_total and wht_amount
-        # Use Thai Commercial Rounding for consistency
-        expected_net_total_after_wht = thai_flt(grand_total - wht_amount)
-        current_net_total_after_wht = flt(doc.get('pd_custom_net_total_after_wht', 0))
-        
-        # Check if current amount is significantly different from expected
-        amount_mismatch = abs(current_net_total_after_wht - expected_net_total_after_wht) > 0.01
-        
-        # Calculate if:
-        # 1. No amount is set yet (new document), OR  
-        # 2. Current amount doesn't match what it should be based on grand_total and wht_amount
-        if not current_net_total_after_wht or amount_mismatch:
-            doc.pd_custom_net_total_after_wht = expected_net_total_after_wht
-            
-            if amount_mismatch and current_net_total_after_wht > 0:
-                frappe.logger().info(f"Sales Invoice Calc: Recalculated pd_custom_net_total_after_wht due to amount mismatch: expected {expected_net_total_after_wht} vs current {current_net_total_after_wht}")
-            else:
-                frappe.logger().info(f"Sales Invoice Calc: Calculated pd_custom_net_total_after_wht = {expected_net_total_after_wht}")
-        else:
-            frappe.logger().info(f"Sales Invoice Calc: Preserved pd_custom_net_total_after_wht = {current_net_total_after_wht}")
-        
-        # Calculate payment amount based on retention status
-        if doc.get('pd_custom_subject_to_retention') and retention_amount > 0:
-            # pd_custom_net_after_wht_retention = grand_total - pd_custom_withholding_tax_amount - pd_custom_retention_amount
-            # Use Thai Commercial Rounding for consistency
-            doc.pd_custom_net_after_wht_retention = thai_flt(grand_total - wht_amount - retention_amount)
-            
-            # pd_custom_payment_amount = pd_custom_net_after_wht_retention
-            doc.pd_custom_payment_amount = doc.pd_custom_net_after_wht_retention
-        else:
-            # No retention: pd_custom_payment_amount = pd_custom_net_total_after_wht
-            doc.pd_custom_net_after_wht_retention = 0
-            doc.pd_custom_payment_amount = doc.pd_custom_net_total_after_wht
-        
-        # Ensure payment amount is not negative
-        if doc.pd_custom_payment_amount < 0:
-            doc.pd_custom_payment_amount = 0
-            frappe.msgprint(
-                _("Warning: Total deductions exceed sales invoice amount. Payment amount set to zero."),
-                alert=True, indicator="orange"
-            )
-        
-        # Convert amounts to words (Thai language support)
-        convert_amounts_to_words_for_sales_invoice(doc)
-            
-    except Exception as e:
-        frappe.log_error(f"Error calculating final payment amounts for Sales Invoice {doc.name}: {str(e)}")
-        # Fallback to grand total
-        doc.pd_custom_net_total_after_wht = flt(doc.grand_total)
-        doc.pd_custom_payment_amount = flt(doc.grand_total)
-        doc.pd_custom_net_after_wht_retention = 0
-
-
 def convert_amounts_to_words_for_sales_invoice(doc):
     """
     Convert calculated amounts to words for display in Thai documents.
@@ -519,14 +386,16 @@ def preview_wht_calculation_for_sales_invoice(customer, grand_total, net_total=N
         
         # If customer is subject to WHT, calculate basic amount
         if preview_result['pd_custom_subject_to_wht']:
-            wht_rate = getattr(customer_doc, 'custom_wht_rate', 0)
+            wht_rate = flt(getattr(customer_doc, 'custom_wht_rate', 0))
             if wht_rate > 0:
                 base_amount = flt(net_total) if net_total else flt(grand_total)
-                wht_amount = flt((base_amount * wht_rate) / 100, 2)
+                amounts = calculate_thai_tax(
+                    [base_amount], grand_total, wht_rate=wht_rate, precision=get_currency_precision()
+                )
                 
                 preview_result.update({
-                    'pd_custom_withholding_tax_amount': wht_amount,
-                    'pd_custom_net_total_after_wht': flt(grand_total - wht_amount, 2),
+                    'pd_custom_withholding_tax_amount': amounts['pd_custom_withholding_tax_amount'],
+                    'pd_custom_net_total_after_wht': amounts['pd_custom_net_total_after_wht'],
                     'pd_custom_wht_income_type': getattr(customer_doc, 'pd_custom_wht_income_type', 'service_fees')
                 })
         
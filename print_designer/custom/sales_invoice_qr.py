@@ -8,11 +8,15 @@ import frappe
 from frappe import _
 from frappe.utils import now_datetime, getdate, flt
 import qrcode
-from io import BytesIO
 import base64
 
+from print_designer.utils.qr_file import get_qr_data_url, make_qr_png, make_qr_svg, save_qr_file
 
-def build_invoice_qr_data(doc):
+_QR_SVG_CACHE = {}
+_QR_SVG_CACHE_SIZE = 256
+
+
+def build_invoice_qr_data(doc, company_tax_id=None, customer_tax_id=None):
     """
     Build Thai e-Tax format JSON payload for QR code
 
@@ -29,17 +33,14 @@ def build_invoice_qr_data(doc):
         "v": "1.0"                     # Data version
     }
     """
-    # Get company tax ID
-    company_tax_id = ""
+    # Get company / customer tax ID (cached, they rarely change), bulk callers pass them in
     company = doc.get("company")
-    if company:
-        company_tax_id = frappe.db.get_value("Company", company, "tax_id") or ""
+    if company_tax_id is None:
+        company_tax_id = company and frappe.get_cached_value("Company", company, "tax_id") or ""
 
-    # Get customer tax ID
-    customer_tax_id = ""
     customer = doc.get("customer")
-    if customer:
-        customer_tax_id = frappe.db.get_value("Customer", customer, "tax_id") or ""
+    if customer_tax_id is None:
+        customer_tax_id = customer and frappe.get_cached_value("Customer", customer, "tax_id") or ""
 
     # Build QR data
     posting_date = doc.get("posting_date")
@@ -68,45 +69,37 @@ def generate_sales_invoice_qr(invoice_name):
     """
     Generate QR code for Sales Invoice with Thai e-Tax format data
     """
-    # Get Sales Invoice
-    invoice = frappe.get_doc("Sales Invoice", invoice_name)
+    return _generate_sales_invoice_qr(frappe.get_doc("Sales Invoice", invoice_name))
+
+
+def _generate_sales_invoice_qr(invoice):
+    invoice_name = invoice.name
+    _clear_invoice_qr_memo(invoice_name)
 
     # Build QR data
     qr_data = build_invoice_qr_data(invoice)
     qr_json = json.dumps(qr_data, ensure_ascii=False, separators=(',', ':'))
 
-    # Generate QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
-        border=2,
-    )
-    qr.add_data(qr_json)
-    qr.make(fit=True)
-
-    # Create QR code image
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    # Convert to base64
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    img_str = base64.b64encode(buffer.getvalue()).decode()
+    # Generate QR code, stored as a file attached to the invoice
+    png = make_qr_png(qr_json, error_correction=qrcode.constants.ERROR_CORRECT_M, border=2)
+    img_str = base64.b64encode(png).decode()
 
     # Build verification URL (optional - can be customized per deployment)
-    site_url = frappe.utils.get_url()
-    verification_url = f"{site_url}/api/method/print_designer.custom.sales_invoice_qr.verify_invoice?invoice={invoice_name}"
-
-    # Build full data URL for Print Designer Image element
-    data_url = f"data:image/png;base64,{img_str}"
+    verification_url = get_verification_url(invoice_name)
 
-    # Save to invoice using db_set for submitted documents
+    # Save to invoice using db_set for submitted documents, the image is kept as a file url
     try:
-        invoice.db_set('custom_invoice_qr_code', img_str, update_modified=False)
-        invoice.db_set('custom_invoice_qr_image', data_url, update_modified=False)  # For Print Designer drag & drop
-        invoice.db_set('custom_invoice_qr_url', verification_url, update_modified=False)
-        invoice.db_set('custom_invoice_qr_generated_on', now_datetime(), update_modified=False)
-        invoice.db_set('custom_invoice_qr_data_version', '1.0', update_modified=False)
+        file_url = save_qr_file("Sales Invoice", invoice_name, "custom_invoice_qr_image", png)
+        invoice.db_set(
+            {
+                'custom_invoice_qr_code': file_url,
+                'custom_invoice_qr_image': file_url,  # For Print Designer drag & drop
+                'custom_invoice_qr_url': verification_url,
+                'custom_invoice_qr_generated_on': now_datetime(),
+                'custom_invoice_qr_data_version': '1.0',
+            },
+            update_modified=False,
+        )
     except Exception as e:
         frappe.log_error(f"QR Save Error: {invoice_name} - {str(e)}", "Sales Invoice QR Generation")
 
@@ -118,9 +111,83 @@ def generate_sales_invoice_qr(invoice_name):
     }
 
 
+def get_invoice_qr(invoice_name, image_format="png"):
+    """
+    QR code of a Sales Invoice for print, computed once per request and shared by
+    every QR macro / `get_qr_code_for_print` call on the page.
+
+    `image_format` "svg" renders the QR as an inline svg from the payload instead of
+    the stored png. Returns a dict with invoice, data_url and verification_url,
+    or None if the QR is hidden or not available.
+    """
+    memo = getattr(frappe.local, "pd_sales_invoice_qr", None)
+    if memo is None:
+        memo = frappe.local.pd_sales_invoice_qr = {}
+
+    # every key starts with the invoice name, so an invoice's entries can be dropped together
+    invoice = memo.get((invoice_name, "doc"))
+    if invoice is None:
+        invoice = memo[(invoice_name, "doc")] = frappe.get_doc("Sales Invoice", invoice_name)
+
+    key = (invoice_name, str(invoice.modified), image_format)
+    if key not in memo:
+        memo[key] = _get_invoice_qr(invoice, image_format)
+    return memo[key]
+
+
+def _get_invoice_qr(invoice, image_format):
+    # Check if QR display is enabled
+    show_qr = invoice.get("custom_show_qr_on_print")
+    if show_qr is not None and not show_qr:
+        return None
+
+    qr_code = invoice.get("custom_invoice_qr_code")
+    if image_format == "svg":
+        if not qr_code and invoice.docstatus != 1:
+            return None
+        data_url = get_invoice_qr_svg(invoice)
+    else:
+        # Generate QR code if not exists and document is submitted
+        if not qr_code and invoice.docstatus == 1:
+            qr_code = _generate_sales_invoice_qr(invoice)["qr_code"]
+        if not qr_code:
+            return None
+        data_url = get_qr_data_url(qr_code)
+
+    verification_url = invoice.get("custom_invoice_qr_url") or get_verification_url(invoice.name)
+    return frappe._dict(invoice=invoice, data_url=data_url, verification_url=verification_url)
+
+
+def get_invoice_qr_svg(invoice):
+    """Data uri of the invoice QR as svg, cached per invoice version"""
+    key = (frappe.local.site, invoice.name, str(invoice.modified))
+    data_url = _QR_SVG_CACHE.get(key)
+    if data_url is None:
+        qr_json = json.dumps(build_invoice_qr_data(invoice), ensure_ascii=False, separators=(',', ':'))
+        svg = make_qr_svg(qr_json, error_correction=qrcode.constants.ERROR_CORRECT_M, border=2)
+        data_url = f"data:image/svg+xml;base64,{base64.b64encode(svg).decode()}"
+
+        if len(_QR_SVG_CACHE) >= _QR_SVG_CACHE_SIZE:
+            _QR_SVG_CACHE.clear()
+        _QR_SVG_CACHE[key] = data_url
+    return data_url
+
+
+def get_verification_url(invoice_name):
+    site_url = frappe.utils.get_url()
+    return f"{site_url}/api/method/print_designer.custom.sales_invoice_qr.verify_invoice?invoice={invoice_name}"
+
+
+def _clear_invoice_qr_memo(invoice_name):
+    memo = getattr(frappe.local, "pd_sales_invoice_qr", None)
+    if memo:
+        for key in [key for key in memo if key[0] == invoice_name]:
+            del memo[key]
+
+
 def add_qr_to_sales_invoice(doc, method):
     """
-    Automatically add QR code when Sales Invoice is submitted
+    Queue QR code generation when Sales Invoice is submitted
     Hook for doc_events on_submit
     """
     if doc.docstatus == 1:  # Only when submitted
@@ -128,7 +195,15 @@ def add_qr_to_sales_invoice(doc, method):
             # Check if QR should be generated
             show_qr = doc.get("custom_show_qr_on_print")
             if show_qr is None or show_qr:  # Default to True if not set
-                generate_sales_invoice_qr(doc.name)
+                # Rendered in the background, prints generate it on demand if the job hasn't run yet
+                frappe.enqueue(
+                    "print_designer.custom.sales_invoice_qr.generate_sales_invoice_qr",
+                    queue="short",
+                    job_id=f"sales_invoice_qr:{frappe.local.site}:{doc.name}",
+                    deduplicate=True,
+                    enqueue_after_commit=True,
+                    invoice_name=doc.name,
+                )
         except Exception as e:
             frappe.log_error(f"QR Error: {doc.name} - {str(e)}", "Sales Invoice QR Hook")
 
@@ -138,32 +213,15 @@ def get_qr_code_for_print(invoice_name):
     """
     Get QR code image for print format, generating if needed
     """
-    invoice = frappe.get_doc("Sales Invoice", invoice_name)
-
-    # Check if QR display is enabled
-    show_qr = invoice.get("custom_show_qr_on_print")
-    if show_qr is not None and not show_qr:
+    qr = get_invoice_qr(invoice_name)
+    if not qr:
         return None
 
-    # Check if QR code already exists
-    qr_code = invoice.get("custom_invoice_qr_code")
-    if qr_code:
-        return {
-            "qr_code": qr_code,
-            "data_url": f"data:image/png;base64,{qr_code}",
-            "verification_url": invoice.get("custom_invoice_qr_url")
-        }
-
-    # Generate QR code if not exists and document is submitted
-    if invoice.docstatus == 1:
-        qr_data = generate_sales_invoice_qr(invoice_name)
-        return {
-            "qr_code": qr_data["qr_code"],
-            "data_url": qr_data["data_url"],
-            "verification_url": qr_data["verification_url"]
-        }
-
-    return None
+    return {
+        "qr_code": qr.data_url.split(",", 1)[-1],
+        "data_url": qr.data_url,
+        "verification_url": qr.verification_url
+    }
 
 
 @frappe.whitelist()
@@ -7,6 +7,13 @@ import frappe
 from frappe import _
 from frappe.utils import flt, cint
 
+from print_designer.utils.thai_tax import (
+    THAI_TAX_FIELDS,
+    calculate_thai_tax,
+    get_currency_precision,
+    get_sales_tax_arguments,
+)
+
 
 def sales_order_calculate_thailand_amounts(doc, method=None):
     """
@@ -42,18 +49,12 @@ def sales_order_calculate_thailand_amounts(doc, method=None):
     # Apply Company defaults if Sales Order fields are not specified
     apply_company_defaults_for_sales_order(doc)
     
-    # Calculate withholding tax amounts
-    calculate_withholding_tax_amounts_for_sales_order(doc)
+    # Calculate withholding tax, retention and final payment amounts
+    calculate_thailand_tax_amounts_for_sales_order(doc)
     
     # Calculate WHT preview (using preview system)
     calculate_wht_preview_for_sales_order(doc)
     
-    # Calculate retention amounts if applicable
-    calculate_retention_amounts_for_sales_order(doc)
-    
-    # Calculate final payment amounts
-    calculate_final_payment_amounts_for_sales_order(doc)
-    
     # DEBUG: Log final state
     frappe.logger().info(f"🔍 Sales Order Calc: AFTER - pd_custom_subject_to_wht = {getattr(doc, 'pd_custom_subject_to_wht', 'NOT_SET')}")
     frappe.logger().info(f"🔍 Sales Order Calc: Final amounts - pd_custom_net_total_after_wht = {getattr(doc, 'pd_custom_net_total_after_wht', 'NOT_SET')}")
@@ -89,44 +90,34 @@ def apply_company_defaults_for_sales_order(doc):
         frappe.log_error(f"Error applying Company defaults to Sales Order {doc.name}: {str(e)}")
 
 
-def calculate_withholding_tax_amounts_for_sales_order(doc):
-    """Calculate withholding tax amounts based on pd_custom_withholding_tax_pct percentage"""
+def calculate_thailand_tax_amounts_for_sales_order(doc):
+    """
+    Calculate WHT, retention and final payment amounts with the Thai tax engine.
+    Current amounts within 0.01 of the calculated value are preserved.
+    """
     try:
-        # Only calculate WHT if user has enabled pd_custom_subject_to_wht
-        if doc.get('pd_custom_subject_to_wht') and doc.pd_custom_withholding_tax_pct and doc.net_total:
-            wht_rate = flt(doc.pd_custom_withholding_tax_pct)  # Already in percentage
-            current_net_total = flt(doc.net_total)
-            
-            # Calculate what the WHT amount SHOULD be based on current net_total
-            expected_wht_amount = flt((current_net_total * wht_rate) / 100, 2)
-            current_wht_amount = flt(doc.get('pd_custom_withholding_tax_amount', 0))
-            
-            # Check if current amount is significantly different from expected (more than 0.01 difference)
-            amount_mismatch = abs(current_wht_amount - expected_wht_amount) > 0.01
-            
-            # Calculate if:
-            # 1. No amount is set yet (new document), OR
-            # 2. Current amount doesn't match what it should be based on net_total (after refresh/item changes)
-            if not current_wht_amount or amount_mismatch:
-                doc.pd_custom_withholding_tax_amount = expected_wht_amount
-                
-                if amount_mismatch and current_wht_amount > 0:
-                    print(f"  - RECALCULATED pd_custom_withholding_tax_amount = {doc.pd_custom_withholding_tax_amount} (was {current_wht_amount}, expected {expected_wht_amount} for net_total {current_net_total})")
-                    frappe.logger().info(f"Sales Order Calc: Recalculated WHT due to mismatch - was {current_wht_amount}, now {expected_wht_amount}")
-                else:
-                    print(f"  - CALCULATED pd_custom_withholding_tax_amount = {doc.pd_custom_withholding_tax_amount} (net_total {current_net_total} * rate {wht_rate}%)")
-                    frappe.logger().info(f"Sales Order Calc: Calculated pd_custom_withholding_tax_amount = {doc.pd_custom_withholding_tax_amount}")
-            else:
-                print(f"  - PRESERVED pd_custom_withholding_tax_amount = {doc.pd_custom_withholding_tax_amount} (matches expected {expected_wht_amount})")
-                frappe.logger().info(f"Sales Order Calc: Preserved WHT amount = {doc.pd_custom_withholding_tax_amount} (correct for net_total {current_net_total})")
-        else:
-            # Clear amount if conditions not met
-            doc.pd_custom_withholding_tax_amount = 0
+        amounts = calculate_thai_tax(
+            precision=get_currency_precision(), **get_sales_tax_arguments(doc, keep_close_amounts=True)
+        )
+        doc.update({fieldname: amounts[fieldname] for fieldname in THAI_TAX_FIELDS})
+        
+        if amounts["deductions_exceed_total"]:
+            frappe.msgprint(
+                _("Warning: Total deductions exceed sales order amount. Payment amount set to zero."),
+                alert=True, indicator="orange"
+            )
+        
+        # Convert amounts to words (Thai language support)
+        convert_amounts_to_words_for_sales_order(doc)
             
     except Exception as e:
-        frappe.log_error(f"Error calculating withholding tax amounts for Sales Order {doc.name}: {str(e)}")
-        # Don't fail validation, just clear WHT fields
+        frappe.log_error(f"Error calculating Thailand amounts for Sales Order {doc.name}: {str(e)}")
+        # Fallback to grand total
         doc.pd_custom_withholding_tax_amount = 0
+        doc.pd_custom_retention_amount = 0
+        doc.pd_custom_net_total_after_wht = flt(doc.grand_total)
+        doc.pd_custom_payment_amount = flt(doc.grand_total)
+        doc.pd_custom_net_after_wht_retention = 0
 
 
 def calculate_wht_preview_for_sales_order(doc):
@@ -159,109 +150,6 @@ def calculate_wht_preview_for_sales_order(doc):
         )
 
 
-def calculate_retention_amounts_for_sales_order(doc):
-    """Calculate retention amounts when pd_custom_subject_to_retention is enabled"""
-    try:
-        if doc.get('pd_custom_subject_to_retention') and doc.get('pd_custom_retention_pct') and doc.net_total:
-            retention_rate = flt(doc.pd_custom_retention_pct)
-            base_amount = flt(doc.net_total)
-            
-            # Calculate retention amount
-            doc.pd_custom_retention_amount = flt((base_amount * retention_rate) / 100, 2)
-        else:
-            doc.pd_custom_retention_amount = 0
-            
-    except Exception as e:
-        frappe.log_error(f"Error calculating retention amounts for Sales Order {doc.name}: {str(e)}")
-        doc.pd_custom_retention_amount = 0
-
-
-def calculate_final_payment_amounts_for_sales_order(doc):
-    """Calculate final payment amounts after WHT and retention deductions"""
-    try:
-        # Start with grand total (includes VAT)
-        grand_total = flt(doc.grand_total)
-        
-        # DEBUG: Print initial values
-        print(f"🔍 Sales Order Payment Calc START:")
-        print(f"  - grand_total = {grand_total}")
-        print(f"  - pd_custom_net_total_after_wht (before) = {getattr(doc, 'pd_custom_net_total_after_wht', 'NOT_SET')}")
-        print(f"  - pd_custom_payment_amount (before) = {getattr(doc, 'pd_custom_payment_amount', 'NOT_SET')}")
-        
-        # Get deduction amounts - use correct field name: pd_custom_withholding_tax_amount (not estimated_wht_amount)
-        wht_amount = flt(getattr(doc, 'pd_custom_withholding_tax_amount', 0))
-        retention_amount = flt(getattr(doc, 'pd_custom_retention_amount', 0))
-        
-        print(f"  - pd_custom_withholding_tax_amount = {wht_amount}")
-        print(f"  - pd_custom_retention_amount = {retention_amount}")
-        
-        # Calculate what pd_custom_net_total_after_wht SHOULD be based on current grand_total and wht_amount
-        expected_net_total_after_wht = flt(grand_total - wht_amount, 2)
-        current_net_total_after_wht = flt(doc.get('pd_custom_net_total_after_wht', 0))
-        
-        # Check if current amount is significantly different from expected
-        amount_mismatch = abs(current_net_total_after_wht - expected_net_total_after_wht) > 0.01
-        
-        # Calculate if:
-        # 1. No amount is set yet (new document), OR
-        # 2. Current amount doesn't match what it should be based on grand_total and wht_amount
-        if not current_net_total_after_wht or amount_mismatch:
-            doc.pd_custom_net_total_after_wht = expected_net_total_after_wht
-            
-            if amount_mismatch and current_net_total_after_wht > 0:
-                print(f"  - RECALCULATED pd_custom_net_total_after_wht = {doc.pd_custom_net_total_after_wht} (was {current_net_total_after_wht}, expected {expected_net_total_after_wht})")
-                frappe.logger().info(f"Sales Order Calc: Recalculated pd_custom_net_total_after_wht due to mismatch - was {current_net_total_after_wht}, now {expected_net_total_after_wht}")
-            else:
-                print(f"  - CALCULATED pd_custom_net_total_after_wht = {doc.pd_custom_net_total_after_wht} (grand_total {grand_total} - wht_amount {wht_amount})")
-                frappe.logger().info(f"Sales Order Calc: Calculated pd_custom_net_total_after_wht = {doc.pd_custom_net_total_after_wht}")
-        else:
-            print(f"  - PRESERVED pd_custom_net_total_after_wht = {doc.pd_custom_net_total_after_wht} (matches expected {expected_net_total_after_wht})")
-            frappe.logger().info(f"Sales Order Calc: Preserved pd_custom_net_total_after_wht = {doc.pd_custom_net_total_after_wht} (correct for grand_total {grand_total})")
-        
-        # Calculate payment amount based on retention status
-        print(f"  - pd_custom_subject_to_retention = {doc.get('pd_custom_subject_to_retention')}")
-        
-        if doc.get('pd_custom_subject_to_retention') and retention_amount > 0:
-            # pd_custom_net_after_wht_retention = grand_total - pd_custom_withholding_tax_amount - pd_custom_retention_amount
-            doc.pd_custom_net_after_wht_retention = flt(grand_total - wht_amount - retention_amount, 2)
-            print(f"  - RETENTION ACTIVE: pd_custom_net_after_wht_retention = {doc.pd_custom_net_after_wht_retention} (grand_total {grand_total} - wht {wht_amount} - retention {retention_amount})")
-            
-            # pd_custom_payment_amount = pd_custom_net_after_wht_retention
-            doc.pd_custom_payment_amount = doc.pd_custom_net_after_wht_retention
-            print(f"  - pd_custom_payment_amount = {doc.pd_custom_payment_amount} (with retention)")
-        else:
-            # No retention: pd_custom_payment_amount = pd_custom_net_total_after_wht
-            doc.pd_custom_net_after_wht_retention = 0
-            doc.pd_custom_payment_amount = doc.pd_custom_net_total_after_wht
-            print(f"  - NO RETENTION: pd_custom_payment_amount = {doc.pd_custom_payment_amount} (equals pd_custom_net_total_after_wht)")
-        
-        # Ensure payment amount is not negative
-        if doc.pd_custom_payment_amount < 0:
-            print(f"  - WARNING: Payment amount was negative ({doc.pd_custom_payment_amount}), setting to 0")
-            doc.pd_custom_payment_amount = 0
-            frappe.msgprint(
-                _("Warning: Total deductions exceed sales order amount. Payment amount set to zero."),
-                alert=True, indicator="orange"
-            )
-        
-        # Convert amounts to words (Thai language support)
-        convert_amounts_to_words_for_sales_order(doc)
-        
-        # DEBUG: Print final summary
-        print(f"🔍 Sales Order Payment Calc END:")
-        print(f"  - FINAL pd_custom_net_total_after_wht = {doc.pd_custom_net_total_after_wht}")
-        print(f"  - FINAL pd_custom_payment_amount = {doc.pd_custom_payment_amount}")
-        print(f"  - FINAL pd_custom_net_after_wht_retention = {getattr(doc, 'pd_custom_net_after_wht_retention', 0)}")
-        print("=" * 50)
-            
-    except Exception as e:
-        frappe.log_error(f"Error calculating final payment amounts for Sales Order {doc.name}: {str(e)}")
-        # Fallback to grand total
-        doc.pd_custom_net_total_after_wht = flt(doc.grand_total)
-        doc.pd_custom_payment_amount = flt(doc.grand_total)
-        doc.pd_custom_net_after_wht_retention = 0
-
-
 def convert_amounts_to_words_for_sales_order(doc):
     """
     Convert calculated amounts to words for display in Thai documents.
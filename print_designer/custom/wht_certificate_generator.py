@@ -235,21 +235,8 @@ def create_wht_certificate_from_payment_entry(payment_entry_doc):
         else:
             print(f"SUCCESS: Certificate link verified successfully")
 
-        # Auto-refresh PND53 Form using background job for production reliability
-        print(f"DEBUG: Scheduling background job for auto-refresh of certificate {wht_cert.name}")
-        frappe.enqueue(
-            method="print_designer.custom.wht_certificate_generator.auto_refresh_pnd_form_job",
-            queue="short",
-            timeout=120,
-            job_name=f"auto_refresh_pnd53_{wht_cert.name}",
-            wht_cert_name=wht_cert.name,
-            wht_cert_data={
-                "tax_year": wht_cert.tax_year,
-                "tax_month": wht_cert.tax_month,
-                "pnd_form_type": wht_cert.pnd_form_type
-            },
-            is_async=True
-        )
+        # Submitting the certificate added its row to the PND form of the tax period,
+        # auto_refresh_pnd_form_job is only needed to repair a form that missed it
 
         frappe.msgprint(
             _("Withholding Tax Certificate {0} created successfully").format(wht_cert.name),
@@ -546,7 +533,10 @@ def _auto_refresh_pnd_form(wht_cert):
 @frappe.whitelist()
 def auto_refresh_pnd_form_job(wht_cert_name, wht_cert_data):
     """
-    Production-grade background job for auto-refreshing PND53 Forms
+    Production-grade background job for repairing PND53 Forms
+
+    Certificates are added to their PND form row by row when submitted, this job does
+    a full refresh of the period's forms that are missing the certificate.
 
     This function runs as a background job to ensure:
     1. Database consistency - certificate is fully committed
@@ -616,6 +606,10 @@ def auto_refresh_pnd_form_job(wht_cert_name, wht_cert_data):
         for pnd_form in existing_pnd_forms:
             try:
                 print(f"DEBUG: Processing PND53 Form {pnd_form.name}")
+                if frappe.db.exists("PND53 Items", {"parent": pnd_form.name, "withholding_tax_cert": wht_cert_name}):
+                    # Already added on certificate submit, no full refresh needed
+                    continue
+
                 pnd_doc = frappe.get_doc("PND53 Form", pnd_form.name)
 
                 # Count certificates before refresh
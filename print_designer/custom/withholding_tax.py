@@ -5,9 +5,12 @@ Handles WHT calculations, certificate generation, and compliance reporting
 
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate, nowdate, add_days, format_date
+from frappe.query_builder.functions import Count, Sum
+from frappe.utils import cint, flt, getdate, nowdate, add_days, format_date
 from frappe.model.document import Document
 import json
+import re
+import time
 from datetime import datetime
 
 
@@ -134,34 +137,90 @@ def get_service_amount_for_wht(purchase_invoice):
     return service_amount
 
 
+# Every column holding numbers of the shared WHT-YYYY-MM-NNNN series
+WHT_CERTIFICATE_NUMBER_FIELDS = [
+    ("Payment Entry", "custom_wht_certificate_number"),
+    ("Purchase Invoice", "custom_wht_certificate_number"),
+]
+
+
+def get_certificate_number_series():
+    now = datetime.now()
+    return f"WHT-{now.year}-{now.month:02d}-"
+
+
 def generate_certificate_number(doc):
     """
     Generate Thai WHT certificate number in format: WHT-YYYY-MM-NNNN
     """
-    now = datetime.now()
-    prefix = f"WHT-{now.year}-{now.month:02d}-"
-    
-    # Get next sequence number for this month
-    last_cert = frappe.db.sql("""
-        SELECT custom_wht_certificate_number 
-        FROM `tab{}` 
-        WHERE custom_wht_certificate_number LIKE %s 
-        ORDER BY custom_wht_certificate_number DESC 
-        LIMIT 1
-    """.format(doc.doctype), f"{prefix}%")
-    
-    if last_cert and last_cert[0][0]:
-        try:
-            last_number = int(last_cert[0][0].split('-')[-1])
-            next_number = last_number + 1
-        except (ValueError, IndexError):
-            next_number = 1
-    else:
-        next_number = 1
-        
+    prefix = get_certificate_number_series()
+    next_number = get_next_wht_sequence(prefix, WHT_CERTIFICATE_NUMBER_FIELDS)
+
     return f"{prefix}{next_number:04d}"
 
 
+def peek_certificate_number():
+    """
+    Certificate number the next save would be given, for documents printed before
+    their number is stored. Read only: nothing is locked or used up.
+    """
+    prefix = get_certificate_number_series()
+    current = frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s", prefix)
+    last_number = cint(current[0][0]) if current else get_last_wht_number(prefix, WHT_CERTIFICATE_NUMBER_FIELDS)
+
+    return f"{prefix}{last_number + 1:04d}"
+
+
+def get_next_wht_sequence(series, number_fields):
+    """
+    Next number of the WHT certificate `series` (the number prefix, e.g. "WHT-2026-10-").
+
+    The counter is a row in tabSeries, the same counter make_autoname uses: it is
+    incremented in place and stays locked until the transaction commits, so concurrent
+    saves can't get the same number and no certificate table is scanned. The first use
+    of a series starts after the highest number already stored in any of the
+    `number_fields` ([(doctype, fieldname)]) sharing the series.
+    """
+    from frappe.model.naming import getseries
+
+    if not frappe.db.sql("SELECT `name` FROM `tabSeries` WHERE `name` = %s", series):
+        seed_wht_series(series, number_fields)
+
+    return int(getseries(series, 1))
+
+
+def get_last_wht_number(series, number_fields):
+    """Highest number of `series` stored in `number_fields` ([(doctype, fieldname)])"""
+    last_number = 0
+    for doctype, fieldname in number_fields:
+        if not frappe.db.has_column(doctype, fieldname):
+            continue
+
+        for (number,) in frappe.db.sql(
+            f"SELECT `{fieldname}` FROM `tab{doctype}` WHERE `{fieldname}` LIKE %s",
+            f"{series}%",
+        ):
+            suffix = number[len(series):]
+            if suffix.isdigit():
+                last_number = max(last_number, int(suffix))
+
+    return last_number
+
+
+def seed_wht_series(series, number_fields):
+    """Create the counter of `series` at the last number issued before the counter existed"""
+    last_number = get_last_wht_number(series, number_fields)
+
+    frappe.db.savepoint("wht_series")
+    try:
+        frappe.db.sql("INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, %s)", (series, last_number))
+    except Exception as e:
+        if not frappe.db.is_primary_key_violation(e):
+            raise
+        # seeded by a concurrent save
+        frappe.db.rollback(save_point="wht_series")
+
+
 # ==================================================
 # WHT CERTIFICATE DATA FUNCTIONS
 # ==================================================
@@ -205,7 +264,9 @@ def get_wht_certificate_data(document_name, doctype="Payment Entry"):
             "payee_tax_id": party_tax_id,
             "tax_details": get_tax_breakdown(doc),
             "certificate_date": getdate(doc.posting_date if hasattr(doc, 'posting_date') else doc.reference_date),
-            "certificate_number": doc.custom_wht_certificate_number or generate_certificate_number(doc),
+            "certificate_number": doc.get("custom_wht_certificate_number")
+            or doc.get("pd_custom_wht_certificate_no")
+            or peek_certificate_number(),
             "total_amount": get_base_amount_for_wht(doc),
             "wht_amount": doc.pd_custom_withholding_tax_amount,
             "wht_rate": doc.custom_withholding_tax_rate,
@@ -280,72 +341,267 @@ def get_tax_breakdown(doc):
     return tax_details
 
 
+# Thai income types of WHT certificates, keyed by the keyword matched in item groups,
+# item descriptions and supplier groups
+WHT_INCOME_TYPES = {
+    "professional": "ค่าธรรมเนียมวิชาชีพ ตามมาตรา 40(2)",
+    "service": "ค่าธรรมเนียม ค่านายหน้า ฯลฯ ตามมาตรา 40(2)",
+    "consulting": "ค่าที่ปรึกษา ตามมาตรา 40(2)",
+    "rental": "ค่าเช่าทรัพย์สิน ตามมาตรา 40(5)",
+    "transportation": "ค่าขนส่ง ตามมาตรา 40(6)",
+    "advertising": "ค่าโฆษณา ตามมาตรา 40(7)",
+    "royalty": "ค่าลิขสิทธิ์ ตามมาตรา 40(3)",
+    "construction": "ค่าก่อสร้าง ตามมาตรา 3 เตรส",
+    "other": "การจ่ายเงินได้อื่นๆ ที่ต้องหักภาษี ณ ที่จ่าย"
+}
+
+# Income type of a submitted WHT Payment Entry / Purchase Invoice, stored on submit
+WHT_INCOME_TYPE_FIELD = "pd_custom_wht_filing_income_type"
+
+# documents per IN (...) query when income types are resolved in bulk
+INCOME_TYPE_BATCH_SIZE = 1000
+
+
+# Rebuild the classifier (and its item / supplier group maps) after this many seconds
+INCOME_TYPE_CLASSIFIER_TTL = 300
+
+_INCOME_TYPE_CLASSIFIERS = {}
+
+
 def determine_income_type(doc):
     """
     Determine Thai income type for WHT certificate with enhanced logic
     """
-    # Enhanced income types mapping with Thai descriptions
-    income_types = {
-        "professional": "ค่าธรรมเนียมวิชาชีพ ตามมาตรา 40(2)",
-        "service": "ค่าธรรมเนียม ค่านายหน้า ฯลฯ ตามมาตรา 40(2)", 
-        "consulting": "ค่าที่ปรึกษา ตามมาตรา 40(2)",
-        "rental": "ค่าเช่าทรัพย์สิน ตามมาตรา 40(5)",
-        "transportation": "ค่าขนส่ง ตามมาตรา 40(6)",
-        "advertising": "ค่าโฆษณา ตามมาตรา 40(7)",
-        "royalty": "ค่าลิขสิทธิ์ ตามมาตรา 40(3)",
-        "construction": "ค่าก่อสร้าง ตามมาตรา 3 เตรส",
-        "other": "การจ่ายเงินได้อื่นๆ ที่ต้องหักภาษี ณ ที่จ่าย"
-    }
-    
-    # Try to determine from various sources
-    if doc.doctype == "Purchase Invoice":
-        # Check items for service type
-        for item in doc.items:
-            item_group = frappe.db.get_value("Item", item.item_code, "item_group")
-            if item_group:
-                detected_type = match_income_type(item_group.lower(), income_types)
-                if detected_type:
-                    return detected_type
-            
-            # Check item description
-            if item.description:
-                detected_type = match_income_type(item.description.lower(), income_types)
-                if detected_type:
-                    return detected_type
-    
-    elif doc.doctype == "Payment Entry":
-        # Check payment references
-        for ref in doc.references:
-            if ref.reference_doctype == "Purchase Invoice":
-                pi = frappe.get_doc("Purchase Invoice", ref.reference_name)
-                if hasattr(pi, 'custom_is_withholding_tax') and pi.custom_is_withholding_tax:
-                    return determine_income_type(pi)
-    
-    # Check supplier group or type
-    if hasattr(doc, 'supplier') and doc.supplier:
-        supplier_group = frappe.db.get_value("Supplier", doc.supplier, "supplier_group")
-        if supplier_group:
-            detected_type = match_income_type(supplier_group.lower(), income_types)
+    # Attributed when the document was submitted
+    if doc.docstatus == 1 and doc.get(WHT_INCOME_TYPE_FIELD):
+        return doc.get(WHT_INCOME_TYPE_FIELD)
+
+    return get_income_type_classifier().classify_many([doc])[0]
+
+
+def get_income_type_classifier():
+    """Income type classifier of this process for the current site"""
+    site = getattr(frappe.local, "site", None)
+    classifier = _INCOME_TYPE_CLASSIFIERS.get(site)
+    if not classifier or time.monotonic() - classifier.created > INCOME_TYPE_CLASSIFIER_TTL:
+        classifier = _INCOME_TYPE_CLASSIFIERS[site] = IncomeTypeClassifier()
+    return classifier
+
+
+class IncomeTypeClassifier:
+    """
+    Thai income type of WHT Purchase Invoices and Payment Entries.
+
+    An invoice is classified by the first of its item groups, item descriptions and
+    supplier group containing an income type keyword, then by custom_income_type. A
+    payment follows the first WHT invoice it pays. Keywords are matched with one
+    precompiled regex, item and supplier groups are fetched in bulk and kept.
+    """
+
+    def __init__(self, income_types=None):
+        self.income_types = income_types or WHT_INCOME_TYPES
+        self.created = time.monotonic()
+
+        # keyword -> (priority, income type), the first income type in the dict wins
+        self.keywords = {}
+        for priority, (key, income_type) in enumerate(self.income_types.items()):
+            for keyword in key.split("_"):
+                self.keywords.setdefault(keyword, (priority, income_type))
+        self.pattern = re.compile("|".join(re.escape(keyword) for keyword in self.keywords))
+
+        self.item_groups = {}
+        self.supplier_groups = {}
+
+    def match(self, text):
+        """Income type whose keyword occurs in `text`, None if there is none"""
+        if not text:
+            return None
+        matches = {self.keywords[keyword] for keyword in self.pattern.findall(text.lower())}
+        return min(matches)[1] if matches else None
+
+    def classify_many(self, docs):
+        """
+        Income types of loaded Purchase Invoice / Payment Entry documents, in order.
+        Documents that aren't loaded (reports, summary rebuilds) go through resolve_income_types.
+        """
+        invoices = [doc for doc in docs if doc.doctype == "Purchase Invoice"]
+        self.get_item_groups(item.item_code for invoice in invoices for item in invoice.get("items") or [])
+        self.get_supplier_groups(invoice.get("supplier") for invoice in invoices)
+
+        invoice_names = [
+            ref.reference_name
+            for doc in docs
+            if doc.doctype == "Payment Entry"
+            for ref in doc.get("references") or []
+            if ref.reference_doctype == "Purchase Invoice"
+        ]
+        wht_invoice_types = self.get_wht_invoice_income_types(invoice_names)
+
+        income_types = []
+        for doc in docs:
+            if doc.doctype == "Payment Entry":
+                income_types.append(self.classify_payment(doc, doc.get("references") or [], wht_invoice_types))
+            else:
+                income_types.append(self.classify_invoice(doc, doc.get("items") or []))
+        return income_types
+
+    def classify_invoice(self, invoice, items):
+        """Income type of a Purchase Invoice with its item rows (item_code, description)"""
+        item_groups = self.get_item_groups(item.item_code for item in items)
+        for item in items:
+            detected_type = self.match(item_groups.get(item.item_code)) or self.match(item.description)
             if detected_type:
                 return detected_type
-    
-    # Check custom field for income type if exists
-    if hasattr(doc, 'custom_income_type') and doc.custom_income_type:
-        return doc.custom_income_type
-    
-    # Default to service type
-    return income_types["service"]
 
+        return self.classify_party(invoice, invoice.get("supplier"))
+
+    def classify_payment(self, payment, references, wht_invoice_types):
+        """Income type of a Payment Entry from its references and {WHT invoice: income type}"""
+        for ref in references:
+            # references fetched for the resolver are Purchase Invoice references only
+            if ref.get("reference_doctype") in (None, "Purchase Invoice") and ref.reference_name in wht_invoice_types:
+                return wht_invoice_types[ref.reference_name]
+
+        return self.classify_party(payment, payment.get("supplier"))
+
+    def classify_party(self, doc, supplier):
+        detected_type = self.match(self.get_supplier_groups([supplier]).get(supplier)) if supplier else None
+        return detected_type or doc.get("custom_income_type") or self.income_types["service"]
+
+    def get_wht_invoice_income_types(self, invoice_names):
+        """{invoice: income type} of the WHT invoices among `invoice_names`"""
+        invoice_names = list({name for name in invoice_names if name})
+        if not invoice_names:
+            return {}
+
+        wht_invoices = {}
+        for start in range(0, len(invoice_names), INCOME_TYPE_BATCH_SIZE):
+            for invoice in frappe.get_all(
+                "Purchase Invoice",
+                filters={
+                    "name": ["in", invoice_names[start : start + INCOME_TYPE_BATCH_SIZE]],
+                    "custom_is_withholding_tax": 1,
+                },
+                fields=["name", "docstatus"] + _optional_fields("Purchase Invoice", WHT_INCOME_TYPE_FIELD),
+            ):
+                wht_invoices[invoice.name] = invoice.get(WHT_INCOME_TYPE_FIELD) if invoice.docstatus == 1 else None
+
+        unresolved = [name for name, income_type in wht_invoices.items() if not income_type]
+        wht_invoices.update(resolve_income_types("Purchase Invoice", unresolved, classifier=self))
+        return wht_invoices
+
+    def get_item_groups(self, item_codes):
+        return self._get_cached_values(self.item_groups, "Item", item_codes, "item_group")
+
+    def get_supplier_groups(self, suppliers):
+        return self._get_cached_values(self.supplier_groups, "Supplier", suppliers, "supplier_group")
+
+    def _get_cached_values(self, cache, doctype, names, fieldname):
+        missing = list({name for name in names if name and name not in cache})
+        for start in range(0, len(missing), INCOME_TYPE_BATCH_SIZE):
+            batch = missing[start : start + INCOME_TYPE_BATCH_SIZE]
+            values = _get_values_by_name(doctype, batch, fieldname)
+            cache.update({name: values.get(name) for name in batch})
+        return cache
+
+
+def store_wht_income_type(doc, method=None):
+    """
+    Store the income type of a WHT document on submit, so that filing reports can group
+    by it in SQL instead of resolving every document again
+    """
+    if not doc.get("custom_is_withholding_tax") or not frappe.get_meta(doc.doctype).has_field(WHT_INCOME_TYPE_FIELD):
+        return
+
+    doc.db_set(WHT_INCOME_TYPE_FIELD, determine_income_type(doc), update_modified=False)
 
-def match_income_type(text, income_types):
+
+def resolve_income_types(doctype, names, classifier=None):
     """
-    Match text against income type keywords
+    {name: income type} for Purchase Invoices / Payment Entries, with the rules of
+    `determine_income_type` but a fixed number of queries per batch of documents
+    instead of loading every document
     """
-    for key, thai_type in income_types.items():
-        keywords = key.split('_')
-        if any(keyword in text for keyword in keywords):
-            return thai_type
-    return None
+    classifier = classifier or get_income_type_classifier()
+    resolve = {
+        "Purchase Invoice": _resolve_purchase_invoice_income_types,
+        "Payment Entry": _resolve_payment_entry_income_types,
+    }[doctype]
+
+    names = list(names)
+    income_types = {}
+    for start in range(0, len(names), INCOME_TYPE_BATCH_SIZE):
+        income_types.update(resolve(names[start : start + INCOME_TYPE_BATCH_SIZE], classifier))
+    return income_types
+
+
+def _resolve_purchase_invoice_income_types(names, classifier):
+    if not names:
+        return {}
+
+    invoices = frappe.get_all(
+        "Purchase Invoice",
+        filters={"name": ["in", names]},
+        fields=["name", "supplier"] + _optional_fields("Purchase Invoice", "custom_income_type"),
+    )
+    items = frappe.get_all(
+        "Purchase Invoice Item",
+        filters={"parent": ["in", names], "parenttype": "Purchase Invoice"},
+        fields=["parent", "item_code", "description"],
+        order_by="parent asc, idx asc",
+    )
+    classifier.get_item_groups(item.item_code for item in items)
+    classifier.get_supplier_groups(invoice.supplier for invoice in invoices)
+
+    items_by_invoice = {}
+    for item in items:
+        items_by_invoice.setdefault(item.parent, []).append(item)
+
+    return {
+        invoice.name: classifier.classify_invoice(invoice, items_by_invoice.get(invoice.name, []))
+        for invoice in invoices
+    }
+
+
+def _resolve_payment_entry_income_types(names, classifier):
+    if not names:
+        return {}
+
+    entries = frappe.get_all(
+        "Payment Entry",
+        filters={"name": ["in", names]},
+        fields=["name"] + _optional_fields("Payment Entry", "custom_income_type"),
+    )
+    references = frappe.get_all(
+        "Payment Entry Reference",
+        filters={"parent": ["in", names], "parenttype": "Payment Entry", "reference_doctype": "Purchase Invoice"},
+        fields=["parent", "reference_name"],
+        order_by="parent asc, idx asc",
+    )
+    wht_invoice_types = classifier.get_wht_invoice_income_types(ref.reference_name for ref in references)
+
+    references_by_entry = {}
+    for ref in references:
+        references_by_entry.setdefault(ref.parent, []).append(ref)
+
+    return {
+        entry.name: classifier.classify_payment(entry, references_by_entry.get(entry.name, []), wht_invoice_types)
+        for entry in entries
+    }
+
+
+def _get_values_by_name(doctype, names, fieldname):
+    names = [name for name in names if name]
+    if not names:
+        return {}
+    return dict(
+        frappe.get_all(doctype, filters={"name": ["in", names]}, fields=["name", fieldname], as_list=True)
+    )
+
+
+def _optional_fields(doctype, *fieldnames):
+    meta = frappe.get_meta(doctype)
+    return [fieldname for fieldname in fieldnames if meta.has_field(fieldname)]
 
 
 def get_income_type_code(income_type):
@@ -619,7 +875,7 @@ def get_wht_summary_report(from_date, to_date, company=None, supplier=None):
                 "paid_amount as grand_total", "custom_withholding_tax_rate", 
                 "pd_custom_withholding_tax_amount", "custom_supplier_tax_id", "custom_wht_certificate_number",
                 "'Payment Entry' as doctype"
-            ]
+            ] + _optional_fields("Payment Entry", WHT_INCOME_TYPE_FIELD)
         )
         
         purchase_invoices = frappe.get_all("Purchase Invoice", 
@@ -629,7 +885,7 @@ def get_wht_summary_report(from_date, to_date, company=None, supplier=None):
                 "grand_total", "custom_withholding_tax_rate", 
                 "pd_custom_withholding_tax_amount", "custom_supplier_tax_id", "custom_wht_certificate_number",
                 "'Purchase Invoice' as doctype"
-            ]
+            ] + _optional_fields("Purchase Invoice", WHT_INCOME_TYPE_FIELD)
         )
         
         # Combine results
@@ -694,26 +950,19 @@ def get_wht_tax_filing_data(tax_year, company):
         
         # Get all WHT transactions for the year
         report_data = get_wht_summary_report(year_start, year_end, company)
-        
+
+        # Documents submitted before income types were stored on submit are resolved in
+        # bulk and stored, so the totals below can be grouped in SQL
+        income_types = ensure_wht_income_types(report_data["documents"])
+
         # Group by income type for PND filing
-        income_type_summary = {}
-        
+        income_type_summary = get_wht_income_type_totals(year_start, year_end, company)
+
         for doc in report_data["documents"]:
-            doc_obj = frappe.get_doc(doc["doctype"], doc["name"])
-            income_type = determine_income_type(doc_obj)
-            
-            if income_type not in income_type_summary:
-                income_type_summary[income_type] = {
-                    "count": 0,
-                    "total_payments": 0,
-                    "total_wht": 0,
-                    "documents": []
-                }
-            
-            income_type_summary[income_type]["count"] += 1
-            income_type_summary[income_type]["total_payments"] += flt(doc["grand_total"])
-            income_type_summary[income_type]["total_wht"] += flt(doc["pd_custom_withholding_tax_amount"])
-            income_type_summary[income_type]["documents"].append(doc)
+            income_type = income_types[(doc["doctype"], doc["name"])]
+            income_type_summary.setdefault(
+                income_type, {"count": 0, "total_payments": 0, "total_wht": 0, "documents": []}
+            )["documents"].append(doc)
         
         return {
             "tax_year": tax_year,
@@ -728,6 +977,77 @@ def get_wht_tax_filing_data(tax_year, company):
         frappe.throw(_("Error generating tax filing data: {}").format(str(e)))
 
 
+def ensure_wht_income_types(documents):
+    """
+    {(doctype, name): income type} of summary report documents. Documents without a stored
+    income type are resolved in bulk and the result is stored for the next report.
+    """
+    income_types = {}
+    missing = {}
+    for doc in documents:
+        key = (doc["doctype"], doc["name"])
+        income_type = doc.get(WHT_INCOME_TYPE_FIELD)
+        if income_type:
+            income_types[key] = income_type
+        else:
+            missing.setdefault(doc["doctype"], []).append(doc["name"])
+
+    for doctype, names in missing.items():
+        resolved = resolve_income_types(doctype, names)
+        income_types.update({(doctype, name): income_type for name, income_type in resolved.items()})
+
+        if frappe.get_meta(doctype).has_field(WHT_INCOME_TYPE_FIELD):
+            frappe.db.bulk_update(
+                doctype,
+                {name: {WHT_INCOME_TYPE_FIELD: income_type} for name, income_type in resolved.items()},
+                update_modified=False,
+            )
+
+    return income_types
+
+
+def get_wht_income_type_totals(from_date, to_date, company=None):
+    """
+    Count, payments and WHT of submitted WHT documents per stored income type, grouped
+    in SQL for Payment Entries (paid to suppliers) and Purchase Invoices
+    """
+    totals = {}
+    for doctype, amount_field in (("Payment Entry", "paid_amount"), ("Purchase Invoice", "grand_total")):
+        if not frappe.get_meta(doctype).has_field(WHT_INCOME_TYPE_FIELD):
+            continue
+
+        doc = frappe.qb.DocType(doctype)
+        query = (
+            frappe.qb.from_(doc)
+            .select(
+                doc[WHT_INCOME_TYPE_FIELD].as_("income_type"),
+                Count(doc.name).as_("count"),
+                Sum(doc[amount_field]).as_("total_payments"),
+                Sum(doc.pd_custom_withholding_tax_amount).as_("total_wht"),
+            )
+            .where(
+                (doc.docstatus == 1)
+                & (doc.custom_is_withholding_tax == 1)
+                & (doc.posting_date.between(from_date, to_date))
+            )
+            .groupby(doc[WHT_INCOME_TYPE_FIELD])
+        )
+        if doctype == "Payment Entry":
+            query = query.where(doc.party_type == "Supplier")
+        if company:
+            query = query.where(doc.company == company)
+
+        for row in query.run(as_dict=True):
+            income_type = totals.setdefault(
+                row.income_type, {"count": 0, "total_payments": 0, "total_wht": 0, "documents": []}
+            )
+            income_type["count"] += row.count
+            income_type["total_payments"] += flt(row.total_payments)
+            income_type["total_wht"] += flt(row.total_wht)
+
+    return totals
+
+
 def get_filing_requirements(income_type_summary):
     """
     Get filing requirements based on income types
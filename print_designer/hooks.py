@@ -44,6 +44,10 @@ commands = [
     "print_designer.commands.install_company_tab.remove_company_tab",
     "print_designer.commands.fix_target_signature_field.fix_target_signature_field",
     "print_designer.commands.emergency_fix_watermark.emergency_fix_watermark",
+    "print_designer.commands.benchmark_watermark_pdf.benchmark_watermark_pdf",
+    "print_designer.commands.benchmark_thai_tax.benchmark_thai_tax",
+    "print_designer.commands.regenerate_qr_codes.regenerate_qr_codes",
+    "print_designer.commands.rebuild_wht_monthly_summary.rebuild_wht_monthly_summary",
     "print_designer.commands.install_retention_client_script.install_retention_client_script",
     "print_designer.commands.install_retention_client_script.check_retention_client_script",
     # Field validation commands
@@ -456,6 +460,9 @@ jinja = {
         "print_designer.print_designer.page.print_designer.print_designer.convert_css",
         "print_designer.print_designer.page.print_designer.print_designer.convert_uom",
         "print_designer.print_designer.page.print_designer.print_designer.get_barcode",
+        "print_designer.print_designer.page.print_designer.print_designer.get_barcodes",
+        "print_designer.utils.print_image.get_print_image_url",
+        "print_designer.utils.signature_stamp.get_signatures_and_stamps",
         "print_designer.utils.signature_integration.get_signature_data_for_print",
         "print_designer.utils.signature_integration.get_signature_for_document",
         "print_designer.utils.signature_integration.get_available_signatures",
@@ -472,6 +479,8 @@ jinja = {
         "print_designer.utils.thai_amount_to_word.is_thai_format",
         "print_designer.utils.thai_amount_to_word.smart_money_in_words",
         "print_designer.utils.thai_amount_to_word.get_smart_in_words",
+        # QR code images stored as files or legacy base64
+        "print_designer.utils.qr_file.get_qr_data_url",
         # Delivery Note QR code methods
         "print_designer.custom.delivery_note_qr.generate_delivery_approval_qr",
         "print_designer.custom.delivery_note_qr.get_qr_code_image",
@@ -562,6 +571,8 @@ after_install = [
     "print_designer.utils.account_file_api.generate_account_files_for_external_access",
     # Sync Billing workspace from JSON to database
     "print_designer.commands.sync_billing_workspace.execute",
+    # Start maintaining WHT Monthly Summary (marked built on a site with no WHT documents)
+    "print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary.ensure_wht_monthly_summary",
 ]
 
 # Boot session enhancements (Frappe v15+ uses extend_bootinfo, older versions use boot_session)
@@ -608,6 +619,8 @@ after_migrate = [
     "print_designer.commands.install_thai_billing_fields.execute",
     # Sync Billing workspace from JSON to database
     "print_designer.commands.sync_billing_workspace.execute",
+    # Start maintaining WHT Monthly Summary (marked built on a site with no WHT documents)
+    "print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary.ensure_wht_monthly_summary",
 ]
 
 # Uninstallation
@@ -663,13 +676,25 @@ doc_events = {
     "Print Format": {
         "on_update": "print_designer.api.watermark.clear_format_watermark_cache",
     },
+    "Watermark Template": {
+        "on_update": "print_designer.api.watermark.clear_watermark_cache",
+        "on_trash": "print_designer.api.watermark.clear_watermark_cache",
+    },
+    "Print Settings": {
+        "on_update": "print_designer.api.watermark.clear_watermark_cache",
+    },
     # Sales Invoice events - consolidated in doc_events section below
     "Purchase Invoice": {
         "before_print": "print_designer.pdf.before_print",
         "validate": "print_designer.regional.purchase_invoice_wht_override.validate_thai_wht_configuration",
         "before_save": "print_designer.regional.purchase_invoice_wht_override.override_purchase_invoice_wht_calculation",
         "on_update": "print_designer.regional.purchase_invoice_wht_override.override_purchase_invoice_wht_calculation",
-        "on_submit": "print_designer.custom.purchase_invoice_wht_generator.on_submit_purchase_invoice",
+        "on_submit": [
+            "print_designer.custom.purchase_invoice_wht_generator.on_submit_purchase_invoice",
+            "print_designer.custom.withholding_tax.store_wht_income_type",
+            "print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary.update_wht_monthly_summary",
+        ],
+        "on_cancel": "print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary.update_wht_monthly_summary",
     },
     # Sales Order and Quotation events - consolidated in doc_events section below
     "Purchase Order": {
@@ -695,10 +720,12 @@ doc_events = {
     "Digital Signature": {
         "after_insert": "print_designer.utils.signature_integration.handle_signature_save",
         "on_update": "print_designer.utils.signature_integration.handle_signature_save",
+        "on_trash": "print_designer.utils.signature_stamp.clear_signature_cache",
     },
     "Company Stamp": {
         "after_insert": "print_designer.utils.signature_integration.handle_signature_save",
         "on_update": "print_designer.utils.signature_integration.handle_signature_save",
+        "on_trash": "print_designer.utils.signature_stamp.clear_signature_cache",
     },
     # Thai Withholding Tax events - Updated for GL entry modification approach
     "Payment Entry": {
@@ -714,11 +741,14 @@ doc_events = {
             "print_designer.custom.payment_entry_retention.payment_entry_on_submit_thai_compliance",
             "print_designer.custom.payment_entry_server_events.on_submit",
             "print_designer.print_designer.doctype.thai_billing.thai_billing.update_thai_billing_on_payment",
+            "print_designer.custom.withholding_tax.store_wht_income_type",
+            "print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary.update_wht_monthly_summary",
         ],
         "on_cancel": [
             "print_designer.custom.payment_entry_retention.payment_entry_on_cancel_reverse_retention_entries",
             "print_designer.custom.payment_entry_server_events.on_cancel",
             "print_designer.print_designer.doctype.thai_billing.thai_billing.update_thai_billing_on_payment",
+            "print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary.update_wht_monthly_summary",
         ],
     },
     # Company DocType - Retention sync DISABLED (redundant)
@@ -749,7 +779,6 @@ doc_events = {
     },
     # Customer WHT Configuration Changes - Consolidated handlers
     "Customer": {
-        "validate": "print_designer.custom.customer_wht_config_handler.handle_customer_wht_config_changes",
         "on_update": "print_designer.custom.customer_wht_config_handler.handle_customer_wht_config_changes",
     },
     # Salary Slip - Employee Tax Ledger Integration
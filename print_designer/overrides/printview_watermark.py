@@ -1,6 +1,9 @@
+import hashlib
+import json
 import os
 
 import frappe
+from frappe.utils.data import cint
 from frappe.www.printview import get_html_and_style as original_get_html_and_style
 
 
@@ -408,29 +411,80 @@ def log_to_print_designer(message, level="INFO"):
             pass
 
 
-@frappe.whitelist()
-def get_html_and_style_with_watermark(
+PREVIEW_CACHE_TTL = 60
+
+
+def get_preview_cache_ttl():
+    """Seconds a rendered preview is reused, `print_designer_preview_cache_ttl` in site config"""
+    ttl = frappe.conf.get("print_designer_preview_cache_ttl")
+    return PREVIEW_CACHE_TTL if ttl is None else cint(ttl)
+
+
+def get_preview_cache_key(
     doc,
-    name=None,
-    print_format=None,
+    name,
+    print_format_doc,
     no_letterhead=None,
     letterhead=None,
     trigger_print=False,
     style=None,
     settings=None,
 ):
-    """Override of get_html_and_style that adds watermark support and Print Designer compatibility"""
-    
-    log_to_print_designer(f"Print preview override called: print_format={print_format}, settings={settings}, trigger_print={trigger_print}")
+    """
+    Cache key of the base preview html, None if the preview shouldn't be cached.
+
+    Keyed by user (render checks permissions), document and print format `modified`,
+    letterhead, language and the non watermark print settings.
+    """
+    if get_preview_cache_ttl() <= 0:
+        return None
+    # unsaved documents are sent as json and rendered as is
+    if not (isinstance(doc, str) and isinstance(name, str)):
+        return None
+
+    modified = frappe.db.get_value(doc, name, "modified")
+    if not modified:
+        return None
+
+    settings = {
+        key: value
+        for key, value in (settings or {}).items()
+        if not key.startswith("watermark_")
+    }
+    key = json.dumps(
+        [
+            frappe.session.user,
+            doc,
+            name,
+            modified,
+            print_format_doc.name if print_format_doc else None,
+            print_format_doc.modified if print_format_doc else None,
+            no_letterhead,
+            letterhead,
+            trigger_print,
+            style,
+            frappe.local.lang,
+            frappe.form_dict.get("_lang"),
+            settings,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return "print_designer:preview_html:" + hashlib.sha1(key.encode()).hexdigest()
 
-    # Check if this is a Print Designer format
-    print_format_doc = None
-    if print_format:
-        try:
-            print_format_doc = frappe.get_doc("Print Format", print_format)
-        except Exception:
-            pass
 
+def render_base_html_and_style(
+    doc,
+    name,
+    print_format,
+    print_format_doc,
+    no_letterhead=None,
+    letterhead=None,
+    trigger_print=False,
+    style=None,
+    settings=None,
+):
+    """Preview html and style of the print format, without watermark"""
     # Check if this is a Print Designer format and preserve its original rendering
     is_print_designer_format = (
         print_format_doc and 
@@ -474,8 +528,68 @@ def get_html_and_style_with_watermark(
         f"html_length={len(result.get('html', '')) if result else 0}"
     )
 
-    # Parse settings to check for watermark configuration
+    return result
+
+
+@frappe.whitelist()
+def get_html_and_style_with_watermark(
+    doc,
+    name=None,
+    print_format=None,
+    no_letterhead=None,
+    letterhead=None,
+    trigger_print=False,
+    style=None,
+    settings=None,
+):
+    """Override of get_html_and_style that adds watermark support and Print Designer compatibility"""
+    
+    log_to_print_designer(f"Print preview override called: print_format={print_format}, settings={settings}, trigger_print={trigger_print}")
+
     settings_dict = frappe.parse_json(settings) if settings else {}
+
+    # Check if this is a Print Designer format
+    print_format_doc = None
+    if print_format:
+        try:
+            print_format_doc = frappe.get_cached_doc("Print Format", print_format)
+        except Exception:
+            pass
+
+    # The base html / style doesn't depend on the watermark options, reuse it while
+    # the print dialog re-requests the same document and only layer the watermark below
+    cache_key = get_preview_cache_key(
+        doc,
+        name,
+        print_format_doc,
+        no_letterhead=no_letterhead,
+        letterhead=letterhead,
+        trigger_print=trigger_print,
+        style=style,
+        settings=settings_dict,
+    )
+    result = frappe.cache().get_value(cache_key) if cache_key else None
+    if result is not None:
+        log_to_print_designer(f"Print preview served from cache: format={print_format}")
+        result = result.copy()
+    else:
+        result = render_base_html_and_style(
+            doc,
+            name,
+            print_format,
+            print_format_doc,
+            no_letterhead=no_letterhead,
+            letterhead=letterhead,
+            trigger_print=trigger_print,
+            style=style,
+            settings=settings,
+        )
+        if cache_key:
+            frappe.cache().set_value(
+                cache_key, result.copy(), expires_in_sec=get_preview_cache_ttl()
+            )
+
+    # Parse settings to check for watermark configuration
     watermark_settings = settings_dict.get("watermark_settings", "None")
     watermark_template = settings_dict.get("watermark_template")
     
@@ -495,9 +609,9 @@ def get_html_and_style_with_watermark(
             # Priority 1: If template is specified, use template configuration
             if watermark_template:
                 log_to_print_designer(f"Using watermark template: {watermark_template}")
-                from print_designer.api.watermark import get_watermark_template_config
+                from print_designer.api.watermark import get_cached_watermark_template_config
                 
-                template_config = get_watermark_template_config(watermark_template)
+                template_config = get_cached_watermark_template_config(watermark_template)
                 font_size = template_config.get("font_size", 12)
                 font_family = template_config.get("font_family", "Sarabun")
                 watermark_color = template_config.get("color", "#999999")
@@ -519,9 +633,9 @@ def get_html_and_style_with_watermark(
             
             # Priority 2: Try to get configuration from new Watermark Settings system
             elif print_format:
-                from print_designer.api.watermark import get_watermark_config_for_print_format
+                from print_designer.api.watermark import get_cached_watermark_config
                 
-                watermark_config = get_watermark_config_for_print_format(print_format)
+                watermark_config = get_cached_watermark_config(print_format)
                 
                 if watermark_config.get("enabled"):
                     font_size = watermark_config.get("font_size", 12)
@@ -562,12 +676,14 @@ def get_html_and_style_with_watermark(
                     watermark_position = watermark_position or "Top Right"
                 else:
                     # Fall back to Print Settings DocType
-                    print_settings = frappe.get_single("Print Settings")
-                    font_size = print_settings.get("watermark_font_size", "12px")
+                    from print_designer.api.watermark import get_print_settings_watermark_config
+
+                    print_settings = get_print_settings_watermark_config()
+                    font_size = print_settings.get("watermark_font_size") or "12px"
                     if isinstance(font_size, str) and font_size.endswith('px'):
                         font_size = font_size[:-2]
-                    font_family = print_settings.get("watermark_font_family", "Sarabun")
-                    watermark_position = print_settings.get("watermark_position", "Top Right")
+                    font_family = print_settings.get("watermark_font_family") or "Sarabun"
+                    watermark_position = print_settings.get("watermark_position") or "Top Right"
                 
                 watermark_color = "#999999"
                 watermark_opacity = 0.6
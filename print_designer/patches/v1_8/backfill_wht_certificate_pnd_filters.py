@@ -0,0 +1,42 @@
+# Copyright (c) 2025, Hussain Nagaria and contributors
+# For license information, please see license.txt
+
+"""
+Patch to backfill the normalised tax_month_no / pnd_classification columns of
+Withholding Tax Certificate.
+
+PND3 / PND53 forms now filter certificates by these columns in the query, certificates
+created before they existed would otherwise never be picked up.
+"""
+
+import frappe
+
+from print_designer.print_designer.doctype.withholding_tax_certificate.withholding_tax_certificate import (
+    get_pnd_classification,
+    get_tax_month_no,
+)
+
+
+def execute():
+    """Set tax_month_no and pnd_classification from tax_month / supplier_type_classification."""
+
+    if not frappe.db.has_column("Withholding Tax Certificate", "tax_month_no"):
+        return
+
+    certificates = frappe.get_all(
+        "Withholding Tax Certificate",
+        fields=["name", "tax_month", "supplier_type_classification"],
+    )
+
+    updates = {
+        cert.name: {
+            "tax_month_no": get_tax_month_no(cert.tax_month),
+            "pnd_classification": get_pnd_classification(cert.supplier_type_classification),
+        }
+        for cert in certificates
+    }
+
+    if updates:
+        frappe.db.bulk_update("Withholding Tax Certificate", updates, update_modified=False)
+
+    print(f"Backfilled PND filter columns of {len(updates)} Withholding Tax Certificates")
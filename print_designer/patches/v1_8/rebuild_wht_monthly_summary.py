@@ -0,0 +1,21 @@
+# Copyright (c) 2026, Frappe Technologies Pvt Ltd. and contributors
+# For license information, please see license.txt
+
+"""
+Patch to backfill WHT Monthly Summary.
+
+The WHT dashboard and top suppliers report read the summary, which is only maintained
+on submit / cancel after a full rebuild. The rebuild reads every submitted WHT Payment
+Entry and Purchase Invoice, so it runs in a background job instead of the migration.
+Fresh installs skip patches, after_install / after_migrate run the same check.
+"""
+
+from print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary import (
+    ensure_wht_monthly_summary,
+)
+
+
+def execute():
+    """Enqueue the first full rebuild of WHT Monthly Summary, or mark it built if there's nothing to count."""
+
+    ensure_wht_monthly_summary()
@@ -1,7 +1,6 @@
 import hashlib
 import html
 import json
-import time
 
 import frappe
 from frappe.monitor import add_data_to_monitor
@@ -9,6 +8,12 @@ from frappe.utils.error import log_error
 from frappe.utils.jinja_globals import is_rtl
 from frappe.utils.pdf import pdf_body_html as fw_pdf_body_html
 
+from print_designer import trace
+from print_designer.pdf_generator.chunked_table import get_chunked_table_registry
+from print_designer.print_designer.page.print_designer.print_designer import (
+    get_css_class_registry,
+)
+
 
 def get_effective_language(print_format_name=None):
     """
@@ -23,61 +28,81 @@ def get_effective_language(print_format_name=None):
     Returns:
         str: The effective language code/name to use
     """
-    print(f"[DEBUG] get_effective_language called with print_format_name: {print_format_name}")
-    
-    # Priority 1: Check _lang parameter from URL
+    return get_print_language_context(print_format_name).language
+
+
+def get_print_language_context(print_format_name=None):
+    """
+    Resolve (language, is_thai, rtl) once per print job.
+
+    Body, header, footer, before_print and the Thai amount helpers all need the
+    effective language of the same print, so the result is kept on frappe.local
+    (request scoped) and keyed by everything it depends on.
+
+    Returns:
+        frappe._dict: language, is_thai, rtl
+    """
     url_lang = frappe.form_dict.get("_lang")
-    print(f"[DEBUG] URL _lang parameter: {url_lang}")
+    local_lang = getattr(frappe.local, "lang", None)
+    cache_key = (print_format_name, url_lang, local_lang)
+
+    if not hasattr(frappe.local, "pd_print_language"):
+        frappe.local.pd_print_language = {}
+
+    context = frappe.local.pd_print_language.get(cache_key)
+    if context is None:
+        language = _resolve_effective_language(print_format_name, url_lang, local_lang)
+        context = frappe._dict(
+            language=language,
+            is_thai=is_thai_language(language),
+            rtl=is_rtl(),
+        )
+        frappe.local.pd_print_language[cache_key] = context
+
+    return context
+
+
+def _resolve_effective_language(print_format_name, url_lang, local_lang):
+    # Priority 1: Check _lang parameter from URL
     if url_lang and str(url_lang).strip():
-        print(f"[LANGUAGE] Using language from URL parameter: {url_lang}")
+        trace.debug("Using language from URL parameter: %s", url_lang)
         return url_lang
 
-    # Priority 2: Check Print Format default_print_language field
+    # Priority 2: Check Print Format default_print_language field,
+    # fallback to language field if default_print_language is not set
     if print_format_name:
-        try:
-            print(f"[DEBUG] Fetching Print Format doc: {print_format_name}")
-            print_format_doc = frappe.get_doc("Print Format", print_format_name)
-            
-            # Try default_print_language field first (standard field)
-            format_lang = (
-                print_format_doc.get("default_print_language")
-                if hasattr(print_format_doc, "get")
-                else getattr(print_format_doc, "default_print_language", None)
-            )
-            print(f"[DEBUG] Print Format default_print_language field: {format_lang}")
-            
-            # Fallback to language field if default_print_language is not set
-            if not format_lang:
-                format_lang = (
-                    print_format_doc.get("language")
-                    if hasattr(print_format_doc, "get")
-                    else getattr(print_format_doc, "language", None)
-                )
-                print(f"[DEBUG] Print Format language field (fallback): {format_lang}")
-                
-            if format_lang and str(format_lang).strip():
-                print(f"[LANGUAGE] Using language from Print Format: {format_lang}")
-                return format_lang
-            else:
-                print(f"[DEBUG] No valid language found in Print Format fields")
-        except Exception as e:
-            print(f"[ERROR] Error getting Print Format language: {str(e)}")
+        format_lang = get_print_format_language(print_format_name)
+        if format_lang:
+            trace.debug("Using language from Print Format: %s", format_lang)
+            return format_lang
 
     # Priority 3: Fallback to local language
-    local_lang = frappe.local.lang
-    print(f"[DEBUG] frappe.local.lang: {local_lang}")
-    
     # Priority 4: If no language is set anywhere, default to Thai ('th')
     # This is specific to this implementation where Thai is the primary language
     if not local_lang or local_lang == "en":
-        local_lang = "th"
-        print(f"[LANGUAGE] Using Thai as default language (overriding '{frappe.local.lang}')")
-    else:
-        print(f"[LANGUAGE] Using fallback language: {local_lang}")
-    
+        trace.debug("Using Thai as default language (overriding '%s')", local_lang)
+        return "th"
+
+    trace.debug("Using fallback language: %s", local_lang)
     return local_lang
 
 
+def get_print_format_language(print_format_name):
+    """Language configured on a Print Format, read from the document cache."""
+    try:
+        values = frappe.get_cached_value(
+            "Print Format", print_format_name, ["default_print_language", "language"]
+        )
+    except Exception as e:
+        trace.error("Error getting Print Format language: %s", e)
+        return None
+
+    for format_lang in values or []:
+        if format_lang and str(format_lang).strip():
+            return format_lang
+    return None
+
+
 def is_thai_language(language):
     """
     Check if the given language indicates Thai language.
@@ -88,48 +113,37 @@ def is_thai_language(language):
     Returns:
         bool: True if the language is Thai
     """
-    print(f"[DEBUG] is_thai_language called with: '{language}' (type: {type(language)})")
-    
     if not language:
-        print(f"[DEBUG] is_thai_language: Empty language, returning False")
         return False
 
     language_str = str(language).strip()
     language_lower = language_str.lower()
-    
-    print(f"[DEBUG] is_thai_language: language_str='{language_str}', language_lower='{language_lower}'")
-    
+
     # Check for Thai language indicators
     # Note: "ไทย" should be checked as-is, not lowercased
     thai_indicators_exact = ["ไทย", "th", "th-th"]
     thai_indicators_lower = ["thai", "thai-th", "th", "th-th"]
     
     is_thai = language_str in thai_indicators_exact or language_lower in thai_indicators_lower
-    print(f"[DEBUG] is_thai_language result: {is_thai}")
-    
     return is_thai
 
 
 def pdf_header_footer_html(soup, head, content, styles, html_id, css):
-    print(f"[DEBUG] pdf_header_footer_html called with html_id: {html_id}")
-    
+    trace.debug("pdf_header_footer_html called with html_id: %s", html_id)
+
     if soup.find(id="__print_designer"):
         pdf_generator = frappe.form_dict.get("pdf_generator", "wkhtmltopdf")
-        print(f"[DEBUG] PDF generator: {pdf_generator}")
-        
+
         if pdf_generator == "chrome":
             path = "print_designer/page/print_designer/jinja/header_footer.html"
         else:
             path = "print_designer/page/print_designer/jinja/header_footer_old.html"
         
-        print(f"[DEBUG] Using template path: {path}")
-        
+        trace.debug("PDF generator: %s, using template path: %s", pdf_generator, path)
+
         try:
-            # Get effective language using centralized function
-            print_format_name = frappe.form_dict.get("format")
-            print(f"[DEBUG] Print format name from form_dict: {print_format_name}")
-            effective_lang = get_effective_language(print_format_name)
-            print(f"[PDF] Effective language for PDF header/footer: {effective_lang}")
+            # Header and footer share the language resolved for the body of this print
+            language_context = get_print_language_context(frappe.form_dict.get("format"))
 
             return frappe.render_template(
                 path,
@@ -141,9 +155,9 @@ def pdf_header_footer_html(soup, head, content, styles, html_id, css):
                     "css": css,
                     "headerFonts": soup.find(id="headerFontsLinkTag"),
                     "footerFonts": soup.find(id="footerFontsLinkTag"),
-                    "lang": effective_lang,
-                    "is_thai": is_thai_language(effective_lang),
-                    "layout_direction": "rtl" if is_rtl() else "ltr",
+                    "lang": language_context.language,
+                    "is_thai": language_context.is_thai,
+                    "layout_direction": "rtl" if language_context.rtl else "ltr",
                 },
             )
         except Exception as e:
@@ -184,15 +198,14 @@ def pdf_header_footer_html(soup, head, content, styles, html_id, css):
 
 
 def pdf_body_html(print_format, jenv, args, template):
-    print(f"[DEBUG] pdf_body_html called for print_format: {print_format.name if print_format else 'None'}")
-    
+    trace.debug("pdf_body_html called for print_format: %s", lambda: getattr(print_format, "name", None))
+
     if (
         print_format
         and print_format.print_designer
         and print_format.print_designer_body
     ):
-        print(f"[DEBUG] Processing Print Designer format: {print_format.name}")
-        
+
         print_format_name = hashlib.md5(
             print_format.name.encode(), usedforsecurity=False
         ).hexdigest()
@@ -203,14 +216,15 @@ def pdf_body_html(print_format, jenv, args, template):
         # Handle None or empty print_designer_settings
         if print_format.print_designer_settings:
             settings = json.loads(print_format.print_designer_settings)
-            print(f"[DEBUG] Settings loaded with schema_version: {settings.get('schema_version', 'not set')}")
+            trace.debug(
+                "Settings loaded with schema_version: %s", settings.get("schema_version", "not set")
+            )
         else:
             settings = {}
-            print(f"[DEBUG] No settings found, using empty dict")
+            trace.debug("No settings found, using empty dict")
 
         # Get effective language for this print format
-        effective_lang = get_effective_language(print_format.name)
-        print(f"[PDF BODY] Using language: {effective_lang}")
+        language_context = get_print_language_context(print_format.name)
 
         args.update(
             {
@@ -219,10 +233,12 @@ def pdf_body_html(print_format, jenv, args, template):
                 "footerElement": json.loads(print_format.print_designer_footer or "[]"),
                 "settings": settings,
                 "pdf_generator": frappe.form_dict.get("pdf_generator", "wkhtmltopdf"),
-                "effective_lang": effective_lang,
-                "is_thai": is_thai_language(effective_lang),
+                "effective_lang": language_context.language,
+                "is_thai": language_context.is_thai,
+                "css_classes": get_css_class_registry(settings),
             }
         )
+        args["chunked_tables"] = get_chunked_table_registry(args)
 
         if not is_older_schema(settings=settings, current_version="1.1.0"):
             # Check if print_designer_print_format has valid data
@@ -316,42 +332,37 @@ def is_older_schema(settings, current_version):
 
 
 def get_print_format_template(jenv, print_format):
-    print(f"[DEBUG] get_print_format_template called with print_format: {print_format}")
+    trace.debug("get_print_format_template called with print_format: %s", print_format)
     # if print format is created using print designer, then use print designer template
     if (
         print_format
         and print_format.print_designer
         and print_format.print_designer_body
     ):
-        print(f"[DEBUG] Print format '{print_format.name}' is using Print Designer")
-        
+
         # Handle None or empty print_designer_settings
         if print_format.print_designer_settings:
             settings = json.loads(print_format.print_designer_settings)
-            print(f"[DEBUG] Loaded settings: schema_version = {settings.get('schema_version', 'not set')}")
+            trace.debug(
+                "Loaded settings: schema_version = %s", settings.get("schema_version", "not set")
+            )
         else:
             settings = {}
-            print(f"[DEBUG] No settings found, using empty dict")
-        
+            trace.debug("No settings found, using empty dict")
+
         if is_older_schema(settings, "1.1.0"):
             template_path = "print_designer/page/print_designer/jinja/old_print_format.html"
-            print(f"[DEBUG] Using old template: {template_path}")
+            trace.debug("Using old template: %s", template_path)
             return jenv.loader.get_source(jenv, template_path)[0]
         else:
             template_path = "print_designer/page/print_designer/jinja/print_format.html"
-            print(f"[DEBUG] Using new template: {template_path}")
+            trace.debug("Using new template: %s", template_path)
             return jenv.loader.get_source(jenv, template_path)[0]
 
 
 def measure_time(func):
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"Function {func.__name__} took {end_time - start_time:.4f} seconds")
-        return result
-
-    return wrapper
+    # timings are only collected when tracing is enabled, see print_designer.trace
+    return trace.timed(func)
 
 
 def before_print(doc=None, method=None, print_settings=None, **kwargs):
@@ -365,15 +376,11 @@ def before_print(doc=None, method=None, print_settings=None, **kwargs):
         print_settings: Print settings (when called as doc method)
         **kwargs: Additional arguments including 'args' for template context
     """
-    print(f"[DEBUG] before_print called with doc={doc}, method={method}")
+    trace.debug("before_print called with doc=%s, method=%s", doc, method)
 
-    # Print full document object for debugging
+    # Full document dump is only serialised when debug tracing is on for this request
     if doc:
-        print("\n" + "="*80)
-        print(f"[DOC OBJECT DEBUG] Document: {doc.doctype} - {doc.name}")
-        print("="*80)
-        print(doc.as_dict())
-        print("="*80 + "\n")
+        trace.debug("Document %s - %s: %s", doc.doctype, doc.name, lambda: doc.as_dict())
 
     try:
         # Get the print format from form_dict if not provided
@@ -382,14 +389,13 @@ def before_print(doc=None, method=None, print_settings=None, **kwargs):
             print_format_name = frappe.form_dict.get("format") or frappe.form_dict.get(
                 "print_format"
             )
-            print(f"[DEBUG] Print format name from form_dict: {print_format_name}")
-            
+            trace.debug("Print format name from form_dict: %s", print_format_name)
+
             if print_format_name:
                 try:
                     print_format = frappe.get_doc("Print Format", print_format_name)
-                    print(f"[DEBUG] Successfully loaded Print Format: {print_format_name}")
                 except Exception as e:
-                    print(f"[ERROR] Could not get print format '{print_format_name}': {str(e)}")
+                    trace.error("Could not get print format '%s': %s", print_format_name, e)
                     print_format = None
 
         # Prepare the args dict if it's not passed
@@ -405,18 +411,25 @@ def before_print(doc=None, method=None, print_settings=None, **kwargs):
         # 1. Prepare Print Designer context if this is a Print Designer format
         if print_format and print_format.get("print_designer"):
             _prepare_print_designer_context(print_format, args)
-            print(f"Prepared Print Designer context for format: {print_format.name}")
+            trace.debug("Prepared Print Designer context for format: %s", print_format.name)
 
         # 2. Handle Thai amount enhancement for applicable documents
         if doc and print_format:
             _handle_thai_amount_enhancement(print_format, doc, args)
 
+        # 3. Resolve the signatures / stamps the document links to with one query,
+        # the signature macros then read them from the request memo
+        if doc and hasattr(doc, "get_all_children"):
+            from print_designer.utils.signature_stamp import prefetch_document_signatures
+
+            prefetch_document_signatures(doc)
+
         # Update the kwargs with prepared args
         kwargs["args"] = args
 
     except (BrokenPipeError, OSError, ConnectionError) as pipe_error:
         # Handle Chrome-related pipe errors gracefully
-        print(f"Chrome communication error in before_print hook: {str(pipe_error)}")
+        trace.warning("Chrome communication error in before_print hook: %s", pipe_error)
         # Don't log to database for pipe errors to avoid recursion
         # Just continue with standard processing
     except Exception as e:
@@ -434,20 +447,20 @@ def _handle_thai_amount_enhancement(print_format, doc, args):
     Handle Thai amount enhancement for documents with amount fields.
     This replaces the old thai_amount_to_word.enhance_in_words_field function.
     """
-    print(f"[DEBUG] _handle_thai_amount_enhancement called for doc: {doc.name if doc else 'None'}")
-    
+    trace.debug("_handle_thai_amount_enhancement called for doc: %s", lambda: getattr(doc, "name", None))
+
     try:
         # Check if document has amount fields that need Thai enhancement
         if not (hasattr(doc, "in_words") and hasattr(doc, "grand_total")):
-            print(f"[DEBUG] Document doesn't have in_words/grand_total fields, skipping Thai enhancement")
+            trace.debug("Document doesn't have in_words/grand_total fields, skipping Thai enhancement")
             return
 
         # Get effective language
-        effective_lang = get_effective_language(print_format.name)
-        print(f"[THAI ENHANCEMENT] Effective language: {effective_lang}")
+        language_context = get_print_language_context(print_format.name)
+        effective_lang = language_context.language
 
         # Apply Thai enhancement ONLY if effective language is Thai
-        if is_thai_language(effective_lang):
+        if language_context.is_thai:
             try:
                 from print_designer.utils.thai_amount_to_word import thai_money_in_words
 
@@ -460,16 +473,18 @@ def _handle_thai_amount_enhancement(print_format, doc, args):
                 args["use_thai_language"] = True
                 args["original_in_words"] = original_in_words
 
-                print(
-                    f"Enhanced Thai amount for {doc.doctype} {doc.name}: {doc.in_words}"
+                trace.debug(
+                    "Enhanced Thai amount for %s %s: %s", doc.doctype, doc.name, doc.in_words
                 )
 
             except ImportError:
-                print("Thai money conversion utility not available")
+                trace.warning("Thai money conversion utility not available")
         else:
             # For non-Thai languages, preserve the original in_words
-            print(
-                f"Preserving original in_words for non-Thai language '{effective_lang}': {doc.in_words}"
+            trace.debug(
+                "Preserving original in_words for non-Thai language '%s': %s",
+                effective_lang,
+                doc.in_words,
             )
             args["use_thai_language"] = False
             args["original_in_words"] = doc.in_words
@@ -509,8 +524,7 @@ def _prepare_print_designer_context(print_format, args):
             settings = {}
 
         # Get effective language for this print format
-        effective_lang = get_effective_language(print_format.name)
-        print(f"effective_lang {effective_lang}")
+        language_context = get_print_language_context(print_format.name)
 
         # Always prepare the core elements
         args.update(
@@ -520,8 +534,8 @@ def _prepare_print_designer_context(print_format, args):
                 "footerElement": json.loads(print_format.print_designer_footer or "[]"),
                 "settings": settings,
                 "pdf_generator": frappe.form_dict.get("pdf_generator", "wkhtmltopdf"),
-                "effective_lang": effective_lang,
-                "is_thai": is_thai_language(effective_lang),
+                "effective_lang": language_context.language,
+                "is_thai": language_context.is_thai,
             }
         )
 
@@ -1,12 +1,17 @@
+import os
 import time
+from contextlib import suppress
+from pathlib import Path
 
 import frappe
 from bs4 import BeautifulSoup
 from frappe.utils.pdf import get_print_format_styles as get_styles_print_format_class
 from frappe.utils.pdf import toggle_visible_pdf
 
+from print_designer import trace
 from print_designer.pdf import measure_time
 from print_designer.pdf_generator.cdp_connection import CDPSocketClient
+from print_designer.pdf_generator.chunked_table import pop_chunked_table_registry
 from print_designer.pdf_generator.page import Page
 from print_designer.print_designer.page.print_designer.print_designer import (
     convert_uom,
@@ -20,6 +25,7 @@ class Browser:
             "Print Format", print_format, "print_designer"
         )
         self.browserID = frappe.utils.random_string(10)
+        self.generator = generator
         generator.add_browser(self.browserID)
         # sets soup from html
         self.set_html(html)
@@ -39,6 +45,7 @@ class Browser:
         self.try_async_header_footer_pdf()
         # now wait for page to load as we need DOM to generate pdf
         self.body_page.wait_for_set_content()
+        self.remove_body_html_file()
         self.body_pdf = self.body_page.generate_pdf(
             raw=not self.header_page and not self.footer_page
         )
@@ -95,7 +102,7 @@ class Browser:
         self.options = options
         # Extract copy-related options
         self.copy_count = self.options.get("copy_count", 0) if self.options else 0
-        print(f"self.copy_count {self.copy_count}")
+        trace.debug("copy_count %s", self.copy_count)
 
         self.copy_labels = (
             self.options.get("copy_labels", [frappe._("Original"), frappe._("Copy")])
@@ -137,7 +144,27 @@ class Browser:
         self.body_page = self.new_page("body")
         self.body_page.set_tab_url(frappe.request.host_url)
         self.body_page.wait_for_navigate()
-        self.body_page.set_content(str(self.soup))
+
+        chunked_tables = pop_chunked_table_registry()
+        if not chunked_tables:
+            self.body_page.set_content(str(self.soup))
+            return
+
+        if not getattr(self.generator, "CHROMIUM_WEBSOCKET_URL", ""):
+            # chromium runs on this machine, let it read the (large) html from disk.
+            # base tag keeps relative urls pointing to the site like with set_content.
+            base_tag = self.soup.new_tag("base", href=frappe.request.host_url)
+            self.soup.head.insert(0, base_tag)
+            self.body_html_file = chunked_tables.write_to_file(str(self.soup))
+            self.body_page.set_content_from_url(Path(self.body_html_file).as_uri())
+        else:
+            self.body_page.set_content(chunked_tables.render_to_string(str(self.soup)))
+
+    def remove_body_html_file(self):
+        if path := getattr(self, "body_html_file", None):
+            self.body_html_file = None
+            with suppress(OSError):
+                os.remove(path)
 
     def close_page(self, type):
         page = getattr(self, f"{type}_page")
@@ -477,6 +504,7 @@ class Browser:
 
     def close(self):
         """Enhanced cleanup with better resource management"""
+        self.remove_body_html_file()
         try:
             # Enhanced: Close pages explicitly before disconnecting
             if hasattr(self, 'header_page') and self.header_page:
@@ -0,0 +1,145 @@
+import os
+import tempfile
+from io import StringIO
+from itertools import islice
+
+import frappe
+from frappe.utils.data import cint
+from frappe.utils.jinja import get_jenv
+
+ROWS_TEMPLATE = "print_designer/page/print_designer/jinja/macros/table_rows.html"
+PLACEHOLDER = "<!--pd-chunked-rows:{}-->"
+DEFAULT_BATCH_SIZE = 200
+
+
+class ChunkedTableRegistry:
+	"""
+	Defers rendering of very large child tables while the print format is rendered.
+
+	table.html emits a placeholder comment for tables with more rows than `threshold`.
+	The body html stays small, so BeautifulSoup only parses the layout. Rows are rendered
+	afterwards in batches with the compiled table_rows.html template and streamed into
+	a temp file, which Chromium loads by URL instead of receiving one huge
+	Page.setDocumentContent message.
+	"""
+
+	def __init__(self, context, threshold, batch_size=DEFAULT_BATCH_SIZE):
+		# render args of the print format (doc, settings etc.), rows are rendered with them
+		self.context = context
+		self.threshold = threshold
+		self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+		self.tables = []
+		self._header_footer_elements = None
+
+	def should_chunk(self, element, doc):
+		# header / footer are moved to their own pages before the body rows are filled in
+		if self.is_header_footer_element(element):
+			return False
+		rows = doc.get(element.get("table", {}).get("fieldname")) if doc else None
+		return bool(rows) and len(rows) > self.threshold
+
+	def is_header_footer_element(self, element):
+		if self._header_footer_elements is None:
+			# ids of the element dicts rendered in the header / footer, collected on first use
+			# as pd_format is added to the render args after the registry is created
+			pd_format = self.context.get("pd_format") or {}
+			sections = [
+				*(pd_format.get("header") or {}).values(),
+				*(pd_format.get("footer") or {}).values(),
+				self.context.get("headerElement"),
+				self.context.get("footerElement"),
+			]
+			self._header_footer_elements = set()
+			for elements in sections:
+				self._header_footer_elements.update(iter_element_ids(elements))
+		return id(element) in self._header_footer_elements
+
+	def placeholder(self, element, send_to_jinja):
+		# rows of this table are rendered later by render_rows
+		self.tables.append({"element": element, "send_to_jinja": send_to_jinja})
+		return PLACEHOLDER.format(len(self.tables) - 1)
+
+	def render_rows(self, index):
+		"""Yield html for the rows of the table registered at `index`, one batch at a time."""
+		table = self.tables[index]
+		element = table["element"]
+		rows = self.context["doc"].get(element["table"]["fieldname"]) or []
+		template = get_jenv().get_template(ROWS_TEMPLATE)
+
+		total = len(rows)
+		iterator = iter(rows)
+		rendered = 0
+		while batch := list(islice(iterator, self.batch_size)):
+			rendered += len(batch)
+			yield from template.generate(
+				{
+					**self.context,
+					"element": element,
+					"send_to_jinja": table["send_to_jinja"],
+					"rows": batch,
+					"is_last_batch": rendered >= total,
+					# hoisted classes are rendered before the rows, keep these inline
+					"css_classes": None,
+					"chunked_tables": None,
+				}
+			)
+
+	def write(self, html, stream):
+		"""Write `html` to `stream`, replacing every placeholder with its rendered rows."""
+		for index in range(len(self.tables)):
+			before, found, rest = html.partition(PLACEHOLDER.format(index))
+			if not found:
+				# placeholder was moved out of the body (header / footer), nothing to fill
+				continue
+			stream.write(before)
+			html = rest
+			for chunk in self.render_rows(index):
+				stream.write(chunk)
+		stream.write(html)
+
+	def write_to_file(self, html):
+		fd, path = tempfile.mkstemp(prefix="print_designer_", suffix=".html")
+		with os.fdopen(fd, "w", encoding="utf-8") as f:
+			self.write(html, f)
+		return path
+
+	def render_to_string(self, html):
+		stream = StringIO()
+		self.write(html, stream)
+		return stream.getvalue()
+
+
+def iter_element_ids(elements):
+	"""ids of the element dicts in `elements` and their children"""
+	if isinstance(elements, dict):
+		yield id(elements)
+		elements = elements.get("childrens")
+	if isinstance(elements, list):
+		for element in elements:
+			yield from iter_element_ids(element)
+
+
+def get_chunked_table_registry(args):
+	"""Registry for the current render, if chunked tables are enabled for chrome pdfs."""
+	if args.get("pdf_generator") != "chrome":
+		return None
+
+	settings = args.get("settings") or {}
+	threshold = cint(
+		settings.get("chunkedTableRows") or frappe.conf.get("print_designer_chunked_table_rows")
+	)
+	if threshold <= 0:
+		return None
+
+	batch_size = cint(frappe.conf.get("print_designer_chunked_table_batch_size"))
+	registry = ChunkedTableRegistry(args, threshold, batch_size=batch_size)
+	frappe.local.pd_chunked_tables = registry
+	return registry
+
+
+def pop_chunked_table_registry():
+	"""Return and detach the registry filled by the last print format render."""
+	registry = getattr(frappe.local, "pd_chunked_tables", None)
+	frappe.local.pd_chunked_tables = None
+	if registry and registry.tables:
+		return registry
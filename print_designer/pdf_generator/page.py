@@ -134,7 +134,9 @@ class Page:
 						if path.startswith("files/"):
 							path = frappe.utils.get_site_path("public", path)
 						content = frappe.read_file(path, as_base64=True)
-						response_headers = []
+						# chunked bodies are loaded from a file:// url, fonts and other assets
+						# of the site are cross-origin requests there
+						response_headers = [{"name": "Access-Control-Allow-Origin", "value": "*"}]
 						# write logic to handle all file types as required
 						if path.endswith(".svg"):
 							response_headers.append({"name": "Content-Type", "value": "image/svg+xml"})
@@ -212,6 +214,15 @@ class Page:
 		self.send("Page.setDocumentContent", {"frameId": self._ensure_frame_id(), "html": html})
 		self.wait_for_set_content = wait_start
 
+	def set_content_from_url(self, url, wait_for=None):
+		"""Same as set_content but chromium loads the html itself, used for large documents."""
+		if not wait_for:
+			wait_for = ["load", "DOMContentLoaded"]
+		self.intercept_request_for_local_resources()
+		wait_start = self.wait_for_load(wait_for=wait_for)
+		self.send("Page.navigate", {"url": url, "frameId": self._ensure_frame_id()})
+		self.wait_for_set_content = wait_start
+
 	def wait_for_load(self, wait_for, timeout=60):
 		self.send("Page.setLifecycleEventsEnabled", {"enabled": True})
 		status = {}
@@ -1,6 +1,7 @@
 import frappe
 from frappe.utils.data import cint
 
+from print_designer import trace
 from print_designer.pdf import measure_time
 from print_designer.pdf_generator.browser import Browser
 from print_designer.pdf_generator.generator import FrappePDFGenerator
@@ -27,18 +28,20 @@ def before_request():
 
 
 def after_request():
-    if (
-        frappe.request.path == "/api/method/frappe.utils.print_format.download_pdf"
-        and FrappePDFGenerator._instance
-    ):
+    if frappe.request.path == "/api/method/frappe.utils.print_format.download_pdf":
+        close_browser()
+
+
+def close_browser():
+    """Close the chromium started for this request / job, the persistent one is kept running"""
+    if FrappePDFGenerator._instance and not FrappePDFGenerator().USE_PERSISTENT_CHROMIUM:
         # Not Heavy operation as if process is not available it returns
-        if not FrappePDFGenerator().USE_PERSISTENT_CHROMIUM:
-            FrappePDFGenerator()._close_browser()
+        FrappePDFGenerator()._close_browser()
 
 
 @measure_time
 def get_pdf(print_format, html, options, output, pdf_generator=None):
-    print(f"pdf_generator {pdf_generator}")
+    trace.debug("pdf_generator %s", pdf_generator)
     if pdf_generator == "chrome":
         # scrubbing url to expand url is not required as we have set url.
         # also, planning to remove network requests anyway 🤞
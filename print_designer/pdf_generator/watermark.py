@@ -0,0 +1,137 @@
+from html import escape
+from io import BytesIO
+
+import frappe
+from pypdf import PdfReader, PdfWriter, Transformation
+
+# same placement as the watermark the html injection used to add
+POSITION_CSS = {
+	"Top Right": "top: 70px; right: 70px;",
+	"Top Left": "top: 70px; left: 20px;",
+	"Bottom Right": "bottom: 20px; right: 70px;",
+	"Bottom Left": "bottom: 20px; left: 20px;",
+	"Center": "top: 45%; left: 45%; width: 100px; margin-left: -50px;",
+}
+
+OVERLAY_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>
+	html, body {{ margin: 0; padding: 0; background: transparent; }}
+	.watermark-page {{ position: relative; width: {width}mm; height: {height}mm; overflow: hidden; }}
+	.watermark {{
+		position: absolute;
+		{position_css}
+		font-size: {font_size}px;
+		color: #000000;
+		font-weight: normal;
+		font-family: {font_family}, sans-serif;
+	}}
+</style>
+</head>
+<body><div class="watermark-page"><div class="watermark">{text}</div></div></body>
+</html>"""
+
+# rendered overlay pdfs, keyed by (text, font family, font size, position, page width, page height)
+_OVERLAY_CACHE = {}
+_OVERLAY_CACHE_SIZE = 128
+
+POINTS_TO_MM = 25.4 / 72
+
+
+def get_page_labels(watermark_settings, page_count, text=None):
+	"""
+	Watermark text for every page of the document, None for pages without a watermark.
+
+	`text` overrides the labels of the watermark settings and is put on every page.
+	"""
+	if text:
+		return [text] * page_count
+
+	if watermark_settings == "Original on First Page":
+		return [frappe._("Original")] + [None] * (page_count - 1)
+	if watermark_settings == "Copy on All Pages":
+		return [frappe._("Copy")] * page_count
+	if watermark_settings == "Original,Copy on Sequence":
+		labels = (frappe._("Original"), frappe._("Copy"))
+		return [labels[i % 2] for i in range(page_count)]
+
+	return [None] * page_count
+
+
+def apply_watermark(
+	pdf, watermark_settings, text=None, font_family="Sarabun", font_size=12, position="Top Right"
+):
+	"""
+	Stamp watermarks onto the pages of a rendered pdf and return the new pdf bytes.
+
+	One overlay page is rendered per distinct label and page size (and reused across
+	requests), then merged onto the pages that carry that label.
+	"""
+	writer = PdfWriter(clone_from=BytesIO(pdf))
+	labels = get_page_labels(watermark_settings, len(writer.pages), text=text)
+	if not any(labels):
+		return pdf
+
+	overlays = {}
+	for page, label in zip(writer.pages, labels):
+		if not label:
+			continue
+
+		width, height = round(float(page.mediabox.width)), round(float(page.mediabox.height))
+		key = (label, font_family, str(font_size), position, width, height)
+		if key not in overlays:
+			overlays[key] = PdfReader(BytesIO(get_overlay_pdf(*key))).pages[0]
+
+		overlay = overlays[key]
+		sx = float(page.mediabox.width) / float(overlay.mediabox.width)
+		sy = float(page.mediabox.height) / float(overlay.mediabox.height)
+		transform = Transformation().scale(sx, sy).translate(
+			float(page.mediabox.left), float(page.mediabox.bottom)
+		)
+		page.merge_transformed_page(overlay, transform)
+
+	stream = BytesIO()
+	writer.write(stream)
+	return stream.getvalue()
+
+
+def get_overlay_pdf(text, font_family, font_size, position, width, height):
+	"""Single page pdf with only the watermark text, `width` and `height` in points."""
+	key = (text, font_family, font_size, position, width, height)
+	overlay = _OVERLAY_CACHE.get(key)
+	if overlay is None:
+		if len(_OVERLAY_CACHE) >= _OVERLAY_CACHE_SIZE:
+			_OVERLAY_CACHE.clear()
+		overlay = _OVERLAY_CACHE[key] = _render_overlay_pdf(*key)
+	return overlay
+
+
+def _render_overlay_pdf(text, font_family, font_size, position, width, height):
+	import pdfkit
+
+	width_mm = round(width * POINTS_TO_MM, 2)
+	height_mm = round(height * POINTS_TO_MM, 2)
+	html = OVERLAY_TEMPLATE.format(
+		width=width_mm,
+		height=height_mm,
+		position_css=POSITION_CSS.get(position, POSITION_CSS["Center"]),
+		font_size=font_size,
+		font_family=font_family,
+		text=escape(text),
+	)
+	# not through frappe's get_pdf: its prepare_options always adds --background, which paints
+	# a white page over the body the overlay is merged onto, and wkhtmltopdf honours the last flag
+	options = {
+		"no-background": None,
+		"encoding": "UTF-8",
+		"quiet": None,
+		"page-width": f"{width_mm}mm",
+		"page-height": f"{height_mm}mm",
+		"margin-top": "0mm",
+		"margin-bottom": "0mm",
+		"margin-left": "0mm",
+		"margin-right": "0mm",
+	}
+	return pdfkit.from_string(html, False, options=options)
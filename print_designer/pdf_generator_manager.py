@@ -55,6 +55,41 @@ class PDFGeneratorManager:
 			# Fallback (should never happen)
 			return "wkhtmltopdf"
 	
+	@staticmethod
+	def resolve_generator(print_format=None, requested_generator=None):
+		"""Generator for a print: requested one, else the Print Format's, else wkhtmltopdf"""
+		requested_generator = (
+			requested_generator
+			or frappe.form_dict.get("pdf_generator")
+			or (print_format and frappe.get_cached_value("Print Format", print_format, "pdf_generator"))
+			or "wkhtmltopdf"
+		)
+		return PDFGeneratorManager.determine_generator(requested_generator)
+
+	@staticmethod
+	def render_pdf(print_format, html, generator, options=None, output=None):
+		"""
+		Render html with the given generator through the pdf_generator hook
+		(chrome reuses the warm browser process), wkhtmltopdf when the hook doesn't handle it.
+		A chromium started for the render is closed afterwards unless it is the persistent one,
+		only download_pdf requests close it in after_request.
+		"""
+		from frappe.utils.pdf import get_pdf
+
+		from print_designer.pdf_generator.pdf import close_browser
+		from print_designer.pdf_generator.pdf import get_pdf as get_pdf_with_generator
+
+		try:
+			pdf = get_pdf_with_generator(
+				print_format, html, options or {}, output, pdf_generator=generator
+			)
+		finally:
+			if generator == "chrome":
+				close_browser()
+		if pdf is None:
+			pdf = get_pdf(html, options=options, output=output)
+		return pdf
+
 	@staticmethod
 	def generate_pdf(print_format, html, options=None, output=None):
 		"""Generate PDF using the appropriate generator"""
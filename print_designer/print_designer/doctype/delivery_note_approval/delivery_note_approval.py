@@ -5,6 +5,13 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import now_datetime, add_days
 
+# guest QR scans come in bursts, token lookups and page details are served from redis
+APPROVAL_TOKEN_CACHE_TTL = 5 * 60
+INVALID_TOKEN_CACHE_TTL = 60
+APPROVAL_TOKEN_FIELDS = [
+	"name", "delivery_note", "status", "generated_on", "customer_mobile", "approved_on", "customer_name", "remarks"
+]
+
 
 class DeliveryNoteApproval(Document):
 	"""
@@ -25,6 +32,12 @@ class DeliveryNoteApproval(Document):
 		if self.status == "Approved" and not self.approved_on:
 			self.approved_on = now_datetime()
 	
+	def on_update(self):
+		clear_approval_token_cache(self.approval_token)
+
+	def on_trash(self):
+		clear_approval_token_cache(self.approval_token)
+
 	def before_save(self):
 		"""Before save operations"""
 		# Update delivery note status if approval status changes
@@ -64,23 +77,11 @@ class DeliveryNoteApproval(Document):
 	
 	def get_approval_url(self):
 		"""Get the approval URL for this record"""
-		base_url = frappe.utils.get_url()
-		return f"{base_url}/delivery-approval?dn={self.delivery_note}&token={self.approval_token}"
+		return get_approval_url(self.delivery_note, self.approval_token)
 	
 	def is_expired(self):
 		"""Check if the approval token has expired (7 days default)"""
-		if not self.generated_on:
-			return True
-
-		# Try to get expiry days from settings, default to 7 if not configured
-		try:
-			expiry_days = frappe.db.get_single_value("Print Designer Settings", "approval_expiry_days") or 7
-		except Exception:
-			expiry_days = 7
-
-		expiry_date = add_days(self.generated_on, expiry_days)
-
-		return now_datetime() > expiry_date
+		return is_approval_expired(self.generated_on)
 	
 	@frappe.whitelist()
 	def approve_delivery(self, customer_name, digital_signature=None, remarks=None):
@@ -99,6 +100,7 @@ class DeliveryNoteApproval(Document):
 			"digital_signature": digital_signature,
 			"remarks": remarks
 		}, update_modified=True)
+		clear_approval_token_cache(self.approval_token)
 
 		# Reload to get updated values
 		self.reload()
@@ -132,6 +134,7 @@ class DeliveryNoteApproval(Document):
 			"customer_name": customer_name,
 			"remarks": remarks
 		}, update_modified=True)
+		clear_approval_token_cache(self.approval_token)
 
 		# Reload to get updated values
 		self.reload()
@@ -231,58 +234,184 @@ class DeliveryNoteApproval(Document):
 			frappe.log_error(title="Rejection Notification Error", message=str(e)[:1000])
 
 
+def on_doctype_update():
+	# pending approval of a delivery note is looked up on every QR generation / approval
+	frappe.db.add_index("Delivery Note Approval", ["delivery_note", "status"])
+
+
+def is_approval_expired(generated_on):
+	"""Check if an approval generated on `generated_on` has expired (7 days default)"""
+	if not generated_on:
+		return True
+
+	# Try to get expiry days from settings, default to 7 if not configured
+	try:
+		expiry_days = frappe.db.get_single_value("Print Designer Settings", "approval_expiry_days") or 7
+	except Exception:
+		expiry_days = 7
+
+	expiry_date = add_days(generated_on, expiry_days)
+
+	return now_datetime() > expiry_date
+
+
+def resolve_approval_token(token):
+	"""
+	Approval fields for a token, None if the token is invalid.
+	Served from redis, invalid tokens are cached too so repeated scans don't hit the database.
+	"""
+	if not token or not isinstance(token, str):
+		return None
+
+	key = f"print_designer:approval_token:{token}"
+	approval = frappe.cache().get_value(key)
+	if approval is None:
+		approval = frappe.db.get_value(
+			"Delivery Note Approval", {"approval_token": token}, APPROVAL_TOKEN_FIELDS, as_dict=True
+		) or {}
+		frappe.cache().set_value(
+			key, approval, expires_in_sec=APPROVAL_TOKEN_CACHE_TTL if approval else INVALID_TOKEN_CACHE_TTL
+		)
+
+	return frappe._dict(approval) if approval else None
+
+
+def clear_approval_token_cache(token):
+	if token:
+		frappe.cache().delete_value(
+			[
+				f"print_designer:approval_token:{token}",
+				f"print_designer:approval_details:{token}",
+				f"print_designer:approval_status:{token}",
+			]
+		)
+
+
+def get_approval_url(delivery_note, approval_token):
+	"""Approval URL for a delivery note / token pair"""
+	base_url = frappe.utils.get_url()
+	return f"{base_url}/delivery-approval?dn={delivery_note}&token={approval_token}"
+
+
 @frappe.whitelist(allow_guest=True)
 def get_approval_details(token):
 	"""Get approval details by token for guest users"""
 	try:
-		approval = frappe.get_doc("Delivery Note Approval", {"approval_token": token})
-		
-		if approval.is_expired():
+		approval = resolve_approval_token(token)
+		if not approval:
+			return {"error": "Invalid approval token"}
+
+		if is_approval_expired(approval.generated_on):
 			return {"error": "Approval link has expired"}
 		
 		if approval.status != "Pending":
 			return {"error": "Delivery has already been processed", "status": approval.status}
+
+		key = f"print_designer:approval_details:{token}"
+		details = frappe.cache().get_value(key)
+		if details is None:
+			details = _get_approval_details(approval)
+			frappe.cache().set_value(key, details, expires_in_sec=APPROVAL_TOKEN_CACHE_TTL)
+
+		return details
 		
-		delivery_note = frappe.get_doc("Delivery Note", approval.delivery_note)
-		
-		return {
-			"success": True,
-			"approval": {
-				"name": approval.name,
-				"delivery_note": approval.delivery_note,
-				"customer_mobile": approval.customer_mobile,
-				"status": approval.status,
-				"generated_on": approval.generated_on
-			},
-			"delivery_note": {
-				"name": delivery_note.name,
-				"customer": delivery_note.customer,
-				"customer_name": delivery_note.customer_name,
-				"posting_date": delivery_note.posting_date,
-				"grand_total": delivery_note.grand_total,
-				"currency": delivery_note.currency,
-				"items": [{
-					"item_code": item.item_code,
-					"item_name": item.item_name,
-					"qty": item.qty,
-					"rate": item.rate,
-					"amount": item.amount
-				} for item in delivery_note.items]
-			}
-		}
-		
-	except frappe.DoesNotExistError:
-		return {"error": "Invalid approval token"}
 	except Exception as e:
 		frappe.log_error(f"Error getting approval details: {str(e)}")
 		return {"error": "System error occurred"}
 
 
+def get_delivery_status_by_token(token, delivery_note_name=None):
+	"""
+	Delivery status shown on the guest approval page, None if the token is invalid
+	or belongs to another delivery note. Served from redis until the approval changes.
+	"""
+	approval = resolve_approval_token(token)
+	if not approval or (delivery_note_name and approval.delivery_note != delivery_note_name):
+		return None
+
+	key = f"print_designer:approval_status:{token}"
+	status = frappe.cache().get_value(key)
+	if status is None:
+		status = _get_delivery_status(approval)
+		frappe.cache().set_value(key, status, expires_in_sec=APPROVAL_TOKEN_CACHE_TTL)
+
+	return status
+
+
+def _get_delivery_status(approval):
+	delivery_note = frappe.get_doc("Delivery Note", approval.delivery_note)
+
+	return {
+		"name": delivery_note.name,
+		"customer": delivery_note.customer,
+		"posting_date": delivery_note.posting_date,
+		"grand_total": delivery_note.grand_total,
+		"status": approval.status or "Pending",
+		"approval_date": approval.approved_on,
+		"approved_by": approval.customer_name,
+		"remarks": approval.remarks,
+		"rejection_reason": approval.remarks if approval.status == "Rejected" else None,
+		"has_signature": bool(delivery_note.get("customer_signature") or delivery_note.get("custom_customer_signature")),
+		# fields of the delivery note rendered by the approval page
+		"full_details": {
+			"name": delivery_note.name,
+			"customer_name": delivery_note.customer_name,
+			"customer_address": delivery_note.customer_address,
+			"shipping_address_name": delivery_note.shipping_address_name,
+			"posting_date": delivery_note.posting_date,
+			"grand_total": delivery_note.grand_total,
+			"items": [{
+				"item_code": item.item_code,
+				"item_name": item.item_name,
+				"description": item.description,
+				"qty": item.qty,
+				"uom": item.uom,
+				"rate": item.rate,
+				"amount": item.amount
+			} for item in delivery_note.items]
+		}
+	}
+
+
+def _get_approval_details(approval):
+	delivery_note = frappe.get_doc("Delivery Note", approval.delivery_note)
+
+	return {
+		"success": True,
+		"approval": {
+			"name": approval.name,
+			"delivery_note": approval.delivery_note,
+			"customer_mobile": approval.customer_mobile,
+			"status": approval.status,
+			"generated_on": approval.generated_on
+		},
+		"delivery_note": {
+			"name": delivery_note.name,
+			"customer": delivery_note.customer,
+			"customer_name": delivery_note.customer_name,
+			"posting_date": delivery_note.posting_date,
+			"grand_total": delivery_note.grand_total,
+			"currency": delivery_note.currency,
+			"items": [{
+				"item_code": item.item_code,
+				"item_name": item.item_name,
+				"qty": item.qty,
+				"rate": item.rate,
+				"amount": item.amount
+			} for item in delivery_note.items]
+		}
+	}
+
+
 @frappe.whitelist(allow_guest=True)
 def submit_approval_decision(token, decision, customer_name, digital_signature=None, remarks=None):
 	"""Submit approval decision (approve/reject)"""
 	try:
-		approval = frappe.get_doc("Delivery Note Approval", {"approval_token": token})
+		approval = resolve_approval_token(token)
+		if not approval:
+			return {"error": "Invalid approval token"}
+
+		approval = frappe.get_doc("Delivery Note Approval", approval.name)
 		
 		if decision == "approve":
 			return approval.approve_delivery(customer_name, digital_signature, remarks)
@@ -157,6 +157,36 @@ class TestDeliveryNoteApproval(unittest.TestCase):
 		approval.reload()
 		approval.delete(ignore_permissions=True)
 	
+	def test_cached_token_lookup(self):
+		"""Test cached token details are dropped once the delivery is processed"""
+		from print_designer.print_designer.doctype.delivery_note_approval.delivery_note_approval import (
+			get_approval_details,
+			get_delivery_status_by_token,
+			resolve_approval_token,
+		)
+
+		approval = frappe.get_doc({
+			"doctype": "Delivery Note Approval",
+			"delivery_note": "TEST-DN-001",
+			"customer_mobile": "+66123456789",
+			"status": "Pending"
+		})
+		approval.insert(ignore_permissions=True)
+
+		self.assertEqual(resolve_approval_token(approval.approval_token).name, approval.name)
+		self.assertIsNone(resolve_approval_token("invalid-token"))
+		self.assertTrue(get_approval_details(approval.approval_token).get("success"))
+		self.assertIsNone(get_delivery_status_by_token("invalid-token"))
+		self.assertIsNone(get_delivery_status_by_token(approval.approval_token, "OTHER-DN"))
+
+		approval.reject_delivery(customer_name="Test Customer", remarks="Wrong items")
+
+		details = get_approval_details(approval.approval_token)
+		self.assertEqual(details.get("status"), "Rejected")
+		
+		# Cleanup
+		approval.delete(ignore_permissions=True)
+	
 	def tearDown(self):
 		"""Clean up test data"""
 		# Clean up any remaining test records
@@ -1,9 +1,14 @@
 # Copyright (c) 2025, Frappe Technologies Pvt Ltd. and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
 
 class EmployeeTaxLedgerEntry(Document):
 	pass
+
+
+def on_doctype_update():
+	# PND1 aggregates the entries of one month across all ledgers
+	frappe.db.add_index("Employee Tax Ledger Entry", ["year_buddhist", "month"])
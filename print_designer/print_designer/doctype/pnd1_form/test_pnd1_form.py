@@ -1,9 +1,90 @@
 # Copyright (c) 2025, Frappe Technologies Pvt Ltd. and Contributors
 # See license.txt
 
-# import frappe
+import frappe
+from erpnext.setup.doctype.employee.test_employee import make_employee
 from frappe.tests.utils import FrappeTestCase
 
+from print_designer.print_designer.doctype.pnd1_form.pnd1_form import (
+	get_employee_tax_ledger_entries,
+	get_employee_tax_totals,
+)
+
+TEST_TAX_YEAR = "2642"
+
 
 class TestPND1Form(FrappeTestCase):
-	pass
+	def setUp(self):
+		self.company = frappe.get_all("Company", limit=1, pluck="name")[0]
+		frappe.db.delete("Employee Tax Ledger Entry", {"year_buddhist": TEST_TAX_YEAR})
+		frappe.db.delete("Employee Tax Ledger", {"tax_year": TEST_TAX_YEAR})
+
+		self.salaried = make_employee(
+			"_test_pnd1_salaried@example.com",
+			company=self.company,
+			employment_type="Full-time",
+			pd_custom_thai_tax_id="1111111111111",
+		)
+		self.contractor = make_employee(
+			"_test_pnd1_contractor@example.com",
+			company=self.company,
+			employment_type="Contract",
+			pd_custom_thai_tax_id="2222222222222",
+		)
+
+	def make_ledger(self, employee, entries):
+		ledger = frappe.new_doc("Employee Tax Ledger")
+		ledger.employee = employee
+		ledger.tax_year = TEST_TAX_YEAR
+		for posting_date, month, gross_salary, income_tax_amount in entries:
+			ledger.append(
+				"monthly_entries",
+				{
+					"salary_slip": frappe.generate_hash(length=10),
+					"posting_date": posting_date,
+					"month": month,
+					"year": "2099",
+					"year_buddhist": TEST_TAX_YEAR,
+					"gross_salary": gross_salary,
+					"income_tax_amount": income_tax_amount,
+				},
+			)
+		# the entries are not backed by real salary slips
+		ledger.flags.ignore_links = True
+		ledger.insert()
+		return ledger
+
+	def test_employee_tax_totals(self):
+		self.make_ledger(
+			self.salaried,
+			[
+				("2099-11-05", "11 - November", 30000, 500),
+				("2099-11-20", "11 - November", 5000, 100),
+				("2099-10-05", "10 - October", 30000, 500),
+			],
+		)
+		self.make_ledger(
+			self.contractor,
+			[
+				("2099-11-01", "11 - November", 20000, 600),
+				("2099-11-15", "11 - November", 10000, 300),
+			],
+		)
+
+		totals = get_employee_tax_totals(TEST_TAX_YEAR, 11)
+
+		# ordered by the first posting in the month, October is left out
+		self.assertEqual([row.employee for row in totals], [self.contractor, self.salaried])
+		self.assertEqual(
+			[(row.total_gross, row.total_tax, row.entries_count) for row in totals],
+			[(30000, 900, 2), (35000, 600, 2)],
+		)
+		self.assertEqual([row.employee_tax_id for row in totals], ["2222222222222", "1111111111111"])
+		self.assertEqual([row.employment_type for row in totals], ["Contract", "Full-time"])
+
+		items = get_employee_tax_ledger_entries(TEST_TAX_YEAR, 11)
+		self.assertEqual([item["sequence_number"] for item in items], [1, 2])
+		self.assertEqual(items[0]["income_type"], "2. เงินได้ตามมาตรา 40 (2) - Fee/Commission")
+		self.assertEqual(items[1]["income_type"], "1. เงินได้ตามมาตรา 40 (1) เงินเดือน ค่าจ้าง ฯลฯ - Salary")
+		self.assertEqual(items[0]["wht_rate"], 3)
+		self.assertEqual(items[0]["income_description"], f"เงินเดือนประจำเดือน พฤศจิกายน {TEST_TAX_YEAR}")
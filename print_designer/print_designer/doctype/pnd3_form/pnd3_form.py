@@ -5,6 +5,11 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import flt
 
+from print_designer.print_designer.doctype.withholding_tax_certificate.withholding_tax_certificate import (
+	get_pnd_certificates,
+	set_pnd_form_link,
+)
+
 
 class PND3Form(Document):
 	def before_save(self):
@@ -34,40 +39,15 @@ class PND3Form(Document):
 		# Clear existing items first
 		self.items = []
 
-		# Format tax month to match WHT certificate format (e.g., "09 - กันยายน (September)")
-		# Use string zfill to handle both string and int inputs safely
-		tax_month_formatted = str(self.tax_period_month).zfill(2)
-
-		# Get all WHT certificates and filter manually for complex matching
-		all_certificates = frappe.get_all(
-			"Withholding Tax Certificate",
-			filters={
-				"docstatus": 1,  # Only submitted certificates
-				"status": "Issued",  # Only issued certificates
-				"tax_year": self.tax_period_year,
-				"pnd_form_type": "PND3 Form",  # Only PND3 type
-			},
-			fields=[
-				"name", "supplier_name", "supplier_tax_id", "income_type", "tax_month",
-				"income_description", "tax_base_amount", "wht_rate", "wht_amount",
-				"custom_pnd_form", "supplier_type_classification"
-			],
-			order_by="certificate_date asc"
+		# Period, classification (individuals / freelancers) and assignment are filtered in the query
+		wht_certificates = get_pnd_certificates(
+			"PND3 Form",
+			self.tax_period_year,
+			self.tax_period_month,
+			"Individual",
+			pnd_form=self.name,
 		)
 
-		# Filter certificates that match this period and are eligible for PND3
-		wht_certificates = []
-		for cert in all_certificates:
-			# Check if tax month matches
-			cert_month = cert.tax_month
-			if cert_month and (cert_month.startswith(tax_month_formatted) or cert_month == str(self.tax_period_month)):
-				# Check if supplier classification is for individuals/freelancers (PND3 target)
-				classification = cert.supplier_type_classification or ""
-				if any(keyword in classification for keyword in ["Individual", "Personal", "Non-staff", "PND.3"]):
-					# Allow certificates already assigned to THIS PND form or unassigned
-					if not cert.custom_pnd_form or cert.custom_pnd_form == self.name:
-						wht_certificates.append(cert)
-
 		sequence = 1
 		for cert in wht_certificates:
 			# Debug: Print cert object details
@@ -114,30 +94,12 @@ class PND3Form(Document):
 			self.average_tax_rate = 0
 
 	def on_submit(self):
-		"""Update WHT certificates to link them to this PND form"""
-		for item in self.items:
-			if item.withholding_tax_cert:
-				frappe.db.set_value(
-					"Withholding Tax Certificate",
-					item.withholding_tax_cert,
-					"custom_pnd_form",
-					self.name
-				)
-
-		frappe.db.commit()
+		"""Link the WHT certificates to this PND form"""
+		set_pnd_form_link([item.withholding_tax_cert for item in self.items], self.name)
 
 	def on_cancel(self):
 		"""Remove PND form link from WHT certificates"""
-		for item in self.items:
-			if item.withholding_tax_cert:
-				frappe.db.set_value(
-					"Withholding Tax Certificate",
-					item.withholding_tax_cert,
-					"custom_pnd_form",
-					""
-				)
-
-		frappe.db.commit()
+		set_pnd_form_link([item.withholding_tax_cert for item in self.items], None)
 
 	@frappe.whitelist()
 	def refresh_certificates(self):
@@ -5,6 +5,10 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import flt
 
+from print_designer.print_designer.doctype.withholding_tax_certificate.withholding_tax_certificate import (
+	set_pnd_form_link,
+)
+
 
 class PND54Form(Document):
 	def before_save(self):
@@ -97,30 +101,12 @@ class PND54Form(Document):
 			self.average_tax_rate = 0
 
 	def on_submit(self):
-		"""Update WHT certificates to link them to this PND form"""
-		for item in self.items:
-			if item.withholding_tax_cert:
-				frappe.db.set_value(
-					"Withholding Tax Certificate",
-					item.withholding_tax_cert,
-					"custom_pnd_form",
-					self.name
-				)
-
-		frappe.db.commit()
+		"""Link the WHT certificates to this PND form"""
+		set_pnd_form_link([item.withholding_tax_cert for item in self.items], self.name)
 
 	def on_cancel(self):
 		"""Remove PND form link from WHT certificates"""
-		for item in self.items:
-			if item.withholding_tax_cert:
-				frappe.db.set_value(
-					"Withholding Tax Certificate",
-					item.withholding_tax_cert,
-					"custom_pnd_form",
-					""
-				)
-
-		frappe.db.commit()
+		set_pnd_form_link([item.withholding_tax_cert for item in self.items], None)
 
 	@frappe.whitelist()
 	def refresh_certificates(self):
@@ -0,0 +1,88 @@
+# Copyright (c) 2026, Frappe Technologies Pvt Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from print_designer.custom.withholding_tax import WHT_INCOME_TYPE_FIELD
+from print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary import (
+	SUMMARY_BUILT_ON_KEY,
+	SUMMARY_DOCTYPE,
+	add_to_wht_monthly_summary,
+	ensure_wht_monthly_summary,
+	get_wht_monthly_summary,
+	is_wht_monthly_summary_built,
+	update_wht_monthly_summary,
+)
+
+
+class TestWHTMonthlySummary(FrappeTestCase):
+	def setUp(self):
+		self.company = frappe.get_all("Company", limit=1, pluck="name")[0]
+		self.key = {
+			"company": self.company,
+			"period": "2026-01-01",
+			"supplier": "",
+			"income_type": "_Test Income Type",
+			"wht_rate": 3,
+		}
+		frappe.db.delete(SUMMARY_DOCTYPE, {"income_type": "_Test Income Type"})
+
+	def test_submit_and_cancel_deltas(self):
+		add_to_wht_monthly_summary(self.key, document_count=1, total_base_amount=1000, total_wht_amount=30)
+		add_to_wht_monthly_summary(self.key, document_count=1, total_base_amount=500, total_wht_amount=15)
+		add_to_wht_monthly_summary(self.key, document_count=-1, total_base_amount=-1000, total_wht_amount=-30)
+
+		self.assertEqual(frappe.db.count(SUMMARY_DOCTYPE, {"income_type": "_Test Income Type"}), 1)
+		row = frappe.db.get_value(
+			SUMMARY_DOCTYPE, self.key, ["document_count", "total_base_amount", "total_wht_amount"], as_dict=True
+		)
+		self.assertEqual((row.document_count, row.total_base_amount, row.total_wht_amount), (1, 500, 15))
+
+		months = get_wht_monthly_summary("2026-01-15", "2026-01-31", self.company, group_by="period,income_type")
+		self.assertIn("_Test Income Type", [month.income_type for month in months])
+
+	def test_cancel_before_first_rebuild_is_ignored(self):
+		frappe.db.set_global(SUMMARY_BUILT_ON_KEY, "")
+		doc = frappe._dict(
+			doctype="Purchase Invoice",
+			docstatus=2,
+			custom_is_withholding_tax=1,
+			company=self.company,
+			posting_date="2026-01-10",
+			supplier="",
+			grand_total=1000,
+			custom_withholding_tax_rate=3,
+			pd_custom_withholding_tax_amount=30,
+		)
+		doc[WHT_INCOME_TYPE_FIELD] = "_Test Income Type"
+
+		update_wht_monthly_summary(doc)
+
+		self.assertFalse(frappe.db.exists(SUMMARY_DOCTYPE, self.key))
+
+	def test_site_without_wht_documents_is_marked_built(self):
+		frappe.db.set_global(SUMMARY_BUILT_ON_KEY, "")
+		module = "print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary"
+
+		with patch(f"{module}.get_submitted_wht_document_count", return_value=0), patch(
+			f"{module}.enqueue_wht_monthly_summary_rebuild"
+		) as enqueue:
+			ensure_wht_monthly_summary()
+
+		enqueue.assert_not_called()
+		self.assertTrue(is_wht_monthly_summary_built())
+
+	def test_site_with_wht_documents_enqueues_rebuild(self):
+		frappe.db.set_global(SUMMARY_BUILT_ON_KEY, "")
+		module = "print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary"
+
+		with patch(f"{module}.get_submitted_wht_document_count", return_value=2), patch(
+			f"{module}.enqueue_wht_monthly_summary_rebuild"
+		) as enqueue:
+			ensure_wht_monthly_summary()
+
+		enqueue.assert_called_once()
+		self.assertFalse(is_wht_monthly_summary_built())
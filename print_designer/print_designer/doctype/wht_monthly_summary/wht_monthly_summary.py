@@ -0,0 +1,250 @@
+# Copyright (c) 2026, Frappe Technologies Pvt Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.query_builder.functions import Count, Sum
+from frappe.utils import cint, flt, get_first_day, get_last_day, getdate, now_datetime
+
+from print_designer.custom.withholding_tax import (
+	WHT_INCOME_TYPE_FIELD,
+	determine_income_type,
+	ensure_wht_income_types,
+)
+
+SUMMARY_DOCTYPE = "WHT Monthly Summary"
+SUMMARY_KEY_FIELDS = ["company", "period", "supplier", "income_type", "wht_rate"]
+SUMMARY_TOTAL_FIELDS = ["document_count", "total_base_amount", "total_wht_amount"]
+# global default set by the first full rebuild, the rows are only maintained on submit / cancel after it
+SUMMARY_BUILT_ON_KEY = "wht_monthly_summary_built_on"
+
+# WHT source doctypes: (party field, amount paid field), same amounts as get_wht_summary_report
+WHT_SOURCE_DOCTYPES = {
+	"Payment Entry": ("party", "paid_amount"),
+	"Purchase Invoice": ("supplier", "grand_total"),
+}
+
+
+class WHTMonthlySummary(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(SUMMARY_DOCTYPE, SUMMARY_KEY_FIELDS, constraint_name="unique_wht_monthly_summary")
+
+
+def update_wht_monthly_summary(doc, method=None):
+	"""
+	doc_events on_submit / on_cancel of Payment Entry and Purchase Invoice: add the
+	document to (or subtract it from) its summary row
+	"""
+	if not is_wht_document(doc):
+		return
+
+	if not is_wht_monthly_summary_built():
+		# documents are counted by the first full rebuild, cancelling one submitted
+		# before it would subtract from a row that never counted it
+		return
+
+	sign = -1 if doc.docstatus == 2 else 1
+
+	party_field, amount_field = WHT_SOURCE_DOCTYPES[doc.doctype]
+	add_to_wht_monthly_summary(
+		{
+			"company": doc.company,
+			"period": get_first_day(doc.posting_date),
+			"supplier": doc.get(party_field) or "",
+			"income_type": doc.get(WHT_INCOME_TYPE_FIELD) or determine_income_type(doc),
+			"wht_rate": flt(doc.custom_withholding_tax_rate),
+		},
+		document_count=sign,
+		total_base_amount=sign * flt(doc.get(amount_field)),
+		total_wht_amount=sign * flt(doc.pd_custom_withholding_tax_amount),
+	)
+
+
+def is_wht_monthly_summary_built():
+	return bool(frappe.db.get_global(SUMMARY_BUILT_ON_KEY))
+
+
+def is_wht_document(doc):
+	if doc.doctype not in WHT_SOURCE_DOCTYPES or not doc.get("custom_is_withholding_tax"):
+		return False
+	if doc.doctype == "Payment Entry" and doc.party_type != "Supplier":
+		return False
+	return True
+
+
+def add_to_wht_monthly_summary(key, **totals):
+	"""Add `totals` to the summary row of `key`, creating the row if needed"""
+	name = frappe.db.get_value(SUMMARY_DOCTYPE, key, "name", for_update=True)
+	if not name:
+		frappe.db.savepoint("wht_monthly_summary")
+		try:
+			name = frappe.get_doc({"doctype": SUMMARY_DOCTYPE, **key}).insert(ignore_permissions=True).name
+		except frappe.UniqueValidationError:
+			# created by a concurrent submit
+			frappe.db.rollback(save_point="wht_monthly_summary")
+			name = frappe.db.get_value(SUMMARY_DOCTYPE, key, "name", for_update=True)
+
+	summary = frappe.qb.DocType(SUMMARY_DOCTYPE)
+	query = frappe.qb.update(summary).set(summary.modified, now_datetime()).where(summary.name == name)
+	for fieldname, value in totals.items():
+		query = query.set(summary[fieldname], summary[fieldname] + value)
+	query.run()
+
+
+def rebuild_wht_monthly_summary(company=None, from_date=None, to_date=None):
+	"""
+	Recompute the summary rows of the given months from the submitted documents, used to
+	backfill the table or to repair it. Returns the number of rows written.
+
+	Submit / cancel only update the rows once a full rebuild (no filters) has run.
+	"""
+	filters = {}
+	if company:
+		filters["company"] = company
+	if from_date and to_date:
+		filters["period"] = ["between", [get_first_day(from_date), get_last_day(to_date)]]
+	elif from_date:
+		filters["period"] = [">=", get_first_day(from_date)]
+	elif to_date:
+		filters["period"] = ["<=", get_last_day(to_date)]
+
+	summary_rows = {}
+	for doctype in WHT_SOURCE_DOCTYPES:
+		for row in get_wht_document_totals(doctype, company, from_date, to_date):
+			key = (row.company, get_first_day(row.posting_date), row.supplier or "", row.income_type or "", flt(row.wht_rate))
+			totals = summary_rows.setdefault(key, [0, 0, 0])
+			totals[0] += cint(row.document_count)
+			totals[1] += flt(row.total_base_amount)
+			totals[2] += flt(row.total_wht_amount)
+
+	frappe.db.delete(SUMMARY_DOCTYPE, filters)
+
+	now = now_datetime()
+	user = frappe.session.user
+	frappe.db.bulk_insert(
+		SUMMARY_DOCTYPE,
+		["name", "creation", "modified", "owner", "modified_by"] + SUMMARY_KEY_FIELDS + SUMMARY_TOTAL_FIELDS,
+		[
+			[frappe.generate_hash(length=10), now, now, user, user, *key, *totals]
+			for key, totals in summary_rows.items()
+		],
+	)
+	if not (company or from_date or to_date):
+		frappe.db.set_global(SUMMARY_BUILT_ON_KEY, str(now))
+	return len(summary_rows)
+
+
+def ensure_wht_monthly_summary():
+	"""
+	after_install / after_migrate: start maintaining the summary. A site without submitted
+	WHT documents (a fresh install) is marked built right away, otherwise the first full
+	rebuild is enqueued.
+	"""
+	if is_wht_monthly_summary_built():
+		return
+
+	if not any(get_submitted_wht_document_count(doctype) for doctype in WHT_SOURCE_DOCTYPES):
+		frappe.db.set_global(SUMMARY_BUILT_ON_KEY, str(now_datetime()))
+		return
+
+	enqueue_wht_monthly_summary_rebuild()
+
+
+def get_submitted_wht_document_count(doctype):
+	if not frappe.db.has_column(doctype, "custom_is_withholding_tax"):
+		return 0
+	return frappe.db.count(doctype, {"docstatus": 1, "custom_is_withholding_tax": 1})
+
+
+def enqueue_wht_monthly_summary_rebuild():
+	"""Full rebuild in a background job, it reads every submitted WHT document"""
+	frappe.enqueue(
+		"print_designer.print_designer.doctype.wht_monthly_summary.wht_monthly_summary.rebuild_wht_monthly_summary",
+		queue="long",
+		timeout=3600,
+		job_id=f"rebuild_wht_monthly_summary:{frappe.local.site}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def get_wht_document_totals(doctype, company=None, from_date=None, to_date=None):
+	"""Totals of submitted WHT documents per company, posting date, supplier, income type and rate"""
+	party_field, amount_field = WHT_SOURCE_DOCTYPES[doctype]
+	doc = frappe.qb.DocType(doctype)
+
+	conditions = (doc.docstatus == 1) & (doc.custom_is_withholding_tax == 1)
+	if doctype == "Payment Entry":
+		conditions &= doc.party_type == "Supplier"
+	if company:
+		conditions &= doc.company == company
+	if from_date:
+		conditions &= doc.posting_date >= get_first_day(from_date)
+	if to_date:
+		conditions &= doc.posting_date <= get_last_day(to_date)
+
+	# documents submitted before the income type was stored on submit
+	missing = frappe.qb.from_(doc).select(doc.name).where(
+		conditions & (doc[WHT_INCOME_TYPE_FIELD].isnull() | (doc[WHT_INCOME_TYPE_FIELD] == ""))
+	).run(pluck=True)
+	if missing:
+		ensure_wht_income_types([{"doctype": doctype, "name": name} for name in missing])
+
+	return (
+		frappe.qb.from_(doc)
+		.select(
+			doc.company,
+			doc.posting_date,
+			doc[party_field].as_("supplier"),
+			doc[WHT_INCOME_TYPE_FIELD].as_("income_type"),
+			doc.custom_withholding_tax_rate.as_("wht_rate"),
+			Count(doc.name).as_("document_count"),
+			Sum(doc[amount_field]).as_("total_base_amount"),
+			Sum(doc.pd_custom_withholding_tax_amount).as_("total_wht_amount"),
+		)
+		.where(conditions)
+		.groupby(
+			doc.company,
+			doc.posting_date,
+			doc[party_field],
+			doc[WHT_INCOME_TYPE_FIELD],
+			doc.custom_withholding_tax_rate,
+		)
+	).run(as_dict=True)
+
+
+@frappe.whitelist()
+def get_wht_monthly_summary(from_date, to_date, company=None, group_by="period"):
+	"""
+	Pre-aggregated WHT totals of the months from `from_date` to `to_date`, grouped by
+	any of period, supplier, income_type and wht_rate (comma separated)
+	"""
+	frappe.has_permission(SUMMARY_DOCTYPE, "read", throw=True)
+
+	group_fields = [fieldname.strip() for fieldname in (group_by or "").split(",") if fieldname.strip()]
+	invalid = set(group_fields) - {"period", "supplier", "income_type", "wht_rate", "company"}
+	if invalid:
+		frappe.throw(_("Cannot group WHT Monthly Summary by {0}").format(", ".join(sorted(invalid))))
+
+	summary = frappe.qb.DocType(SUMMARY_DOCTYPE)
+	query = (
+		frappe.qb.from_(summary)
+		.select(
+			*(summary[fieldname] for fieldname in group_fields),
+			Sum(summary.document_count).as_("document_count"),
+			Sum(summary.total_base_amount).as_("total_base_amount"),
+			Sum(summary.total_wht_amount).as_("total_wht_amount"),
+		)
+		.where(summary.period.between(get_first_day(from_date), getdate(to_date)))
+	)
+	if company:
+		query = query.where(summary.company == company)
+	if group_fields:
+		query = query.groupby(*(summary[fieldname] for fieldname in group_fields))
+		query = query.orderby(*(summary[fieldname] for fieldname in group_fields))
+
+	return query.run(as_dict=True)
@@ -1,9 +1,150 @@
 # Copyright (c) 2025, Frappe Technologies Pvt Ltd. and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from print_designer.print_designer.doctype.withholding_tax_certificate.withholding_tax_certificate import (
+	get_pnd_classification,
+	get_tax_month_no,
+)
+
+TEST_TAX_YEAR = "2099"
+TEST_TAX_MONTH = "11 - พฤศจิกายน (November)"
+
 
 class TestWithholdingTaxCertificate(FrappeTestCase):
-	pass
+	def test_tax_month_no(self):
+		self.assertEqual(get_tax_month_no("09 - กันยายน (September)"), 9)
+		self.assertEqual(get_tax_month_no("12"), 12)
+		self.assertEqual(get_tax_month_no(3), 3)
+		self.assertEqual(get_tax_month_no(None), 0)
+
+	def test_pnd_classification(self):
+		self.assertEqual(get_pnd_classification("Company/Juristic Person (PND.53)"), "Juristic Person")
+		self.assertEqual(get_pnd_classification("Individual - Non-staff (PND.3)"), "Individual")
+		self.assertEqual(get_pnd_classification("Foreign"), "")
+		self.assertEqual(get_pnd_classification(None), "")
+
+
+class TestPNDFormRows(FrappeTestCase):
+	"""Certificates submitted / cancelled into the draft PND3 form of their tax period"""
+
+	def setUp(self):
+		self.company = frappe.get_all("Company", limit=1, pluck="name")[0]
+		for pnd_form in frappe.get_all("PND3 Form", filters={"tax_period_year": TEST_TAX_YEAR}, pluck="name"):
+			frappe.db.delete("PND3 Items", {"parent": pnd_form})
+			frappe.db.delete("PND3 Form", {"name": pnd_form})
+		frappe.db.delete("Withholding Tax Certificate", {"tax_year": TEST_TAX_YEAR})
+
+	def make_certificate(self, supplier_name, tax_base_amount, wht_rate=3, submit=True):
+		certificate = frappe.get_doc(
+			{
+				"doctype": "Withholding Tax Certificate",
+				"certificate_number": frappe.generate_hash(length=10),
+				"company": self.company,
+				"supplier": supplier_name,
+				"supplier_name": supplier_name,
+				"supplier_tax_id": "1234567890123",
+				"supplier_type_classification": "Individual - Non-staff (PND.3)",
+				"pnd_form_type": "PND3 Form",
+				"tax_year": TEST_TAX_YEAR,
+				"tax_month": TEST_TAX_MONTH,
+				"income_type": "2. ค่าธรรมเนียม ค่านายหน้า ฯลฯ 40(2) - Fee/Commission",
+				"income_description": "Consulting",
+				"tax_base_amount": tax_base_amount,
+				"wht_rate": wht_rate,
+				"wht_amount": tax_base_amount * wht_rate / 100,
+			}
+		)
+		# payment entry / supplier are not needed for the PND rows
+		certificate.flags.ignore_links = True
+		certificate.flags.ignore_mandatory = True
+		certificate.insert()
+		if submit:
+			certificate.submit()
+		return certificate
+
+	def get_pnd_form(self):
+		return frappe.get_doc("PND3 Form", {"tax_period_year": TEST_TAX_YEAR, "docstatus": 0})
+
+	def get_totals(self, pnd_form):
+		return frappe.db.get_value(
+			"PND3 Form", pnd_form, ["total_certificates", "total_gross_amount", "total_tax_amount"]
+		)
+
+	def get_rows(self, pnd_form):
+		return frappe.get_all(
+			"PND3 Items",
+			filters={"parent": pnd_form},
+			fields=["idx", "sequence_number", "withholding_tax_cert", "gross_amount", "tax_amount"],
+			order_by="idx asc",
+		)
+
+	def assert_totals_match_refresh(self, pnd_form):
+		totals = self.get_totals(pnd_form)
+		form = frappe.get_doc("PND3 Form", pnd_form)
+		form.refresh_certificates()
+		self.assertEqual(totals, self.get_totals(pnd_form))
+
+	def test_submit_into_new_and_existing_form(self):
+		first = self.make_certificate("_Test PND Supplier 1", 1000)
+		pnd_form = self.get_pnd_form().name
+		self.assertEqual(frappe.db.get_value("Withholding Tax Certificate", first.name, "custom_pnd_form"), pnd_form)
+		self.assertEqual(self.get_totals(pnd_form), (1, 1000, 30))
+
+		second = self.make_certificate("_Test PND Supplier 2", 2000)
+		self.assertEqual(self.get_pnd_form().name, pnd_form)
+		self.assertEqual(self.get_totals(pnd_form), (2, 3000, 90))
+
+		rows = self.get_rows(pnd_form)
+		self.assertEqual([row.withholding_tax_cert for row in rows], [first.name, second.name])
+		self.assertEqual([(row.idx, row.sequence_number) for row in rows], [(1, 1), (2, 2)])
+		self.assert_totals_match_refresh(pnd_form)
+
+	def test_resubmitted_certificate_updates_its_row(self):
+		self.make_certificate("_Test PND Supplier 1", 1000)
+		second = self.make_certificate("_Test PND Supplier 2", 2000)
+		pnd_form = self.get_pnd_form().name
+
+		second.db_set({"tax_base_amount": 2500, "wht_amount": 75})
+		second.reload()
+		second.add_to_pnd_form()
+
+		rows = self.get_rows(pnd_form)
+		self.assertEqual(len(rows), 2)
+		self.assertEqual((rows[1].gross_amount, rows[1].tax_amount), (2500, 75))
+		self.assertEqual(self.get_totals(pnd_form), (2, 3500, 105))
+		self.assert_totals_match_refresh(pnd_form)
+
+	def test_amended_certificate_replaces_the_cancelled_one(self):
+		first = self.make_certificate("_Test PND Supplier 1", 1000)
+		second = self.make_certificate("_Test PND Supplier 2", 2000)
+		pnd_form = self.get_pnd_form().name
+
+		second.cancel()
+		amended = frappe.copy_doc(second)
+		amended.amended_from = second.name
+		amended.tax_base_amount = 4000
+		amended.wht_amount = 120
+		amended.flags.ignore_links = True
+		amended.flags.ignore_mandatory = True
+		amended.insert()
+		amended.submit()
+
+		rows = self.get_rows(pnd_form)
+		self.assertEqual([row.withholding_tax_cert for row in rows], [first.name, amended.name])
+		self.assertEqual(self.get_totals(pnd_form), (2, 5000, 150))
+		self.assert_totals_match_refresh(pnd_form)
+
+	def test_cancel_removes_the_row(self):
+		first = self.make_certificate("_Test PND Supplier 1", 1000)
+		second = self.make_certificate("_Test PND Supplier 2", 2000)
+		pnd_form = self.get_pnd_form().name
+
+		first.cancel()
+
+		self.assertEqual([row.withholding_tax_cert for row in self.get_rows(pnd_form)], [second.name])
+		self.assertEqual(self.get_totals(pnd_form), (1, 2000, 60))
+		self.assertFalse(frappe.db.get_value("Withholding Tax Certificate", first.name, "custom_pnd_form"))
+		self.assert_totals_match_refresh(pnd_form)
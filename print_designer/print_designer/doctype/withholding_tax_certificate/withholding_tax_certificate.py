@@ -3,114 +3,138 @@
 
 import frappe
 from frappe.model.document import Document
-from frappe.utils import flt, getdate
+from frappe.utils import cint, flt, getdate, now_datetime
+
+# supplier_type_classification keywords of the PND forms, normalised into pnd_classification
+PND_CLASSIFICATION_KEYWORDS = {
+	"Juristic Person": ("Company", "Corporation", "Juristic Person", "PND.53"),
+	"Individual": ("Individual", "Personal", "Non-staff", "PND.3"),
+}
+
+# certificates linked / unlinked per UPDATE when a PND form is submitted or cancelled
+PND_LINK_CHUNK_SIZE = 1000
+
+PND_CERTIFICATE_FIELDS = [
+	"name", "supplier_name", "supplier_tax_id", "income_type", "tax_month",
+	"income_description", "tax_base_amount", "wht_rate", "wht_amount",
+	"custom_pnd_form", "supplier_type_classification"
+]
+
+
+PND_ITEMS_DOCTYPES = {
+	"PND1 Form": "PND1 Items",
+	"PND3 Form": "PND3 Items",
+	"PND53 Form": "PND53 Items",
+	"PND54 Form": "PND54 Items",
+}
+
+# (name field, tax id field) of the certificate's supplier in each PND Items doctype
+PND_ITEM_PARTY_FIELDS = {
+	"PND1 Items": ("employee_name", "employee_tax_id"),
+	"PND3 Items": ("supplier_name", "supplier_tax_id"),
+	"PND53 Items": ("company_name", "company_tax_id"),
+	"PND54 Items": ("overseas_entity_name", None),
+}
 
 
 class WithholdingTaxCertificate(Document):
-	def after_insert(self):
-		"""Auto-create PND form item entry when certificate is created"""
-		self.create_or_update_pnd_form_item()
+	def validate(self):
+		"""Keep the normalised period / classification columns used by PND form queries in sync"""
+		self.tax_month_no = get_tax_month_no(self.tax_month)
+		self.pnd_classification = get_pnd_classification(self.supplier_type_classification)
 
 	def on_submit(self):
-		"""Update PND form item and status when certificate is submitted"""
+		"""Update status and add the certificate to the PND form of its tax period"""
 		# Update status from Draft to Issued (persist to database)
 		self.db_set("status", "Issued")
 
-		# Update PND form item
-		self.create_or_update_pnd_form_item(update_only=True)
+		self.add_to_pnd_form()
 
 	def on_cancel(self):
-		"""Remove PND form item when certificate is cancelled"""
-		self.remove_pnd_form_item()
+		"""Remove the certificate from its PND form"""
+		self.remove_from_pnd_form()
 
-	def create_or_update_pnd_form_item(self, update_only=False):
+	def add_to_pnd_form(self):
 		"""
-		Create or update appropriate PND Items child table entry based on PND form type.
-		This enables accounting automation where PND forms are pre-populated and ready for review.
+		Insert or update this certificate's row in the draft PND form of its tax period
+		and adjust the form totals by the difference. Only the single row is written, the
+		PND form itself is not re-saved (saving repopulates the whole month), so
+		`refresh_certificates` on the form stays the repair path.
 		"""
-		if not self.pnd_form_type:
+		pnd_form_doctype = self.pnd_form_type
+		pnd_items_doctype = PND_ITEMS_DOCTYPES.get(pnd_form_doctype)
+		if not pnd_items_doctype:
+			if pnd_form_doctype:
+				frappe.log_error(f"Unknown PND form type: {pnd_form_doctype}", "WHT Certificate")
 			return
 
-		# Determine the PND form and items doctype based on form type
-		pnd_form_mapping = {
-			"PND1 Form": ("PND1 Form", "PND1 Items"),
-			"PND3 Form": ("PND3 Form", "PND3 Items"),
-			"PND53 Form": ("PND53 Form", "PND53 Items"),
-			"PND54 Form": ("PND54 Form", "PND54 Items")
-		}
-
-		if self.pnd_form_type not in pnd_form_mapping:
-			frappe.log_error(f"Unknown PND form type: {self.pnd_form_type}", "WHT Certificate")
-			return
-
-		pnd_form_doctype, pnd_items_doctype = pnd_form_mapping[self.pnd_form_type]
-
-		# Get or create the PND form for this tax period
 		pnd_form = self.get_or_create_pnd_form(pnd_form_doctype)
 		if not pnd_form:
 			return
 
-		# Check if item already exists
-		existing_item = frappe.db.exists(pnd_items_doctype, {
-			"parent": pnd_form.name,
-			"withholding_tax_cert": self.name
-		})
+		values = self.get_pnd_item_values(pnd_items_doctype)
+		existing_item = frappe.db.get_value(
+			pnd_items_doctype,
+			{"parent": pnd_form, "parenttype": pnd_form_doctype, "withholding_tax_cert": self.name},
+			["name", "gross_amount", "tax_amount"],
+			as_dict=True,
+		)
 
-		if existing_item and not update_only:
-			return  # Item already exists, no need to recreate
+		if existing_item:
+			frappe.db.set_value(pnd_items_doctype, existing_item.name, values, update_modified=False)
+			update_pnd_form_totals(
+				pnd_form_doctype,
+				pnd_form,
+				gross_amount=flt(values["gross_amount"]) - flt(existing_item.gross_amount),
+				tax_amount=flt(values["tax_amount"]) - flt(existing_item.tax_amount),
+			)
+		else:
+			self.insert_pnd_item(pnd_form_doctype, pnd_form, pnd_items_doctype, values)
+			update_pnd_form_totals(
+				pnd_form_doctype,
+				pnd_form,
+				count=1,
+				gross_amount=values["gross_amount"],
+				tax_amount=values["tax_amount"],
+			)
+
+			frappe.msgprint(
+				f"Added WHT Certificate to {pnd_form_doctype} items",
+				alert=True,
+				indicator="green"
+			)
 
-		if existing_item and update_only:
-			# Update existing item
-			self.update_pnd_item(pnd_items_doctype, existing_item)
-		elif not update_only:
-			# Create new item
-			self.create_pnd_item(pnd_form, pnd_items_doctype)
+		# Link this certificate to the PND form
+		self.db_set("custom_pnd_form", pnd_form, update_modified=False)
 
 	def get_or_create_pnd_form(self, pnd_form_doctype):
-		"""Get existing PND form for the tax period or create a new one in draft"""
-		# Extract year and month from tax fields
+		"""Name of the draft PND form for the tax period, created if there is none"""
 		tax_year = self.tax_year
-		tax_month = self.tax_month.split(" - ")[0] if self.tax_month else None
-
-		# Remove leading zero from month (convert "09" to "9")
-		if tax_month:
-			tax_month = str(int(tax_month))
+		tax_month = get_tax_month_no(self.tax_month)
 
 		if not tax_year or not tax_month:
 			frappe.log_error(f"Missing tax period for WHT Certificate {self.name}", "WHT Certificate")
 			return None
 
 		# Check if PND form already exists for this period
-		existing_forms = frappe.get_all(
+		existing_form = frappe.db.get_value(
 			pnd_form_doctype,
-			filters={
+			{
 				"tax_period_year": tax_year,
 				"tax_period_month": tax_month,
 				"docstatus": 0  # Draft only
 			},
-			limit=1
 		)
+		if existing_form:
+			return existing_form
 
-		if existing_forms:
-			return frappe.get_doc(pnd_form_doctype, existing_forms[0].name)
-
-		# Create new PND form in draft
+		# Create new PND form in draft, inserting it populates the period's certificates
 		pnd_form = frappe.new_doc(pnd_form_doctype)
 		pnd_form.tax_period_year = tax_year
 		pnd_form.tax_period_month = tax_month
 		pnd_form.company = self.company
 		pnd_form.submission_status = "Draft"
-
-		# Set form-specific fields
-		if pnd_form_doctype == "PND53 Form":
-			pnd_form.form_number = f"PND53-{tax_year}-{tax_month}-DRAFT"
-		elif pnd_form_doctype == "PND3 Form":
-			pnd_form.form_number = f"PND3-{tax_year}-{tax_month}-DRAFT"
-		elif pnd_form_doctype == "PND1 Form":
-			pnd_form.form_number = f"PND1-{tax_year}-{tax_month}-DRAFT"
-		elif pnd_form_doctype == "PND54 Form":
-			pnd_form.form_number = f"PND54-{tax_year}-{tax_month}-DRAFT"
-
+		pnd_form.form_number = f"{pnd_form_doctype.replace(' Form', '')}-{tax_year}-{tax_month}-DRAFT"
 		pnd_form.insert(ignore_permissions=True)
 
 		frappe.msgprint(
@@ -119,126 +143,171 @@ class WithholdingTaxCertificate(Document):
 			indicator="blue"
 		)
 
-		return pnd_form
-
-	def create_pnd_item(self, pnd_form, pnd_items_doctype):
-		"""Create new PND item entry"""
-		# Get the next sequence number
-		existing_items = frappe.get_all(
+		return pnd_form.name
+
+	def get_pnd_item_values(self, pnd_items_doctype):
+		"""PND Items row values for this certificate"""
+		name_field, tax_id_field = PND_ITEM_PARTY_FIELDS[pnd_items_doctype]
+		values = {
+			name_field: self.supplier_name,
+			"income_type": self.income_type,
+			"income_description": self.income_description,
+			"gross_amount": flt(self.tax_base_amount),
+			"wht_rate": self.wht_rate,
+			"tax_amount": flt(self.wht_amount),
+		}
+		if tax_id_field:
+			values[tax_id_field] = self.supplier_tax_id
+		return values
+
+	def insert_pnd_item(self, pnd_form_doctype, pnd_form, pnd_items_doctype, values):
+		"""Append a PND Items row to `pnd_form` after its last row"""
+		# lock the form first, concurrent submits would otherwise read the same last row
+		frappe.db.get_value(pnd_form_doctype, pnd_form, "name", for_update=True)
+		last_item = frappe.get_all(
 			pnd_items_doctype,
-			filters={"parent": pnd_form.name},
-			fields=["sequence_number"],
-			order_by="sequence_number desc",
+			filters={"parent": pnd_form, "parenttype": pnd_form_doctype},
+			fields=["idx", "sequence_number"],
+			order_by="idx desc",
 			limit=1
 		)
+		last_idx = last_item[0].idx if last_item else 0
+		last_sequence = (last_item[0].sequence_number or 0) if last_item else 0
 
-		next_sequence = 1
-		if existing_items:
-			next_sequence = (existing_items[0].sequence_number or 0) + 1
-
-		# Create the item
 		pnd_item = frappe.new_doc(pnd_items_doctype)
-		pnd_item.parent = pnd_form.name
-		pnd_item.parenttype = pnd_form.doctype
-		pnd_item.parentfield = "items"
-		pnd_item.sequence_number = next_sequence
-		pnd_item.withholding_tax_cert = self.name
-
-		# Set common fields based on the specific PND Items doctype
-		if pnd_items_doctype == "PND53 Items":
-			pnd_item.company_name = self.supplier_name
-			pnd_item.company_tax_id = self.supplier_tax_id
-		elif pnd_items_doctype == "PND3 Items":
-			# PND3 uses supplier_name field
-			pnd_item.supplier_name = self.supplier_name
-			pnd_item.supplier_tax_id = self.supplier_tax_id
-		else:
-			# For PND1, PND54 - check their field names
-			# Using supplier_name as default fallback
-			if hasattr(pnd_item, 'person_name'):
-				pnd_item.person_name = self.supplier_name
-				pnd_item.person_tax_id = self.supplier_tax_id
-			else:
-				pnd_item.supplier_name = self.supplier_name
-				pnd_item.supplier_tax_id = self.supplier_tax_id
-
-		pnd_item.income_type = self.income_type
-		pnd_item.income_description = self.income_description
-		pnd_item.gross_amount = self.tax_base_amount
-		pnd_item.wht_rate = self.wht_rate
-		pnd_item.tax_amount = self.wht_amount
-
-		pnd_item.insert(ignore_permissions=True)
-
-		# Update PND form totals
-		pnd_form.reload()
-		if hasattr(pnd_form, 'calculate_totals'):
-			pnd_form.calculate_totals()
-			pnd_form.save(ignore_permissions=True)
-
-		# Link this certificate to the PND form
-		self.custom_pnd_form = pnd_form.name
-		self.save(ignore_permissions=True)
-
-		frappe.msgprint(
-			f"Added WHT Certificate to {pnd_form.doctype} items",
-			alert=True,
-			indicator="green"
-		)
-
-	def update_pnd_item(self, pnd_items_doctype, item_name):
-		"""Update existing PND item with latest certificate data"""
-		pnd_item = frappe.get_doc(pnd_items_doctype, item_name)
-
-		# Update amounts and rates
-		pnd_item.gross_amount = self.tax_base_amount
-		pnd_item.wht_rate = self.wht_rate
-		pnd_item.tax_amount = self.wht_amount
-		pnd_item.income_type = self.income_type
-		pnd_item.income_description = self.income_description
-
-		pnd_item.save(ignore_permissions=True)
-
-		# Update parent form totals
-		parent_form = frappe.get_doc(pnd_item.parenttype, pnd_item.parent)
-		if hasattr(parent_form, 'calculate_totals'):
-			parent_form.calculate_totals()
-			parent_form.save(ignore_permissions=True)
-
-	def remove_pnd_form_item(self):
-		"""Remove PND form item when certificate is cancelled"""
-		if not self.custom_pnd_form or not self.pnd_form_type:
-			return
-
-		pnd_form_mapping = {
-			"PND1 Form": "PND1 Items",
-			"PND3 Form": "PND3 Items",
-			"PND53 Form": "PND53 Items",
-			"PND54 Form": "PND54 Items"
-		}
+		pnd_item.update(values)
+		pnd_item.update({
+			"parent": pnd_form,
+			"parenttype": pnd_form_doctype,
+			"parentfield": "items",
+			"idx": last_idx + 1,
+			"sequence_number": last_sequence + 1,
+			"withholding_tax_cert": self.name,
+		})
+		pnd_item.db_insert()
 
-		if self.pnd_form_type not in pnd_form_mapping:
+	def remove_from_pnd_form(self):
+		"""Delete this certificate's PND form rows and subtract them from the form totals"""
+		pnd_form_doctype = self.pnd_form_type
+		pnd_items_doctype = PND_ITEMS_DOCTYPES.get(pnd_form_doctype)
+		if not self.custom_pnd_form or not pnd_items_doctype:
 			return
 
-		pnd_items_doctype = pnd_form_mapping[self.pnd_form_type]
-
-		# Find and delete the item
-		items_to_delete = frappe.get_all(
+		items = frappe.get_all(
 			pnd_items_doctype,
-			filters={
-				"withholding_tax_cert": self.name
-			}
+			filters={"parenttype": pnd_form_doctype, "withholding_tax_cert": self.name},
+			fields=["name", "parent", "gross_amount", "tax_amount"],
 		)
 
-		for item in items_to_delete:
-			frappe.delete_doc(pnd_items_doctype, item.name, ignore_permissions=True)
+		for item in items:
+			frappe.db.delete(pnd_items_doctype, {"name": item.name})
+			update_pnd_form_totals(
+				pnd_form_doctype,
+				item.parent,
+				count=-1,
+				gross_amount=-flt(item.gross_amount),
+				tax_amount=-flt(item.tax_amount),
+			)
 
 		# Clear the PND form link
-		self.custom_pnd_form = ""
-		self.save(ignore_permissions=True)
-
-		frappe.msgprint(
-			f"Removed WHT Certificate from PND form items",
-			alert=True,
-			indicator="orange"
-		)
+		self.db_set("custom_pnd_form", "", update_modified=False)
+
+		if items:
+			frappe.msgprint(
+				f"Removed WHT Certificate from PND form items",
+				alert=True,
+				indicator="orange"
+			)
+
+def on_doctype_update():
+	frappe.db.add_index(
+		"Withholding Tax Certificate", ["pnd_form_type", "tax_year", "tax_month_no", "status"]
+	)
+
+
+def set_pnd_form_link(certificate_names, pnd_form, chunk_size=PND_LINK_CHUNK_SIZE):
+	"""
+	Set custom_pnd_form of the given certificates with one UPDATE ... WHERE name IN per
+	chunk. Runs in the caller's transaction, nothing is committed here.
+	"""
+	certificate_names = list(dict.fromkeys(name for name in certificate_names if name))
+	if not certificate_names:
+		return
+
+	certificate = frappe.qb.DocType("Withholding Tax Certificate")
+	modified = now_datetime()
+	for start in range(0, len(certificate_names), chunk_size):
+		(
+			frappe.qb.update(certificate)
+			.set(certificate.custom_pnd_form, pnd_form or "")
+			.set(certificate.modified, modified)
+			.where(certificate.name.isin(certificate_names[start : start + chunk_size]))
+		).run()
+
+
+def update_pnd_form_totals(pnd_form_doctype, pnd_form, count=0, gross_amount=0, tax_amount=0):
+	"""Adjust the summary totals of a PND form by a row delta, without recalculating all rows"""
+	totals = frappe.db.get_value(
+		pnd_form_doctype,
+		pnd_form,
+		["total_certificates", "total_gross_amount", "total_tax_amount"],
+		as_dict=True,
+		for_update=True,
+	)
+	if not totals:
+		return
+
+	total_gross_amount = flt(totals.total_gross_amount) + flt(gross_amount)
+	total_tax_amount = flt(totals.total_tax_amount) + flt(tax_amount)
+	frappe.db.set_value(
+		pnd_form_doctype,
+		pnd_form,
+		{
+			"total_certificates": max(cint(totals.total_certificates) + cint(count), 0),
+			"total_gross_amount": total_gross_amount,
+			"total_tax_amount": total_tax_amount,
+			"average_tax_rate": (total_tax_amount / total_gross_amount) * 100 if total_gross_amount > 0 else 0,
+		},
+	)
+
+
+def get_tax_month_no(tax_month):
+	"""Month number of a tax month ("09 - กันยายน (September)" or "9" -> 9), 0 if unset"""
+	if not tax_month:
+		return 0
+	return cint(str(tax_month).split(" - ")[0].strip())
+
+
+def get_pnd_classification(supplier_type_classification):
+	"""Normalised classification ("Juristic Person" / "Individual") of a supplier type"""
+	classification = supplier_type_classification or ""
+	for pnd_classification, keywords in PND_CLASSIFICATION_KEYWORDS.items():
+		if any(keyword in classification for keyword in keywords):
+			return pnd_classification
+	return ""
+
+
+def get_pnd_certificates(pnd_form_type, tax_year, tax_month, pnd_classification, pnd_form=None):
+	"""
+	Issued certificates of a tax period for a PND form, filtered in the query on the
+	(pnd_form_type, tax_year, tax_month_no, status) index. Certificates already assigned
+	to another PND form are left out.
+	"""
+	or_filters = [["custom_pnd_form", "is", "not set"]]
+	if pnd_form:
+		or_filters.append(["custom_pnd_form", "=", pnd_form])
+
+	return frappe.get_all(
+		"Withholding Tax Certificate",
+		filters={
+			"pnd_form_type": pnd_form_type,
+			"tax_year": tax_year,
+			"tax_month_no": get_tax_month_no(tax_month),
+			"status": "Issued",
+			"docstatus": 1,
+			"pnd_classification": pnd_classification,
+		},
+		or_filters=or_filters,
+		fields=PND_CERTIFICATE_FIELDS,
+		order_by="certificate_date asc",
+	)
@@ -1,4 +1,6 @@
+import json
 import re
+from functools import lru_cache
 from typing import Literal
 
 import frappe
@@ -10,43 +12,17 @@ from frappe import _
 @frappe.whitelist()
 def get_signature_image(signature_name):
     """Get signature image URL from Digital Signature doctype"""
-    if not signature_name:
-        return None
+    from print_designer.utils.signature_stamp import get_signature_image
 
-    try:
-        signature_doc = frappe.get_doc("Digital Signature", signature_name)
-        if signature_doc.is_active and signature_doc.signature_image:
-            return {
-                "image_url": signature_doc.signature_image,
-                "title": signature_doc.title,
-                "description": signature_doc.description,
-            }
-    except frappe.DoesNotExistError:
-        frappe.log_error(f"Digital Signature {signature_name} not found")
-
-    return None
+    return get_signature_image(signature_name)
 
 
 @frappe.whitelist()
 def get_company_stamp_image(stamp_name):
     """Get company stamp image URL from Company Stamp doctype"""
-    if not stamp_name:
-        return None
-
-    try:
-        stamp_doc = frappe.get_doc("Company Stamp", stamp_name)
-        if stamp_doc.is_active and stamp_doc.stamp_image:
-            return {
-                "image_url": stamp_doc.stamp_image,
-                "title": stamp_doc.title,
-                "description": stamp_doc.description,
-                "stamp_type": stamp_doc.stamp_type,
-                "company": stamp_doc.company,
-            }
-    except frappe.DoesNotExistError:
-        frappe.log_error(f"Company Stamp {stamp_name} not found")
+    from print_designer.utils.signature_stamp import get_company_stamp_image
 
-    return None
+    return get_company_stamp_image(stamp_name)
 
 
 @frappe.whitelist()
@@ -337,27 +313,128 @@ def get_watermark_docfields():
     return watermark_related_fields
 
 
-@frappe.whitelist()
-def convert_css(css_obj):
+# convert_css is called for every element and several times per table cell, while a
+# print format only has a handful of distinct style objects. Interned results are keyed
+# by the style items, so identical dicts coming from different rows share one string.
+_CSS_CACHE = {}
+_CSS_CACHE_MAX_SIZE = 4096
+
+
+@lru_cache(maxsize=512)
+def _to_kebab_case(property_name):
+    return "".join(["-" + i.lower() if i.isupper() else i for i in property_name]).lstrip("-")
+
+
+def _build_css(css_obj):
     string_css = ""
     if css_obj:
-        for item in css_obj.items():
+        for key, value in css_obj.items():
             string_css += (
-                "".join(
-                    ["-" + i.lower() if i.isupper() else i for i in item[0]]
-                ).lstrip("-")
+                _to_kebab_case(key)
                 + ":"
-                + str(
-                    item[1]
-                    if item[1] != "" or item[0] != "backgroundColor"
-                    else "transparent"
-                )
+                + str(value if value != "" or key != "backgroundColor" else "transparent")
                 + "!important;"
             )
     string_css += "user-select: all;"
     return string_css
 
 
+@frappe.whitelist()
+def convert_css(css_obj):
+    if not css_obj:
+        return _build_css(css_obj)
+
+    try:
+        cache_key = tuple(css_obj.items())
+        string_css = _CSS_CACHE.get(cache_key)
+    except (AttributeError, TypeError):
+        # unhashable style values (or a non mapping) are rare, just build them every time
+        return _build_css(css_obj)
+
+    if string_css is None:
+        string_css = _build_css(css_obj)
+        if len(_CSS_CACHE) >= _CSS_CACHE_MAX_SIZE:
+            _CSS_CACHE.clear()
+        _CSS_CACHE[cache_key] = string_css
+    return string_css
+
+
+class CSSClassRegistry:
+    """
+    Collects inline style strings while a print format renders and hands out a generated
+    class name for each distinct one, so that repeated styles (mostly table cells) are
+    written once in a <style> block instead of on every element.
+
+    Enabled with `hoistStyles` in print designer settings or `print_designer_hoist_styles`
+    in site config. Rules are scoped under `.printTable` and every declaration is marked
+    !important, so that they keep winning over stylesheet rules like the inline styles did.
+    """
+
+    def __init__(self, prefix="pd-s"):
+        self.prefix = prefix
+        self.classes = {}
+
+    def hoist(self, style):
+        style = str(style).strip()
+        if not style:
+            return ""
+        class_name = self.classes.get(style)
+        if not class_name:
+            class_name = f"{self.prefix}{len(self.classes)}"
+            self.classes[style] = class_name
+        return class_name
+
+    def render(self):
+        if not self.classes:
+            return ""
+        rules = "\n".join(
+            f".printTable .{class_name} {{ {_important_declarations(style)} }}"
+            for style, class_name in self.classes.items()
+        )
+        return f'<style id="pd-hoisted-styles">\n{rules}\n</style>'
+
+
+def _important_declarations(style):
+    """`style` with !important added to the declarations that don't have it"""
+    declarations = []
+    for declaration in _split_declarations(style):
+        declaration = declaration.strip()
+        if not declaration:
+            continue
+        if ":" in declaration and not declaration.replace(" ", "").lower().endswith("!important"):
+            declaration += " !important"
+        declarations.append(declaration)
+    return ";".join(declarations) + ";" if declarations else ""
+
+
+def _split_declarations(style):
+    """Split an inline style on `;`, except inside quotes and parentheses (data uris)"""
+    declarations = []
+    start = depth = 0
+    quote = None
+    for index, char in enumerate(style):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif char == ";" and not depth:
+            declarations.append(style[start:index])
+            start = index + 1
+    declarations.append(style[start:])
+    return declarations
+
+
+def get_css_class_registry(settings=None):
+    if (settings or {}).get("hoistStyles") or frappe.conf.get("print_designer_hoist_styles"):
+        return CSSClassRegistry()
+    return None
+
+
 def parse_float_and_unit(input_text, default_unit="px"):
     if isinstance(input_text, (int, float)):
         return {"value": input_text, "unit": default_unit}
@@ -438,17 +515,8 @@ def get_barcode(
     height=None,
     png_base64=False,
 ):
-    if not options:
-        options = {}
-
-    options = frappe.parse_json(options)
-
     if isinstance(barcode_value, str) and barcode_value.startswith("<svg"):
-        import re
-
-        barcode_value = re.search(r'data-barcode-value="(.*?)">', barcode_value).group(
-            1
-        )
+        barcode_value = re.search(r'data-barcode-value="(.*?)">', barcode_value).group(1)
 
     if barcode_value == "":
         fallback_html_string = """
@@ -460,17 +528,64 @@ def get_barcode(
 		"""
         return {"type": "svg", "value": fallback_html_string}
 
+    result = _get_cached_barcode(
+        barcode_format,
+        barcode_value,
+        _get_options_key(options),
+        width,
+        height,
+        bool(png_base64),
+    )
+    # copy so that callers (jinja / client) can't modify the cached result
+    return result.copy() if isinstance(result, dict) else result
+
+
+@frappe.whitelist()
+def get_barcodes(
+    barcode_format,
+    barcode_values,
+    options=None,
+    width=None,
+    height=None,
+    png_base64=False,
+):
+    """
+    Encode many values with the same format and options in one call ( labels, stock entries ).
+    Returns results in the same order as barcode_values.
+    """
+    barcode_values = frappe.parse_json(barcode_values) or []
+    return [
+        get_barcode(barcode_format, value, options, width, height, png_base64)
+        for value in barcode_values
+    ]
+
+
+def _get_options_key(options):
+    """Options come as dict from jinja and as json from client, normalise to a hashable key."""
+    options = frappe.parse_json(options) if options else {}
+    return json.dumps(options or {}, sort_keys=True, default=str)
+
+
+# Same value is printed on every copy, reprint and often on every row of a table.
+# Keyed by (format, value, options, width, height, png flag).
+@lru_cache(maxsize=2048)
+def _get_cached_barcode(barcode_format, barcode_value, options_key, width, height, png_base64):
+    options = json.loads(options_key)
     if barcode_format == "qrcode":
-        return get_qrcode(barcode_value, options, png_base64)
+        return _generate_qrcode(barcode_value, options, png_base64)
+    return _generate_barcode(barcode_format, barcode_value, options, width, height, png_base64)
 
-    from io import BytesIO
 
-    import barcode
-    from barcode.writer import ImageWriter, SVGWriter
+@lru_cache(maxsize=1)
+def _get_svg_writer_class():
+    # created once per process instead of on every barcode
+    from barcode.writer import SVGWriter
 
     class PDSVGWriter(SVGWriter):
-        def __init__(self):
+        def __init__(self, width=None, height=None):
             SVGWriter.__init__(self)
+            self.pd_width = width
+            self.pd_height = height
 
         def calculate_viewbox(self, code):
             vw, vh = self.calculate_size(len(code[0]), len(code))
@@ -479,26 +594,33 @@ def get_barcode(
         def _init(self, code):
             SVGWriter._init(self, code)
             vw, vh = self.calculate_viewbox(code)
-            if not width:
+            if not self.pd_width:
                 self._root.removeAttribute("width")
             else:
-                self._root.setAttribute("width", f"{width * 3.7795275591}")
-            if not height:
+                self._root.setAttribute("width", f"{self.pd_width * 3.7795275591}")
+            if not self.pd_height:
                 self._root.removeAttribute("height")
             else:
-                self._root.setAttribute("height", height)
+                self._root.setAttribute("height", self.pd_height)
+
+            self._root.setAttribute("viewBox", f"0 0 {vw * 3.7795275591} {vh * 3.7795275591}")
+
+    return PDSVGWriter
 
-            self._root.setAttribute(
-                "viewBox", f"0 0 {vw * 3.7795275591} {vh * 3.7795275591}"
-            )
+
+def _generate_barcode(barcode_format, barcode_value, options, width, height, png_base64):
+    from io import BytesIO
+
+    import barcode
+    from barcode.writer import ImageWriter
 
     if barcode_format not in barcode.PROVIDED_BARCODES:
         return f"Barcode format {barcode_format} not supported. Valid formats are: {barcode.PROVIDED_BARCODES}"
-    writer = ImageWriter() if png_base64 else PDSVGWriter()
+    writer = ImageWriter() if png_base64 else _get_svg_writer_class()(width, height)
     barcode_class = barcode.get_barcode_class(barcode_format)
 
     try:
-        barcode = barcode_class(barcode_value, writer)
+        barcode_obj = barcode_class(barcode_value, writer)
     except Exception:
         frappe.msgprint(
             f"Invalid barcode value <b>{barcode_value}</b> for format <b>{barcode_format}</b>",
@@ -508,27 +630,32 @@ def get_barcode(
         )
 
     stream = BytesIO()
-    barcode.write(stream, options)
-    barcode_value = stream.getvalue().decode("utf-8")
+    barcode_obj.write(stream, options)
+    barcode_value = stream.getvalue()
     stream.close()
 
     if png_base64:
         import base64
 
-        barcode_value = base64.b64encode(barcode_value)
+        barcode_value = base64.b64encode(barcode_value).decode("utf-8")
+    else:
+        barcode_value = barcode_value.decode("utf-8")
 
     return {"type": "png_base64" if png_base64 else "svg", "value": barcode_value}
 
 
 def get_qrcode(barcode_value, options=None, png_base64=False):
+    result = _get_cached_barcode(
+        "qrcode", barcode_value, _get_options_key(options), None, None, bool(png_base64)
+    )
+    return result.copy()
+
+
+def _generate_qrcode(barcode_value, options, png_base64=False):
     from io import BytesIO
 
     import pyqrcode
 
-    if not options:
-        options = {}
-
-    options = frappe.parse_json(options)
     options = {
         "scale": options.get("scale", 5),
         "module_color": options.get("module_color", "#000000"),
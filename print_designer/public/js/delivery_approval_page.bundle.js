@@ -0,0 +1,474 @@
+// Guest delivery approval page (www/delivery-approval.html).
+// Kept out of the page so the browser caches it across approval links.
+
+let signaturePad;
+let deliveryNoteId;
+let approvalToken;
+let deliveryData;
+
+// Initialize on page load
+document.addEventListener('DOMContentLoaded', function() {
+	// Get parameters from URL query string
+	const urlParams = new URLSearchParams(window.location.search);
+	deliveryNoteId = urlParams.get('dn');
+	approvalToken = urlParams.get('token');
+
+	// Check if we have a valid delivery note ID and token
+	if (!deliveryNoteId || !approvalToken) {
+		showNoDeliveryNote();
+		return;
+	}
+	document.title = `Delivery Approval - ${deliveryNoteId}`;
+
+	// Load delivery information (signature pad initialized after content is visible)
+	loadDeliveryInfo();
+});
+
+function initSignaturePad() {
+	const canvas = document.getElementById('signature-pad');
+	if (!canvas) return;
+
+	// Handle canvas resize - must set dimensions before creating SignaturePad
+	function resizeCanvas() {
+		const ratio = Math.max(window.devicePixelRatio || 1, 1);
+		const width = canvas.offsetWidth;
+		const height = canvas.offsetHeight;
+
+		// Only resize if canvas has dimensions
+		if (width > 0 && height > 0) {
+			canvas.width = width * ratio;
+			canvas.height = height * ratio;
+			canvas.getContext("2d").scale(ratio, ratio);
+
+			// Clear signature pad if it exists
+			if (signaturePad) {
+				signaturePad.clear();
+			}
+		}
+	}
+
+	// Set canvas dimensions first
+	resizeCanvas();
+
+	// Create SignaturePad instance
+	signaturePad = new SignaturePad(canvas, {
+		backgroundColor: 'rgba(248, 249, 250, 0.8)',
+		penColor: 'rgb(0, 0, 0)',
+		velocityFilterWeight: 0.7,
+		minWidth: 0.5,
+		maxWidth: 2.5,
+		throttle: 16,
+		minDistance: 5
+	});
+
+	window.addEventListener("resize", resizeCanvas);
+}
+
+async function loadDeliveryInfo() {
+	try {
+		// Use Frappe's REST API
+		// Status and delivery note details of the approval token, served from the token cache
+		const params = new URLSearchParams({ delivery_note_name: deliveryNoteId, token: approvalToken });
+		const response = await fetch(`/api/method/print_designer.custom.delivery_note_qr.get_delivery_status?${params}`);
+		const data = await response.json();
+
+		if (data.message) {
+			deliveryData = data.message;
+			deliveryData.fullDetails = data.message.full_details;
+			displayDeliveryInfo();
+			updateApprovalStatus();
+		} else {
+			showAlert('danger', 'Delivery note not found or access denied');
+		}
+	} catch (error) {
+		console.error('Error loading delivery info:', error);
+		showAlert('danger', 'Error loading delivery information. Please try again.');
+	} finally {
+		document.getElementById('loading-section').style.display = 'none';
+		document.getElementById('main-content').style.display = 'block';
+
+		// Initialize signature pad AFTER content is visible
+		// Use setTimeout to ensure DOM has finished rendering
+		setTimeout(() => {
+			initSignaturePad();
+		}, 100);
+	}
+}
+
+function displayDeliveryInfo() {
+	const details = deliveryData.fullDetails;
+
+	// Basic delivery information
+	const deliveryDetailsHtml = `
+		<div class="row g-3">
+			<div class="col-md-6">
+				<div class="d-flex justify-content-between">
+					<strong class="text-muted">Delivery Note:</strong>
+					<span class="fw-bold">${details.name}</span>
+				</div>
+			</div>
+			<div class="col-md-6">
+				<div class="d-flex justify-content-between">
+					<strong class="text-muted">Date:</strong>
+					<span>${new Date(details.posting_date).toLocaleDateString()}</span>
+				</div>
+			</div>
+			<div class="col-md-6">
+				<div class="d-flex justify-content-between">
+					<strong class="text-muted">Customer:</strong>
+					<span>${details.customer_name}</span>
+				</div>
+			</div>
+			<div class="col-md-6">
+				<div class="d-flex justify-content-between">
+					<strong class="text-muted">Total Items:</strong>
+					<span class="badge bg-primary">${details.items?.length || 0}</span>
+				</div>
+			</div>
+			<div class="col-12">
+				<div class="d-flex justify-content-between">
+					<strong class="text-muted">Delivery Address:</strong>
+					<span class="text-end">${details.shipping_address_name || details.customer_address || 'Not specified'}</span>
+				</div>
+			</div>
+		</div>
+	`;
+
+	document.getElementById('delivery-details').innerHTML = deliveryDetailsHtml;
+
+	// Items table
+	if (details.items && details.items.length > 0) {
+		const itemsHtml = `
+			<div class="table-responsive">
+				<table class="table table-hover">
+					<thead class="table-light">
+						<tr>
+							<th><i class="fas fa-barcode me-1"></i>Item Code</th>
+							<th><i class="fas fa-info-circle me-1"></i>Description</th>
+							<th class="text-center"><i class="fas fa-sort-numeric-up me-1"></i>Qty</th>
+							<th class="text-center"><i class="fas fa-balance-scale me-1"></i>UOM</th>
+							<th class="text-end"><i class="fas fa-dollar-sign me-1"></i>Rate</th>
+							<th class="text-end"><i class="fas fa-calculator me-1"></i>Amount</th>
+						</tr>
+					</thead>
+					<tbody>
+						${details.items.map(item => `
+							<tr>
+								<td class="fw-bold">${item.item_code}</td>
+								<td>${item.description || item.item_name}</td>
+								<td class="text-center">${item.qty}</td>
+								<td class="text-center">${item.uom}</td>
+								<td class="text-end">${item.rate ? parseFloat(item.rate).toFixed(2) : '0.00'}</td>
+								<td class="text-end fw-bold">${item.amount ? parseFloat(item.amount).toFixed(2) : '0.00'}</td>
+							</tr>
+						`).join('')}
+					</tbody>
+					<tfoot class="table-light">
+						<tr>
+							<th colspan="5" class="text-end">Total Amount:</th>
+							<th class="text-end text-primary fs-5">${details.grand_total ? parseFloat(details.grand_total).toFixed(2) : '0.00'}</th>
+						</tr>
+					</tfoot>
+				</table>
+			</div>
+		`;
+		document.getElementById('items-container').innerHTML = itemsHtml;
+	}
+}
+
+function updateApprovalStatus() {
+	const statusElement = document.getElementById('current-status');
+	const approveBtn = document.getElementById('approve-btn');
+	const rejectBtn = document.getElementById('reject-btn');
+	const approvalSection = document.getElementById('approval-section');
+	const completionSection = document.getElementById('completion-section');
+
+	if (deliveryData.status === 'Approved') {
+		statusElement.innerHTML = `
+			<span class="badge bg-success fs-6 px-3 py-2">
+				<i class="fas fa-check-circle me-1"></i>
+				Approved
+			</span>
+		`;
+		approvalSection.style.display = 'none';
+		completionSection.style.display = 'block';
+
+		const completionHtml = `
+			<div class="row g-3">
+				<div class="col-md-6">
+					<strong>Approved Date:</strong><br>
+					<span class="text-muted">${deliveryData.approval_date ? new Date(deliveryData.approval_date).toLocaleString() : 'Not recorded'}</span>
+				</div>
+				<div class="col-md-6">
+					<strong>Approved By:</strong><br>
+					<span class="text-muted">${deliveryData.approved_by || 'System'}</span>
+				</div>
+				${deliveryData.has_signature ? '<div class="col-12"><small class="text-success"><i class="fas fa-signature me-1"></i>Digital signature captured</small></div>' : ''}
+			</div>
+		`;
+		document.getElementById('completion-details').innerHTML = completionHtml;
+
+	} else if (deliveryData.status === 'Rejected') {
+		statusElement.innerHTML = `
+			<span class="badge bg-danger fs-6 px-3 py-2">
+				<i class="fas fa-times-circle me-1"></i>
+				Rejected
+			</span>
+		`;
+		approvalSection.style.display = 'none';
+		completionSection.style.display = 'block';
+
+		const completionHtml = `
+			<div class="row g-3">
+				<div class="col-md-6">
+					<strong>Rejected Date:</strong><br>
+					<span class="text-muted">${deliveryData.approval_date ? new Date(deliveryData.approval_date).toLocaleString() : 'Not recorded'}</span>
+				</div>
+				<div class="col-md-6">
+					<strong>Rejected By:</strong><br>
+					<span class="text-muted">${deliveryData.approved_by || 'System'}</span>
+				</div>
+				${deliveryData.rejection_reason ? `<div class="col-12"><strong>Reason:</strong><br><span class="text-muted">${deliveryData.rejection_reason}</span></div>` : ''}
+			</div>
+		`;
+		document.getElementById('completion-details').innerHTML = completionHtml;
+	}
+}
+
+function clearSignature() {
+	if (signaturePad) {
+		signaturePad.clear();
+	}
+}
+
+// Modal instances
+let approvalModal;
+let rejectionModal;
+
+// Initialize modals and bind the buttons after DOM is ready.
+// The bundle is wrapped in a closure, so its functions can't be used from inline onclick attributes.
+document.addEventListener('DOMContentLoaded', function() {
+	approvalModal = new bootstrap.Modal(document.getElementById('approvalModal'));
+	rejectionModal = new bootstrap.Modal(document.getElementById('rejectionModal'));
+
+	document.getElementById('clear-signature-btn').addEventListener('click', clearSignature);
+	document.getElementById('approve-btn').addEventListener('click', approveDelivery);
+	document.getElementById('reject-btn').addEventListener('click', rejectDelivery);
+	document.getElementById('confirmApprovalBtn').addEventListener('click', confirmApproval);
+	document.getElementById('confirmRejectionBtn').addEventListener('click', confirmRejection);
+});
+
+function approveDelivery() {
+	// Clear previous input
+	document.getElementById('approvalName').value = '';
+	document.getElementById('approvalName').classList.remove('is-invalid');
+	// Show the approval modal
+	approvalModal.show();
+}
+
+async function confirmApproval() {
+	const nameInput = document.getElementById('approvalName');
+	const customerName = nameInput.value.trim();
+
+	if (!customerName) {
+		nameInput.classList.add('is-invalid');
+		nameInput.focus();
+		return;
+	}
+
+	const signature = signaturePad && !signaturePad.isEmpty() ? signaturePad.toDataURL() : null;
+
+	// Disable confirm button during processing
+	const confirmBtn = document.getElementById('confirmApprovalBtn');
+	confirmBtn.disabled = true;
+	confirmBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Processing...';
+
+	try {
+		const response = await fetch('/api/method/print_designer.custom.delivery_note_qr.submit_token_approval', {
+			method: 'POST',
+			headers: {
+				'Content-Type': 'application/json',
+				'X-Frappe-CSRF-Token': window.csrf_token || ''
+			},
+			body: JSON.stringify({
+				token: approvalToken,
+				decision: 'approve',
+				customer_name: customerName,
+				digital_signature: signature
+			})
+		});
+
+		const data = await response.json();
+
+		if (data.message && data.message.status === 'success') {
+			approvalModal.hide();
+			showAlert('success', 'Delivery approved successfully! Thank you for confirming receipt of goods.');
+			setTimeout(() => {
+				loadDeliveryInfo();
+			}, 2000);
+		} else {
+			showAlert('danger', data.message?.message || 'Error approving delivery. Please try again.');
+		}
+	} catch (error) {
+		console.error('Error approving delivery:', error);
+		showAlert('danger', 'Network error. Please check your connection and try again.');
+	} finally {
+		// Re-enable confirm button
+		confirmBtn.disabled = false;
+		confirmBtn.innerHTML = '<i class="fas fa-check me-1"></i>Confirm Approval';
+	}
+}
+
+function rejectDelivery() {
+	// Clear previous inputs
+	document.getElementById('rejectionName').value = '';
+	document.getElementById('rejectionReason').value = '';
+	document.getElementById('rejectionName').classList.remove('is-invalid');
+	document.getElementById('rejectionReason').classList.remove('is-invalid');
+	// Show the rejection modal
+	rejectionModal.show();
+}
+
+async function confirmRejection() {
+	const nameInput = document.getElementById('rejectionName');
+	const reasonInput = document.getElementById('rejectionReason');
+	const customerName = nameInput.value.trim();
+	const reason = reasonInput.value.trim();
+
+	let isValid = true;
+
+	if (!customerName) {
+		nameInput.classList.add('is-invalid');
+		isValid = false;
+	} else {
+		nameInput.classList.remove('is-invalid');
+	}
+
+	if (!reason) {
+		reasonInput.classList.add('is-invalid');
+		isValid = false;
+	} else {
+		reasonInput.classList.remove('is-invalid');
+	}
+
+	if (!isValid) {
+		return;
+	}
+
+	// Disable confirm button during processing
+	const confirmBtn = document.getElementById('confirmRejectionBtn');
+	confirmBtn.disabled = true;
+	confirmBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Processing...';
+
+	try {
+		const response = await fetch('/api/method/print_designer.custom.delivery_note_qr.submit_token_approval', {
+			method: 'POST',
+			headers: {
+				'Content-Type': 'application/json',
+				'X-Frappe-CSRF-Token': window.csrf_token || ''
+			},
+			body: JSON.stringify({
+				token: approvalToken,
+				decision: 'reject',
+				customer_name: customerName,
+				remarks: reason
+			})
+		});
+
+		const data = await response.json();
+
+		if (data.message && data.message.status === 'success') {
+			rejectionModal.hide();
+			showAlert('info', 'Delivery rejection recorded. The vendor will be notified of the issue.');
+			setTimeout(() => {
+				loadDeliveryInfo();
+			}, 2000);
+		} else {
+			showAlert('danger', data.message?.message || 'Error recording rejection. Please try again.');
+		}
+	} catch (error) {
+		console.error('Error rejecting delivery:', error);
+		showAlert('danger', 'Network error. Please check your connection and try again.');
+	} finally {
+		// Re-enable confirm button
+		confirmBtn.disabled = false;
+		confirmBtn.innerHTML = '<i class="fas fa-exclamation-circle me-1"></i>Submit Issue Report';
+	}
+}
+
+function showNoDeliveryNote() {
+	document.getElementById('loading-section').style.display = 'none';
+	document.getElementById('main-content').style.display = 'block';
+
+	const mainContent = document.getElementById('main-content');
+	mainContent.innerHTML = `
+		<div class="card approval-card">
+			<div class="card-header card-header-custom text-white text-center py-4">
+				<h2 class="mb-0">
+					<i class="fas fa-truck-loading me-2"></i>
+					Delivery Approval System
+				</h2>
+				<p class="mb-0 mt-2 opacity-75">QR Code Delivery Approval</p>
+			</div>
+
+			<div class="card-body p-4 text-center">
+				<div class="alert alert-warning">
+					<h4 class="alert-heading">
+						<i class="fas fa-exclamation-triangle me-2"></i>
+						No Delivery Note Specified
+					</h4>
+					<p class="mb-3">This page requires a delivery note ID to function properly.</p>
+					<hr>
+					<p class="mb-0">
+						<strong>To use this system:</strong><br>
+						1. Scan the QR code from your delivery note<br>
+						2. Or use the full URL format: <code>/delivery-approval?dn={delivery-note-id}&token={approval-token}</code>
+					</p>
+				</div>
+
+				<div class="mt-4">
+					<p class="text-muted">
+						<i class="fas fa-info-circle me-1"></i>
+						This delivery approval system is currently disabled for maintenance.
+					</p>
+					<a href="/app/delivery-note" class="btn btn-primary">
+						<i class="fas fa-list me-1"></i>
+						View Delivery Notes
+					</a>
+				</div>
+			</div>
+		</div>
+	`;
+}
+
+function showAlert(type, message) {
+	const alertContainer = document.getElementById('alert-container');
+	const alertHtml = `
+		<div class="alert alert-${type} alert-dismissible fade show" role="alert">
+			<i class="fas fa-${type === 'success' ? 'check-circle' : type === 'danger' ? 'exclamation-triangle' : type === 'warning' ? 'exclamation-circle' : 'info-circle'} me-2"></i>
+			${message}
+			<button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+		</div>
+	`;
+	alertContainer.innerHTML = alertHtml;
+
+	// Auto-dismiss success messages after 5 seconds
+	if (type === 'success') {
+		setTimeout(() => {
+			const alert = alertContainer.querySelector('.alert');
+			if (alert) {
+				const bsAlert = new bootstrap.Alert(alert);
+				bsAlert.close();
+			}
+		}, 5000);
+	}
+}
+
+// used by the inline onclick handlers of the page
+Object.assign(window, {
+	clearSignature,
+	approveDelivery,
+	rejectDelivery,
+	confirmApproval,
+	confirmRejection,
+});
@@ -300,7 +300,7 @@ function generate_qr_code(frm, retryCount = 0, silent = false) {
 					frm.doctype,
 					frm.docname,
 					"custom_approval_qr_code",
-					r.message.qr_code,
+					r.message.qr_file_url || r.message.qr_code,
 				);
 				frappe.model.set_value(
 					frm.doctype,
@@ -395,6 +395,14 @@ function generate_qr_code(frm, retryCount = 0, silent = false) {
 	});
 }
 
+// QR codes are stored as a file url, older documents still hold base64
+function get_qr_image_src(qr_code) {
+	if (qr_code.startsWith("/") || qr_code.startsWith("data:")) {
+		return qr_code;
+	}
+	return `data:image/png;base64,${qr_code}`;
+}
+
 function show_qr_code_dialog(frm) {
 	if (!frm.doc.custom_approval_qr_code) {
 		frappe.msgprint(__("No QR code available. Please generate one first."));
@@ -423,7 +431,7 @@ function show_qr_code_dialog(frm) {
 						</div>
 
 						<div class="qr-code-container" style="margin: 20px 0;">
-							<img src="data:image/png;base64,${frm.doc.custom_approval_qr_code}"
+							<img src="${get_qr_image_src(frm.doc.custom_approval_qr_code)}"
 								 style="max-width: 280px; max-height: 280px; border: 2px solid #e9ecef; border-radius: 8px; padding: 10px; background: #fff;"
 								 alt="QR Code for Delivery Approval" />
 						</div>
@@ -8,6 +8,14 @@ import frappe
 from frappe.utils import flt, cint
 from frappe import _
 
+from print_designer.utils.thai_tax import (
+    calculate_thai_tax,
+    get_currency_precision,
+    get_service_item_flags,
+    get_wht_base,
+    thai_round,
+)
+
 
 @frappe.whitelist()
 def override_purchase_invoice_wht_calculation(doc, method=None):
@@ -380,7 +388,7 @@ def _auto_generate_wht_certificate_number(pi_doc):
             year = frappe.utils.nowdate()[:4]
 
             # Get next sequence number
-            sequence = _get_next_wht_certificate_sequence(pi_doc.company, year)
+            sequence = _get_next_wht_certificate_sequence(company_abbr, year)
 
             # Format: COMP-WHT-2024-001
             cert_number = f"{company_abbr}-WHT-{year}-{sequence:03d}"
@@ -394,47 +402,13 @@ def _auto_generate_wht_certificate_number(pi_doc):
             pi_doc.pd_custom_wht_certificate_no = f"WHT-{pi_doc.name}"
 
 
-def _get_next_wht_certificate_sequence(company, year):
+def _get_next_wht_certificate_sequence(company_abbr, year):
     """
     Get next sequence number for WHT certificate within company and year
     """
+    from print_designer.custom.withholding_tax import get_next_wht_sequence
 
-    try:
-        # Query existing certificates for this company and year
-        pattern = f"%-WHT-{year}-%"
-
-        existing_certs = frappe.db.sql(
-            """
-            SELECT pd_custom_wht_certificate_no
-            FROM `tabPurchase Invoice`
-            WHERE company = %s
-            AND pd_custom_wht_certificate_no LIKE %s
-            AND docstatus != 2
-            ORDER BY creation DESC
-            LIMIT 1
-        """,
-            (company, pattern),
-        )
-
-        if existing_certs and existing_certs[0][0]:
-            # Extract sequence number from last certificate
-            last_cert = existing_certs[0][0]
-            try:
-                # Split by '-' and get last part
-                parts = last_cert.split("-")
-                if len(parts) >= 4:
-                    sequence_part = parts[-1]
-                    last_sequence = int(sequence_part)
-                    return last_sequence + 1
-            except (ValueError, IndexError):
-                pass
-
-        # If no existing certificates found or parsing failed, start with 1
-        return 1
-
-    except Exception as e:
-        frappe.logger().error(f"Error getting WHT certificate sequence: {str(e)}")
-        return 1
+    return get_next_wht_sequence(f"{company_abbr}-WHT-{year}-", [("Purchase Invoice", "pd_custom_wht_certificate_no")])
 
 
 # TODO: Income Type Options Reconciliation
@@ -501,108 +475,45 @@ def disable_standard_wht_calculation(doc):
 def calculate_thai_compliant_wht(doc):
     """
     Calculate WHT using Thai compliance rules:
-    - Use net_total (before VAT) as calculation base
-    - Apply precise percentage calculation without rounding quirks
+    - WHT on service items only (before VAT), retention on the whole document
+    - Thai commercial rounding at currency precision, via the Thai tax engine
     - Support Thai retention system integration
     """
 
-    print(f"🧮 DEBUG: calculate_thai_compliant_wht called for PI {doc.name}")
-
-    # Get WHT rate from custom field
     wht_rate = flt(getattr(doc, "pd_custom_withholding_tax_pct", 0))
-    print(f"🧮 DEBUG: WHT rate: {wht_rate}%")
-
     if wht_rate <= 0:
-        print(f"⏭️ DEBUG: WHT rate is 0 or negative, skipping calculation")
         return
 
-    # Calculate WHT base amount (SERVICE ITEMS ONLY - Thai tax law)
-    wht_base_amount = get_wht_calculation_base(doc)
-
-    # Calculate RETENTION base amount (WHOLE INVOICE - contract guarantee)
-    # Priority: base_total (Company Currency) → total (Transaction Currency)
-    retention_base_amount = flt(getattr(doc, "base_total", 0)) or flt(getattr(doc, "total", 0))
-
-    # DEBUGGING: Show result AFTER calculation
-    print(f"\n{'='*80}")
-    print(f"📊 WHT Base (service items only): {wht_base_amount}")
-    print(f"📊 Retention Base (whole invoice): {retention_base_amount}")
-    print(f"   - base_total: {flt(getattr(doc, 'base_total', 0))}")
-    print(f"   - total: {flt(getattr(doc, 'total', 0))}")
-    print(f"{'='*80}\n")
+    items = doc.get("items") or []
+    subject_to_retention = getattr(doc, "pd_custom_subject_to_retention", 0) and hasattr(doc, "pd_custom_retention_pct")
+    amounts = calculate_thai_tax(
+        [item.amount for item in items],
+        doc.grand_total,
+        wht_rate=wht_rate,
+        wht_lines=get_service_item_flags(items),
+        # Retention guarantees the WHOLE document (materials + services)
+        # Priority: base_total (Company Currency) → total (Transaction Currency)
+        retention_rate=getattr(doc, "pd_custom_retention_pct", 0),
+        retention_base=flt(getattr(doc, "base_total", 0)) or flt(getattr(doc, "total", 0)),
+        subject_to_retention=subject_to_retention,
+        precision=get_currency_precision(),
+    )
 
-    # Precise WHT calculation: wht_base × rate ÷ 100 (SERVICE ITEMS ONLY)
-    wht_amount = flt(wht_base_amount * wht_rate / 100, 2)  # Round to 2 decimal places
-    print(f"🧮 DEBUG: Calculated WHT amount: {wht_base_amount} × {wht_rate}% = {wht_amount}")
+    wht_base_amount = amounts["wht_base_amount"]
+    wht_amount = amounts["pd_custom_withholding_tax_amount"]
+    final_payment = amounts["pd_custom_payment_amount"]
 
-    # Update custom WHT fields
     doc.pd_custom_withholding_tax_amount = wht_amount
-    print(f"🧮 DEBUG: Set pd_custom_withholding_tax_amount = {wht_amount}")
-
-    # CONDITIONAL: Set pd_custom_subject_to_wht flag only when WHT amount is calculated and > 0
-    if wht_amount > 0:
-        doc.pd_custom_subject_to_wht = 1
-        print(f"✅ DEBUG: Set pd_custom_subject_to_wht = 1 (WHT Amount: {wht_amount})")
-        frappe.logger().info(
-            f"Set pd_custom_subject_to_wht = 1 for PI {doc.name} (WHT Amount: {wht_amount})"
-        )
-    else:
-        doc.pd_custom_subject_to_wht = 0
-        print(f"❌ DEBUG: Set pd_custom_subject_to_wht = 0 (No WHT amount)")
-        frappe.logger().info(f"Set pd_custom_subject_to_wht = 0 for PI {doc.name} (No WHT amount)")
 
-    # Calculate retention amount if retention is enabled
-    print("\n" + "=" * 80)
-    print("🔍 RETENTION CALCULATION DEBUG START - Purchase Invoice")
-    print("=" * 80)
-
-    pd_custom_subject_to_retention = getattr(doc, "pd_custom_subject_to_retention", 0)
-    has_custom_retention = hasattr(doc, "pd_custom_retention_pct")
-    print(f"1. pd_custom_subject_to_retention: {pd_custom_subject_to_retention}")
-    print(f"2. has pd_custom_retention_pct attr: {has_custom_retention}")
-
-    if pd_custom_subject_to_retention and has_custom_retention:
-        retention_percentage = flt(getattr(doc, "pd_custom_retention_pct", 0))
-        print(f"3. retention_percentage: {retention_percentage}%")
-        print(f"4. retention_base_amount (WHOLE INVOICE): {retention_base_amount}")
-
-        # Browser debug message
-        frappe.msgprint(
-            f"🔍 CALC DEBUG (PI): retention_base = {retention_base_amount}, retention % = {retention_percentage}%",
-            indicator="orange",
-            title="Retention Calculation - PI",
-        )
-
-        if retention_percentage > 0:
-            # FIXED: Retention is calculated on WHOLE INVOICE, not just services
-            # Thai business practice: Retention guarantees entire project (materials + labor)
-            # Example: 100,000 THB invoice × 5% = 5,000 THB retention
-            calculated_retention = flt(retention_base_amount * retention_percentage / 100, 2)
-            doc.pd_custom_retention_amount = calculated_retention
-            print(
-                f"5. ✅ Calculated retention_amount: {retention_base_amount} × {retention_percentage}% = {calculated_retention}"
-            )
-
-            # Browser debug message
-            frappe.msgprint(
-                f"✅ Calculated retention_amount = {calculated_retention} THB (on whole invoice)",
-                indicator="green",
-                title="Retention Calculation Success - PI",
-            )
-
-    print("=" * 80 + "\n")
-
-    # Calculate final payment amount (after WHT and retention)
-    retention_amount = flt(getattr(doc, "pd_custom_retention_amount", 0))
-    final_payment = flt(doc.grand_total) - wht_amount - retention_amount
+    # Set pd_custom_subject_to_wht flag only when WHT amount is calculated and > 0
+    doc.pd_custom_subject_to_wht = 1 if wht_amount > 0 else 0
+    if hasattr(doc, "pd_custom_retention_amount"):
+        # zero when retention is off, a stale amount would show but not be deducted
+        doc.pd_custom_retention_amount = amounts["pd_custom_retention_amount"]
     doc.pd_custom_payment_amount = final_payment
-    print(
-        f"🧮 DEBUG: Final payment: {doc.grand_total} - {wht_amount} - {retention_amount} = {final_payment}"
-    )
 
     # Update preview fields for user display
     update_thai_wht_preview_fields(doc, wht_base_amount, wht_amount, final_payment)
-    print(f"🧮 DEBUG: Updated preview fields")
 
     frappe.logger().info(
         f"Thai WHT Calculation: {wht_base_amount} × {wht_rate}% = {wht_amount} "
@@ -617,27 +528,8 @@ def get_wht_calculation_base(doc):
     WHT applies to: Item.pd_custom_is_service_item = 1
     """
 
-    # Calculate WHT base from SERVICE ITEMS ONLY
-    # WHT does not apply to assets/goods, only to services
-    service_items_total = 0.0
-
-    if hasattr(doc, "items") and doc.items:
-        for item in doc.items:
-            # Check if item is a service item by querying Item master
-            item_code = getattr(item, "item_code", None)
-            if item_code:
-                try:
-                    item_doc = frappe.get_cached_doc("Item", item_code)
-                    is_service = getattr(item_doc, "pd_custom_is_service_item", 0)
-
-                    if is_service:
-                        # Sum only service item amounts
-                        service_items_total += flt(item.amount)
-                except Exception:
-                    # If item not found or error, skip this item
-                    pass
-
-    return flt(service_items_total)
+    items = doc.get("items") or []
+    return flt(get_wht_base([item.amount for item in items], get_service_item_flags(items)))
 
 
 def update_thai_wht_preview_fields(doc, base_amount, wht_amount, final_payment):
@@ -1047,7 +939,7 @@ def get_thai_wht_calculation_debug_info(purchase_invoice_name):
     # Thai calculation
     if debug_info["wht_rate"] > 0:
         base_amount = get_wht_calculation_base(doc)
-        thai_wht = flt(base_amount * debug_info["wht_rate"] / 100, 2)
+        thai_wht = thai_round(base_amount * debug_info["wht_rate"] / 100, get_currency_precision())
 
         debug_info["thai_calculation"] = {
             "base_amount": base_amount,
@@ -8,6 +8,15 @@ import frappe
 from frappe.utils import flt, cint
 from frappe import _
 
+from print_designer.utils.thai_tax import (
+    calculate_thai_tax,
+    get_currency_precision,
+    get_service_item_flags,
+    get_wht_base,
+    thai_round,
+)
+
+
 @frappe.whitelist()
 def override_purchase_order_wht_calculation(doc, method=None):
     """
@@ -57,132 +66,39 @@ def disable_standard_wht_calculation(doc):
 def calculate_thai_compliant_wht(doc):
     """
     Calculate WHT using Thai compliance rules:
-    - Use net_total (before VAT) as calculation base
-    - Apply precise percentage calculation without rounding quirks
+    - WHT on service items only (before VAT), retention on the whole document
+    - Thai commercial rounding at currency precision, via the Thai tax engine
     - Support Thai retention system integration
     """
 
-    # DEBUGGING: Show document totals FIRST (before any early returns)
-    print(f"\n{'='*80}")
-    print(f"🔍 DOCUMENT TOTALS DEBUG (BEFORE get_wht_calculation_base)")
-    print(f"{'='*80}")
-
-    # Get WHT rate from custom field
-    wht_rate = flt(getattr(doc, 'pd_custom_withholding_tax_pct', 0))
-    print(f"📋 WHT Rate: {wht_rate}%")
-
+    wht_rate = flt(getattr(doc, "pd_custom_withholding_tax_pct", 0))
     if wht_rate <= 0:
-        print(f"⚠️ WHT rate is 0 or negative, exiting early")
-        print(f"{'='*80}\n")
         return
-    print(f"📊 Document Level Totals:")
-    print(f"   - base_total (Company Currency):     {flt(getattr(doc, 'base_total', 0))}")
-    print(f"   - total (Transaction Currency):      {flt(getattr(doc, 'total', 0))}")
-    print(f"   - base_net_total (before discount):  {flt(getattr(doc, 'base_net_total', 0))}")
-    print(f"   - net_total (before discount):       {flt(getattr(doc, 'net_total', 0))}")
-    print(f"📦 Items:")
-    print(f"   - Number of items: {len(doc.items) if hasattr(doc, 'items') and doc.items else 0}")
-    if hasattr(doc, 'items') and doc.items:
-        for idx, item in enumerate(doc.items):
-            print(f"   - Item {idx+1}: {getattr(item, 'item_code', 'Unknown')} | Amount: {flt(getattr(item, 'amount', 0))}")
-    print(f"{'='*80}\n")
-
-    # Calculate WHT base amount (SERVICE ITEMS ONLY - Thai tax law)
-    wht_base_amount = get_wht_calculation_base(doc)
-
-    # Calculate RETENTION base amount (WHOLE INVOICE - contract guarantee)
-    # Priority: base_total (Company Currency) → total (Transaction Currency)
-    retention_base_amount = flt(getattr(doc, 'base_total', 0)) or flt(getattr(doc, 'total', 0))
-
-    # DEBUGGING: Show result AFTER calculation
-    print(f"\n{'='*80}")
-    print(f"📊 WHT Base (service items only): {wht_base_amount}")
-    print(f"📊 Retention Base (whole invoice): {retention_base_amount}")
-    print(f"   - base_total: {flt(getattr(doc, 'base_total', 0))}")
-    print(f"   - total: {flt(getattr(doc, 'total', 0))}")
-    print(f"{'='*80}\n")
-
-    # Precise WHT calculation: wht_base × rate ÷ 100 (SERVICE ITEMS ONLY)
-    wht_amount = flt(wht_base_amount * wht_rate / 100, 2)  # Round to 2 decimal places
-
-    # Update custom WHT fields
-    doc.pd_custom_withholding_tax_amount = wht_amount
-
-    # Calculate retention amount if retention is enabled
-    print("\n" + "="*80)
-    print("🔍 RETENTION CALCULATION DEBUG START")
-    print("="*80)
-
-    pd_custom_subject_to_retention = getattr(doc, 'pd_custom_subject_to_retention', 0)
-    has_custom_retention = hasattr(doc, 'pd_custom_retention_pct')
-    print(f"1. pd_custom_subject_to_retention: {pd_custom_subject_to_retention}")
-    print(f"2. has pd_custom_retention_pct attr: {has_custom_retention}")
-
-    if pd_custom_subject_to_retention and has_custom_retention:
-        retention_percentage = flt(getattr(doc, 'pd_custom_retention_pct', 0))
-        print(f"3. retention_percentage: {retention_percentage}%")
-        print(f"4. retention_base_amount (WHOLE INVOICE): {retention_base_amount}")
-
-        # Browser debug message
-        frappe.msgprint(
-            f"🔍 CALC DEBUG: retention_base = {retention_base_amount} (whole invoice), retention % = {retention_percentage}%",
-            indicator='orange',
-            title="Retention Calculation"
-        )
-
-        if retention_percentage > 0:
-            # FIXED: Retention is calculated on WHOLE INVOICE, not just services
-            # Example: Total 1,000,000 THB (materials 600k + services 400k) × 5% = 50,000 THB retention
-            calculated_retention = flt(retention_base_amount * retention_percentage / 100, 2)
-            doc.pd_custom_retention_amount = calculated_retention
-            print(f"5. ✅ Calculated retention_amount: {retention_base_amount} (whole invoice) × {retention_percentage}% = {calculated_retention}")
-            frappe.logger().info(
-                f"Retention Calculation: {retention_base_amount} × {retention_percentage}% = {doc.pd_custom_retention_amount}"
-            )
-
-            # Browser debug message
-            frappe.msgprint(
-                f"✅ Calculated retention_amount = {calculated_retention} THB",
-                indicator='green',
-                title="Retention Calculation Success"
-            )
-        else:
-            print("5. ⚠️ Retention percentage is 0, no calculation")
-    else:
-        print("3. ❌ Retention not enabled or field missing")
-
-    print("="*80)
-    print("🔍 RETENTION CALCULATION DEBUG END")
-    print("="*80 + "\n")
-
-    # Calculate final payment amount (after WHT and retention)
-    print("\n" + "="*80)
-    print("🔍 FINAL PAYMENT CALCULATION DEBUG START")
-    print("="*80)
-
-    retention_amount = flt(getattr(doc, 'pd_custom_retention_amount', 0))
-    print(f"1. grand_total: {doc.grand_total}")
-    print(f"2. wht_amount: {wht_amount}")
-    print(f"3. retention_amount: {retention_amount}")
-
-    final_payment = flt(doc.grand_total) - wht_amount - retention_amount
-    print(f"4. ✅ final_payment: {doc.grand_total} - {wht_amount} - {retention_amount} = {final_payment}")
 
-    # Browser debug message
-    frappe.msgprint(
-        f"🔍 FINAL CALC: grand_total = {doc.grand_total}<br>"
-        f"WHT = {wht_amount}<br>"
-        f"Retention = {retention_amount}<br>"
-        f"<b>Final Payment = {final_payment} THB</b>",
-        indicator='blue',
-        title="Final Payment Calculation"
+    items = doc.get("items") or []
+    subject_to_retention = getattr(doc, "pd_custom_subject_to_retention", 0) and hasattr(doc, "pd_custom_retention_pct")
+    amounts = calculate_thai_tax(
+        [item.amount for item in items],
+        doc.grand_total,
+        wht_rate=wht_rate,
+        wht_lines=get_service_item_flags(items),
+        # Retention guarantees the WHOLE document (materials + services)
+        # Priority: base_total (Company Currency) → total (Transaction Currency)
+        retention_rate=getattr(doc, "pd_custom_retention_pct", 0),
+        retention_base=flt(getattr(doc, "base_total", 0)) or flt(getattr(doc, "total", 0)),
+        subject_to_retention=subject_to_retention,
+        precision=get_currency_precision(),
     )
 
-    doc.pd_custom_payment_amount = final_payment
+    wht_base_amount = amounts["wht_base_amount"]
+    wht_amount = amounts["pd_custom_withholding_tax_amount"]
+    final_payment = amounts["pd_custom_payment_amount"]
 
-    print("="*80)
-    print("🔍 FINAL PAYMENT CALCULATION DEBUG END")
-    print("="*80 + "\n")
+    doc.pd_custom_withholding_tax_amount = wht_amount
+    if hasattr(doc, "pd_custom_retention_amount"):
+        # zero when retention is off, a stale amount would show but not be deducted
+        doc.pd_custom_retention_amount = amounts["pd_custom_retention_amount"]
+    doc.pd_custom_payment_amount = final_payment
 
     # Update preview fields for user display
     update_thai_wht_preview_fields(doc, wht_base_amount, wht_amount, final_payment)
@@ -200,43 +116,8 @@ def get_wht_calculation_base(doc):
     WHT applies to: Item.pd_custom_is_service_item = 1
     """
 
-    # Calculate WHT base from SERVICE ITEMS ONLY
-    # WHT does not apply to assets/goods, only to services
-    service_items_total = 0.0
-
-    print(f"\n🔍 DEBUG: WHT Base Calculation for {doc.doctype} {doc.name}")
-    print(f"📦 DEBUG: Document has {len(doc.items) if hasattr(doc, 'items') else 0} items")
-
-    if hasattr(doc, 'items') and doc.items:
-        for idx, item in enumerate(doc.items):
-            item_amount = flt(item.amount)
-            item_code = getattr(item, 'item_code', 'Unknown')
-
-            print(f"  Item {idx + 1}: {item_code}")
-            print(f"    - amount: {item_amount}")
-
-            # Check if item is a service item by querying Item master
-            is_service = 0
-            if item_code and item_code != 'Unknown':
-                try:
-                    item_doc = frappe.get_cached_doc('Item', item_code)
-                    is_service = getattr(item_doc, 'pd_custom_is_service_item', 0)
-                    print(f"    - Item master pd_custom_is_service_item: {is_service}")
-                except Exception as e:
-                    print(f"    ⚠️ Could not fetch Item master: {e}")
-                    is_service = 0
-
-            if is_service:
-                # Sum only service item amounts
-                service_items_total += item_amount
-                print(f"    ✅ INCLUDED in WHT calculation (Service Item)")
-            else:
-                print(f"    ❌ EXCLUDED from WHT calculation (Asset/Good)")
-
-    print(f"💰 DEBUG: Total Service Items Amount (WHT Base): {service_items_total}")
-    print(f"📊 DEBUG: Document net_total for comparison: {getattr(doc, 'net_total', 0)}")
-
-    return flt(service_items_total)
+    items = doc.get("items") or []
+    return flt(get_wht_base([item.amount for item in items], get_service_item_flags(items)))
 
 
 def update_thai_wht_preview_fields(doc, base_amount, wht_amount, final_payment):
@@ -453,7 +334,7 @@ def get_thai_wht_calculation_debug_info(purchase_order_name):
     # Thai calculation
     if debug_info["wht_rate"] > 0:
         base_amount = get_wht_calculation_base(doc)
-        thai_wht = flt(base_amount * debug_info["wht_rate"] / 100, 2)
+        thai_wht = thai_round(base_amount * debug_info["wht_rate"] / 100, get_currency_precision())
 
         debug_info["thai_calculation"] = {
             "base_amount": base_amount,
@@ -0,0 +1,57 @@
+import base64
+import unittest
+from unittest.mock import patch
+
+from print_designer.print_designer.page.print_designer import print_designer
+from print_designer.print_designer.page.print_designer.print_designer import (
+    get_barcode,
+    get_barcodes,
+)
+
+
+class TestBarcodeCache(unittest.TestCase):
+    """Test the per-process barcode cache and the batch endpoint"""
+
+    def setUp(self):
+        print_designer._get_cached_barcode.cache_clear()
+        patcher = patch.object(
+            print_designer, "_generate_barcode", wraps=print_designer._generate_barcode
+        )
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_options_in_different_key_order_hit_the_cache(self):
+        first = get_barcode("code128", "ABC-1", {"module_width": 0.3, "font_size": 8})
+        second = get_barcode("code128", "ABC-1", '{"font_size": 8, "module_width": 0.3}')
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertEqual(print_designer._get_cached_barcode.cache_info().hits, 1)
+
+    def test_cached_result_is_a_copy(self):
+        first = get_barcode("code128", "ABC-1")
+        first["value"] = "changed"
+
+        self.assertNotEqual(get_barcode("code128", "ABC-1")["value"], "changed")
+
+    def test_png_and_svg(self):
+        svg = get_barcode("code128", "ABC-1")
+        png = get_barcode("code128", "ABC-1", png_base64=True)
+
+        self.assertEqual(svg["type"], "svg")
+        self.assertIn("<svg", svg["value"])
+        self.assertEqual(png["type"], "png_base64")
+        self.assertTrue(base64.b64decode(png["value"]).startswith(b"\x89PNG"))
+        # the png flag is part of the key
+        self.assertEqual(self.generate.call_count, 2)
+
+    def test_get_barcodes_keeps_input_order(self):
+        values = ["ITEM-3", "ITEM-1", "ITEM-3", "ITEM-2"]
+
+        barcodes = get_barcodes("code128", '["ITEM-3", "ITEM-1", "ITEM-3", "ITEM-2"]')
+
+        self.assertEqual(barcodes, [get_barcode("code128", value) for value in values])
+        self.assertEqual(
+            [call.args[1] for call in self.generate.call_args_list], ["ITEM-3", "ITEM-1", "ITEM-2"]
+        )
+        self.assertEqual(len({barcode["value"] for barcode in barcodes}), 3)
@@ -0,0 +1,51 @@
+import unittest
+
+from print_designer.pdf_generator.chunked_table import PLACEHOLDER, ChunkedTableRegistry
+
+
+class TestChunkedTableRegistry(unittest.TestCase):
+    """Test placeholder handling of chunked child table rendering"""
+
+    def setUp(self):
+        doc = {"items": [{"idx": i} for i in range(1, 6)]}
+        self.registry = ChunkedTableRegistry({"doc": doc}, threshold=3)
+        self.element = {"table": {"fieldname": "items"}}
+        # avoid jinja here, only the stitching of rendered rows is tested
+        self.registry.render_rows = lambda index: iter([f"<tr>{index}a</tr>", f"<tr>{index}b</tr>"])
+
+    def test_should_chunk(self):
+        self.assertTrue(self.registry.should_chunk(self.element, self.registry.context["doc"]))
+        self.assertFalse(self.registry.should_chunk(self.element, {"items": [{}, {}]}))
+        self.assertFalse(self.registry.should_chunk({"table": {"fieldname": "taxes"}}, {}))
+
+    def test_header_and_footer_tables_are_not_chunked(self):
+        header_table = {"table": {"fieldname": "items"}}
+        footer_table = {"table": {"fieldname": "items"}}
+        self.registry.context["pd_format"] = {
+            "header": {"firstPage": [{"childrens": [header_table]}], "oddPage": []},
+            "footer": {"lastPage": [footer_table]},
+        }
+        doc = self.registry.context["doc"]
+
+        self.assertFalse(self.registry.should_chunk(header_table, doc))
+        self.assertFalse(self.registry.should_chunk(footer_table, doc))
+        self.assertTrue(self.registry.should_chunk(self.element, doc))
+
+    def test_placeholders_are_replaced_with_rows(self):
+        first = self.registry.placeholder(self.element, {})
+        second = self.registry.placeholder(self.element, {})
+        self.assertEqual(first, PLACEHOLDER.format(0))
+
+        html = f"<table>{first}</table><p>x</p><table>{second}</table>"
+        self.assertEqual(
+            self.registry.render_to_string(html),
+            "<table><tr>0a</tr><tr>0b</tr></table><p>x</p><table><tr>1a</tr><tr>1b</tr></table>",
+        )
+
+    def test_missing_placeholder_is_skipped(self):
+        self.registry.placeholder(self.element, {})
+        second = self.registry.placeholder(self.element, {})
+        html = f"<body><table>{second}</table></body>"
+        self.assertEqual(
+            self.registry.render_to_string(html), "<body><table><tr>1a</tr><tr>1b</tr></table></body>"
+        )
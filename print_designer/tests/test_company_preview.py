@@ -258,6 +258,30 @@ class TestCompanyPreview(unittest.TestCase):
         self.assertEqual(result["stamps"][0]["title"], "Active Stamp")
         self.assertEqual(result["signatures"][0]["title"], "Active Signature")
 
+    def test_cached_signature_resolution(self):
+        """Test cached stamp lookup, batch lookup and invalidation on save"""
+        from print_designer.utils.signature_stamp import (
+            get_company_stamp_image,
+            get_signatures_and_stamps,
+        )
+
+        stamp = frappe.new_doc("Company Stamp")
+        stamp.title = "Cached Stamp"
+        stamp.company = self.test_company
+        stamp.is_active = 1
+        stamp.stamp_image = "/files/cached_stamp.png"
+        stamp.insert(ignore_mandatory=True)
+
+        self.assertEqual(get_company_stamp_image(stamp.name)["title"], "Cached Stamp")
+
+        stamp.title = "Renamed Stamp"
+        stamp.save(ignore_permissions=True)
+        self.assertEqual(get_company_stamp_image(stamp.name)["title"], "Renamed Stamp")
+
+        result = get_signatures_and_stamps(company_stamps=[stamp.name, "Missing Stamp"])
+        self.assertEqual(result["stamps"][stamp.name]["title"], "Renamed Stamp")
+        self.assertIsNone(result["stamps"]["Missing Stamp"])
+
     def tearDown(self):
         """Cleanup after each test"""
         frappe.db.rollback()
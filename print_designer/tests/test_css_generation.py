@@ -0,0 +1,58 @@
+import unittest
+
+from print_designer.print_designer.page.print_designer.print_designer import (
+    CSSClassRegistry,
+    convert_css,
+)
+
+
+class TestCSSGeneration(unittest.TestCase):
+    """Test inline style generation used by the print designer Jinja macros"""
+
+    def test_convert_css_output(self):
+        css = convert_css({"fontSize": "12px", "backgroundColor": "", "color": "#000"})
+        self.assertEqual(
+            css,
+            "font-size:12px!important;background-color:transparent!important;"
+            "color:#000!important;user-select: all;",
+        )
+        self.assertEqual(convert_css({}), "user-select: all;")
+        self.assertEqual(convert_css(None), "user-select: all;")
+
+    def test_convert_css_is_interned(self):
+        first = convert_css({"fontWeight": "bold", "paddingTop": "2px"})
+        second = convert_css({"fontWeight": "bold", "paddingTop": "2px"})
+        self.assertIs(first, second)
+
+    def test_convert_css_unhashable_values(self):
+        css = convert_css({"fontFamily": ["Sarabun"]})
+        self.assertEqual(css, "font-family:['Sarabun']!important;user-select: all;")
+
+    def test_class_registry_hoists_repeated_styles(self):
+        registry = CSSClassRegistry()
+        style = convert_css({"color": "red"})
+        self.assertEqual(registry.hoist(style), "pd-s0")
+        self.assertEqual(registry.hoist(style), "pd-s0")
+        self.assertEqual(registry.hoist("color: blue;"), "pd-s1")
+        self.assertEqual(registry.hoist("   "), "")
+
+        rendered = registry.render()
+        self.assertTrue(rendered.startswith('<style id="pd-hoisted-styles">'))
+        # hoisted declarations keep the precedence of inline styles
+        self.assertIn(".printTable .pd-s0 { color:red!important;user-select: all !important; }", rendered)
+        self.assertIn(".printTable .pd-s1 { color: blue !important; }", rendered)
+        self.assertEqual(CSSClassRegistry().render(), "")
+
+    def test_hoisted_declarations_are_important(self):
+        registry = CSSClassRegistry()
+        registry.hoist(
+            "width: 20%; max-width: 20%; border-top-style: solid !important;"
+            "background-image:url(data:image/png;base64,iVBORw0)"
+        )
+
+        self.assertIn(
+            ".printTable .pd-s0 { width: 20% !important;max-width: 20% !important;"
+            "border-top-style: solid !important;"
+            "background-image:url(data:image/png;base64,iVBORw0) !important; }",
+            registry.render(),
+        )
@@ -0,0 +1,101 @@
+import frappe
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from frappe.tests.utils import FrappeTestCase
+
+from print_designer.custom.customer_wht_config_handler import (
+    calculate_thai_amounts,
+    recalculate_customer_wht_documents,
+)
+
+
+class TestCustomerWHTRecalculation(FrappeTestCase):
+    """Test the pure Thai amount calculation and the batched customer recalculation job"""
+
+    customer = "_Test WHT Recalculation Customer"
+
+    def test_wht_and_retention_amounts(self):
+        amounts = calculate_thai_amounts(
+            frappe._dict(
+                net_total=1000,
+                grand_total=1070,
+                pd_custom_subject_to_wht=1,
+                pd_custom_subject_to_retention=1,
+                pd_custom_retention_pct=5,
+            ),
+            {"default_wht_rate": 3, "default_retention_rate": 10},
+        )
+
+        self.assertEqual(amounts["pd_custom_withholding_tax_pct"], 3)
+        self.assertEqual(amounts["pd_custom_retention_pct"], 5)
+        self.assertEqual(amounts["pd_custom_withholding_tax_amount"], 30)
+        self.assertEqual(amounts["pd_custom_retention_amount"], 50)
+        self.assertEqual(amounts["pd_custom_net_total_after_wht"], 1040)
+        self.assertEqual(amounts["pd_custom_net_after_wht_retention"], 990)
+        self.assertEqual(amounts["pd_custom_payment_amount"], 990)
+
+    def test_close_amounts_are_kept(self):
+        values = frappe._dict(
+            net_total=1000,
+            grand_total=1070,
+            pd_custom_subject_to_wht=1,
+            pd_custom_withholding_tax_pct=3,
+            pd_custom_withholding_tax_amount=30.005,
+        )
+
+        kept = calculate_thai_amounts(values, {}, keep_close_amounts=True)
+        recalculated = calculate_thai_amounts(values, {})
+
+        self.assertEqual(kept["pd_custom_withholding_tax_amount"], 30.005)
+        self.assertEqual(recalculated["pd_custom_withholding_tax_amount"], 30)
+        self.assertEqual(recalculated["pd_custom_payment_amount"], 1040)
+
+    def test_not_subject_to_wht(self):
+        amounts = calculate_thai_amounts(
+            frappe._dict(net_total=1000, grand_total=1070, pd_custom_withholding_tax_amount=30), {"default_wht_rate": 3}
+        )
+
+        self.assertEqual(amounts["pd_custom_withholding_tax_amount"], 0)
+        self.assertEqual(amounts["pd_custom_payment_amount"], 1070)
+
+    def make_draft_invoice(self, rate, **amounts):
+        invoice = create_sales_invoice(customer=self.customer, rate=rate, do_not_save=True)
+        invoice.pd_custom_subject_to_wht = 1
+        invoice.pd_custom_withholding_tax_pct = 3
+        invoice.insert()
+        self.addCleanup(frappe.delete_doc, "Sales Invoice", invoice.name, force=True)
+        # stored amounts as they were before the customer's WHT configuration changed
+        frappe.db.set_value("Sales Invoice", invoice.name, amounts, update_modified=False)
+        return invoice.name
+
+    def test_only_changed_amounts_are_written(self):
+        if not frappe.db.exists("Customer", self.customer):
+            frappe.get_doc(
+                {
+                    "doctype": "Customer",
+                    "customer_name": self.customer,
+                    "customer_group": "_Test Customer Group",
+                    "territory": "_Test Territory",
+                }
+            ).insert()
+
+        current = self.make_draft_invoice(
+            1000,
+            pd_custom_withholding_tax_amount=30,
+            pd_custom_net_total_after_wht=970,
+            pd_custom_payment_amount=970,
+        )
+        stale = self.make_draft_invoice(
+            2000,
+            pd_custom_withholding_tax_amount=30,
+            pd_custom_net_total_after_wht=1970,
+            pd_custom_payment_amount=1970,
+        )
+        modified = frappe.db.get_value("Sales Invoice", stale, "modified")
+
+        updated = recalculate_customer_wht_documents(self.customer, batch_size=1)
+
+        self.assertEqual(updated, {"Quotation": 0, "Sales Order": 0, "Sales Invoice": 1})
+        fields = ["pd_custom_withholding_tax_amount", "pd_custom_net_total_after_wht", "pd_custom_payment_amount"]
+        self.assertEqual(frappe.db.get_value("Sales Invoice", current, fields), (30, 970, 970))
+        self.assertEqual(frappe.db.get_value("Sales Invoice", stale, fields), (60, 1940, 1940))
+        self.assertEqual(frappe.db.get_value("Sales Invoice", stale, "modified"), modified)
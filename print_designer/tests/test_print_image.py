@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from print_designer.utils import print_image
+from print_designer.utils.print_image import get_local_file_path, get_print_size
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class TestPrintImage(unittest.TestCase):
+    """Test print sized image derivatives used by the signature / stamp / image macros"""
+
+    def setUp(self):
+        self.site_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.site_path, "public", "files"))
+        patcher = patch.object(
+            frappe,
+            "get_site_path",
+            lambda *parts: os.path.join(self.site_path, *parts),
+            create=True,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        print_image._PRINT_IMAGE_CACHE.clear()
+
+    def test_print_size(self):
+        self.assertEqual(get_print_size("150px", "75px"), 512)
+        self.assertEqual(get_print_size(60, 60), 256)
+        self.assertEqual(get_print_size("100%", None), print_image.DEFAULT_PRINT_SIZE)
+        # larger than the biggest derivative, use the original
+        self.assertIsNone(get_print_size(1000, 400))
+
+    def test_local_file_path(self):
+        path = os.path.join(self.site_path, "public", "files", "sign.png")
+        open(path, "wb").close()
+
+        self.assertEqual(get_local_file_path("/files/sign.png"), os.path.realpath(path))
+        self.assertIsNone(get_local_file_path("/files/missing.png"))
+        self.assertIsNone(get_local_file_path("/files/../../site_config.png"))
+        self.assertIsNone(get_local_file_path("/files/logo.svg"))
+        self.assertIsNone(get_local_file_path("https://example.com/sign.png"))
+
+    @unittest.skipUnless(Image, "Pillow is not installed")
+    def test_make_print_image_downscales(self):
+        path = os.path.join(self.site_path, "public", "files", "photo.jpg")
+        Image.new("RGB", (4000, 2000), "white").save(path)
+
+        data_uri = print_image.make_print_image(path, 512)
+        self.assertTrue(data_uri.startswith("data:image/jpeg;base64,"))
+        self.assertLess(len(data_uri), os.path.getsize(path))
+
+    def test_private_file_needs_read_permission(self):
+        os.makedirs(os.path.join(self.site_path, "private", "files"))
+        open(os.path.join(self.site_path, "private", "files", "sign.png"), "wb").close()
+
+        with patch.object(frappe, "get_all", return_value=["file-1"], create=True), patch.object(
+            frappe, "has_permission", return_value=False, create=True
+        ) as has_permission, patch.object(print_image, "get_print_image") as get_print_image, patch.object(
+            frappe, "get_url", return_value="http://test", create=True
+        ):
+            url = print_image.get_print_image_url("/private/files/sign.png", 150, 75)
+
+        self.assertEqual(url, "http://test/private/files/sign.png")
+        has_permission.assert_called_once_with("File", "read", doc="file-1")
+        get_print_image.assert_not_called()
+        self.assertTrue(print_image.can_read_file("/files/sign.png"))
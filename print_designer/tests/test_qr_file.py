@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from print_designer.utils import qr_file
+from print_designer.utils.qr_file import get_qr_data_url, save_qr_files
+
+
+class TestQRFile(unittest.TestCase):
+    """Test QR images read from files or legacy base64 fields"""
+
+    def setUp(self):
+        self.site_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.site_path, "private", "files"))
+        patcher = patch.object(
+            frappe,
+            "get_site_path",
+            lambda *parts: os.path.join(self.site_path, *parts),
+            create=True,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        site_patcher = patch.object(frappe.local, "site", "test_site", create=True)
+        site_patcher.start()
+        self.addCleanup(site_patcher.stop)
+        qr_file._QR_DATA_URL_CACHE.clear()
+
+    def test_legacy_base64(self):
+        self.assertEqual(get_qr_data_url("iVBORw0"), "data:image/png;base64,iVBORw0")
+        self.assertEqual(get_qr_data_url("data:image/png;base64,iVBORw0"), "data:image/png;base64,iVBORw0")
+        self.assertEqual(get_qr_data_url(None), "")
+
+    def test_private_file_inlined(self):
+        path = os.path.join(self.site_path, "private", "files", "SINV-0001-qr.png")
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG qr")
+
+        db = MagicMock()
+        db.exists.side_effect = lambda doctype, filters: filters["attached_to_field"] == "custom_invoice_qr_image"
+        with patch.object(frappe, "db", db, create=True):
+            data_url = get_qr_data_url("/private/files/SINV-0001-qr.png")
+        self.assertEqual(data_url, "data:image/png;base64," + base64.b64encode(b"\x89PNG qr").decode())
+        self.assertEqual(get_qr_data_url("/private/files/missing-qr.png"), "")
+
+    def test_other_private_files_not_inlined(self):
+        path = os.path.join(self.site_path, "private", "files", "salary-slip.png")
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG private")
+
+        db = MagicMock()
+        db.exists.return_value = None
+        with patch.object(frappe, "db", db, create=True):
+            self.assertEqual(get_qr_data_url("/private/files/salary-slip.png"), "/private/files/salary-slip.png")
+
+    def test_attached_files_looked_up_once_per_batch(self):
+        existing = [
+            frappe._dict(
+                name="file-1",
+                file_url="/private/files/SINV-0001-qr.png",
+                content_hash=hashlib.md5(b"qr 1").hexdigest(),
+                attached_to_name="SINV-0001",
+            ),
+            frappe._dict(
+                name="file-2",
+                file_url="/private/files/SINV-0002-qr.png",
+                content_hash=hashlib.md5(b"old qr 2").hexdigest(),
+                attached_to_name="SINV-0002",
+            ),
+        ]
+
+        def get_doc(values):
+            file = MagicMock()
+            file.file_url = f"/private/files/{values['file_name']}"
+            return file
+
+        with patch.object(frappe, "get_all", return_value=existing, create=True) as get_all, patch.object(
+            frappe, "delete_doc", create=True
+        ) as delete_doc, patch.object(frappe, "get_doc", side_effect=get_doc, create=True) as new_file:
+            file_urls = save_qr_files(
+                "Sales Invoice",
+                "custom_invoice_qr_image",
+                {"SINV-0001": b"qr 1", "SINV-0002": b"qr 2", "SINV-0003": b"qr 3"},
+            )
+
+        get_all.assert_called_once()
+        delete_doc.assert_called_once_with("File", "file-2", ignore_permissions=True)
+        self.assertEqual(new_file.call_count, 2)
+        self.assertEqual(
+            file_urls,
+            {
+                "SINV-0001": "/private/files/SINV-0001-qr.png",
+                "SINV-0002": "/private/files/SINV-0002-qr.png",
+                "SINV-0003": "/private/files/SINV-0003-qr.png",
+            },
+        )
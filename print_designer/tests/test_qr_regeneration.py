@@ -0,0 +1,75 @@
+import types
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from print_designer.custom import qr_regeneration
+from print_designer.custom.qr_regeneration import (
+    enqueue_qr_regeneration,
+    get_filters_hash,
+    get_qr_handler,
+    iter_document_names,
+    regenerate_qr_codes_job,
+    render_qr_images,
+)
+
+
+class TestQRRegeneration(unittest.TestCase):
+    """Test batching and rendering of bulk QR code regeneration"""
+
+    def test_names_streamed_by_keyset(self):
+        names = [f"SINV-{i:04d}" for i in range(5)]
+
+        def get_all(doctype, filters, order_by, limit, pluck):
+            after = filters.get("name", [None, ""])[1]
+            return [name for name in names if name > after][:limit]
+
+        with patch.object(frappe, "get_all", side_effect=get_all, create=True) as mock_get_all:
+            batches = list(iter_document_names("Sales Invoice", {"docstatus": 1}, batch_size=2))
+
+        self.assertEqual(batches, [names[:2], names[2:4], names[4:]])
+        self.assertEqual(mock_get_all.call_count, 4)
+        self.assertEqual(mock_get_all.call_args.kwargs["filters"]["docstatus"], 1)
+
+    def test_images_rendered_in_process_pool(self):
+        _, _, render = get_qr_handler("Sales Invoice")
+        payloads = {f"SINV-{i:04d}": f'{{"inv":"SINV-{i:04d}"}}' for i in range(3)}
+
+        with ProcessPoolExecutor(2) as executor:
+            images = render_qr_images(payloads, render, executor)
+
+        self.assertEqual(images, render_qr_images(payloads, render))
+        self.assertTrue(all(png.startswith(b"\x89PNG") for png in images.values()))
+
+    def test_checkpoint_per_filters(self):
+        self.assertEqual(
+            get_filters_hash({"company": "A", "posting_date": [">=", "2026-01-01"]}),
+            get_filters_hash('{"posting_date": [">=", "2026-01-01"], "company": "A"}'),
+        )
+        self.assertNotEqual(get_filters_hash({"company": "A"}), get_filters_hash({"company": "B"}))
+        self.assertEqual(get_filters_hash(None), get_filters_hash({}))
+
+    def test_background_job_keeps_batch_size(self):
+        enqueue = MagicMock()
+        for attribute, value in (
+            ("enqueue", enqueue),
+            ("only_for", MagicMock()),
+            ("local", types.SimpleNamespace(site="test.localhost")),
+            ("logger", MagicMock()),
+        ):
+            patcher = patch.object(frappe, attribute, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        enqueue_qr_regeneration("Sales Invoice", {"company": "A"}, processes=2, batch_size="50")
+        self.assertEqual(enqueue.call_args.kwargs["batch_size"], 50)
+
+        with patch.object(qr_regeneration, "regenerate_qr_codes", return_value=0) as regenerate:
+            regenerate_qr_codes_job(**{
+                key: value for key, value in enqueue.call_args.kwargs.items()
+                if key in ("doctype", "filters", "resume", "processes", "batch_size")
+            })
+        self.assertEqual(regenerate.call_args.kwargs["batch_size"], 50)
+        self.assertEqual(regenerate.call_args.kwargs["processes"], 2)
@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from print_designer.custom import sales_invoice_qr
+from print_designer.custom.sales_invoice_qr import get_invoice_qr
+
+
+class TestSalesInvoiceQR(unittest.TestCase):
+    """Test the per request QR memo shared by the Sales Invoice QR macros"""
+
+    def setUp(self):
+        self.invoice = frappe._dict(
+            name="SINV-0001",
+            modified="2026-01-01 10:00:00",
+            docstatus=1,
+            company="Test Co",
+            customer="Test Customer",
+            posting_date="2026-01-01",
+            grand_total=107,
+            total_taxes_and_charges=7,
+            net_total=100,
+            currency="THB",
+            custom_invoice_qr_code="iVBORw0",
+        )
+        for name, value in (
+            ("site", "test_site"),
+            ("pd_sales_invoice_qr", None),
+        ):
+            patcher = patch.object(frappe.local, name, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = patch.object(frappe, "get_doc", return_value=self.invoice, create=True)
+        self.get_doc = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(frappe, "get_cached_value", return_value="0105555000001", create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sales_invoice_qr._QR_SVG_CACHE.clear()
+
+    def test_invoice_loaded_once_per_request(self):
+        first = get_invoice_qr("SINV-0001")
+        second = get_invoice_qr("SINV-0001")
+
+        self.assertIs(first, second)
+        self.assertEqual(first.data_url, "data:image/png;base64,iVBORw0")
+        self.get_doc.assert_called_once()
+
+    def test_svg_rendered_once(self):
+        with patch.object(sales_invoice_qr, "make_qr_svg", return_value=b"<svg/>") as make_qr_svg:
+            qr = get_invoice_qr("SINV-0001", "svg")
+            get_invoice_qr("SINV-0001", "svg")
+            # next request, svg comes from the process cache
+            frappe.local.pd_sales_invoice_qr = None
+            get_invoice_qr("SINV-0001", "svg")
+
+        self.assertTrue(qr.data_url.startswith("data:image/svg+xml;base64,"))
+        make_qr_svg.assert_called_once()
+
+    def test_hidden_qr(self):
+        self.invoice["custom_show_qr_on_print"] = 0
+        self.assertIsNone(get_invoice_qr("SINV-0001"))
+
+    def test_memo_cleared_per_invoice(self):
+        get_invoice_qr("SINV-0001")
+        memo = frappe.local.pd_sales_invoice_qr
+
+        # a name equal to the first character of another invoice's name
+        sales_invoice_qr._clear_invoice_qr_memo("S")
+        self.assertEqual(len(memo), 2)
+
+        sales_invoice_qr._clear_invoice_qr_memo("SINV-0001")
+        self.assertEqual(memo, {})
@@ -0,0 +1,105 @@
+import unittest
+
+from print_designer.commands.benchmark_thai_tax import calculate_baseline_amounts, make_documents
+from print_designer.utils.thai_tax import (
+    THAI_TAX_FIELDS,
+    calculate_thai_tax,
+    calculate_thai_tax_batch,
+    get_sales_tax_arguments,
+    get_wht_base,
+    thai_round,
+)
+
+
+class TestThaiTaxEngine(unittest.TestCase):
+    """Test the shared Thai WHT / retention calculation engine"""
+
+    def test_commercial_rounding(self):
+        self.assertEqual(thai_round(100.505), 100.51)
+        self.assertEqual(thai_round(100.504), 100.5)
+        self.assertEqual(thai_round(100.495), 100.5)
+        self.assertEqual(thai_round(6.675), 6.68)
+        self.assertEqual(thai_round(-100.505), -100.51)
+        self.assertEqual(thai_round(1.2345, 3), 1.235)
+        self.assertEqual(thai_round(0), 0)
+        # binary noise of large amounts: 133328.82499999998
+        self.assertEqual(thai_round(134586.65 - 1257.825), 133328.83)
+
+    def test_wht_on_service_lines_only(self):
+        amounts = calculate_thai_tax(
+            [60000, 40000],
+            107000,
+            wht_rate=3,
+            wht_lines=[False, True],
+            retention_rate=5,
+            subject_to_retention=True,
+        )
+
+        self.assertEqual(amounts["wht_base_amount"], 40000)
+        self.assertEqual(amounts["pd_custom_withholding_tax_amount"], 1200)
+        # retention on the whole document
+        self.assertEqual(amounts["pd_custom_retention_amount"], 5000)
+        self.assertEqual(amounts["pd_custom_net_total_after_wht"], 105800)
+        self.assertEqual(amounts["pd_custom_net_after_wht_retention"], 100800)
+        self.assertEqual(amounts["pd_custom_payment_amount"], 100800)
+
+    def test_rounding_and_kept_amounts(self):
+        arguments = get_sales_tax_arguments(
+            {
+                "net_total": 12345.67,
+                "grand_total": 13209.87,
+                "pd_custom_subject_to_wht": 1,
+                "pd_custom_withholding_tax_pct": 3,
+                "pd_custom_withholding_tax_amount": 370.365,
+            },
+            keep_close_amounts=True,
+        )
+
+        self.assertEqual(calculate_thai_tax(**arguments)["pd_custom_withholding_tax_amount"], 370.365)
+
+        arguments["keep_close_amounts"] = False
+        amounts = calculate_thai_tax(**arguments)
+        self.assertEqual(amounts["pd_custom_withholding_tax_amount"], 370.37)
+        self.assertEqual(amounts["pd_custom_net_total_after_wht"], 12839.5)
+        self.assertEqual(amounts["pd_custom_net_after_wht_retention"], 0)
+        self.assertEqual(amounts["pd_custom_payment_amount"], 12839.5)
+
+    def test_deductions_exceeding_total(self):
+        amounts = calculate_thai_tax(
+            [1000], 100, wht_rate=5, retention_rate=10, subject_to_retention=True
+        )
+
+        self.assertEqual(amounts["pd_custom_payment_amount"], 0)
+        self.assertTrue(amounts["deductions_exceed_total"])
+
+    def test_not_subject_to_wht(self):
+        amounts = calculate_thai_tax([1000], 1070, wht_rate=3, subject_to_wht=False)
+
+        self.assertEqual(amounts["pd_custom_withholding_tax_amount"], 0)
+        self.assertEqual(amounts["pd_custom_payment_amount"], 1070)
+
+    def test_batch_matches_single_documents(self):
+        documents = [
+            {"line_amounts": [amount], "grand_total": amount * 1.07, "wht_rate": rate}
+            for amount, rate in ((5000, 3), (20000, 5), (15000, 1), (12345.67, 3))
+        ]
+
+        self.assertEqual(
+            calculate_thai_tax_batch(documents),
+            [calculate_thai_tax(**document) for document in documents],
+        )
+        self.assertEqual(
+            [amounts["pd_custom_withholding_tax_amount"] for amounts in calculate_thai_tax_batch(documents)],
+            [150, 1000, 150, 370.37],
+        )
+        self.assertEqual(get_wht_base([100, 200, 300]), 600)
+
+    def test_matches_per_doctype_baseline(self):
+        rows = make_documents(2000)
+        amounts = calculate_thai_tax_batch([get_sales_tax_arguments(row, keep_close_amounts=True) for row in rows])
+
+        for row, calculated in zip(rows, amounts):
+            expected = calculate_baseline_amounts(row)
+            self.assertEqual(
+                {fieldname: calculated[fieldname] for fieldname in THAI_TAX_FIELDS}, expected, row["name"]
+            )
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import Mock, patch
+
+import frappe
+
+from print_designer import trace
+
+
+class TestTrace(unittest.TestCase):
+    """Test that tracing is free when disabled and lazy when enabled"""
+
+    def setUp(self):
+        frappe.local.pd_trace_level = None
+
+    def tearDown(self):
+        frappe.local.pd_trace_level = None
+
+    def test_disabled_trace_does_not_evaluate_arguments(self):
+        frappe.local.pd_trace_level = 0
+        expensive = Mock()
+        with patch.object(trace, "_emit") as emit:
+            trace.debug("doc %s", expensive)
+            trace.error("doc %s", expensive)
+        emit.assert_not_called()
+        expensive.assert_not_called()
+
+    def test_level_filtering_and_lazy_arguments(self):
+        frappe.local.pd_trace_level = trace.LEVELS["info"]
+        logger = Mock()
+        with patch.object(trace, "_get_trace_logger", return_value=logger):
+            trace.debug("skipped %s", lambda: 1 / 0)
+            trace.info("value %s of %s", lambda: 42, "x")
+        logger.log.assert_called_once_with(trace.LEVELS["info"], "value 42 of x")
+
+    def test_timed_only_measures_when_enabled(self):
+        frappe.local.pd_trace_level = 0
+        with patch.object(trace, "_emit") as emit:
+            self.assertEqual(trace.timed(lambda: "pdf")(), "pdf")
+        emit.assert_not_called()
+
+        frappe.local.pd_trace_level = trace.LEVELS["debug"]
+        with patch.object(trace, "_emit") as emit:
+            self.assertEqual(trace.timed(lambda: "pdf")(), "pdf")
+        emit.assert_called_once()
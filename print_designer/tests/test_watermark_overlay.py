@@ -0,0 +1,125 @@
+import shutil
+import sys
+import types
+import unittest
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ContentStream, DecodedStreamObject, DictionaryObject, NameObject
+
+from print_designer.pdf_generator import watermark
+from print_designer.pdf_generator.watermark import apply_watermark, get_page_labels
+
+
+def make_pdf(page_count, width=595, height=842):
+    writer = PdfWriter()
+    for _ in range(page_count):
+        writer.add_blank_page(width=width, height=height)
+    stream = BytesIO()
+    writer.write(stream)
+    return stream.getvalue()
+
+
+def make_text_pdf(text, width=595, height=842):
+    """Single page pdf showing `text` in Helvetica"""
+    writer = PdfWriter()
+    page = writer.add_blank_page(width=width, height=height)
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    page[NameObject("/Resources")] = DictionaryObject(
+        {NameObject("/Font"): DictionaryObject({NameObject("/F1"): writer._add_object(font)})}
+    )
+    content = DecodedStreamObject()
+    content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+    page[NameObject("/Contents")] = writer._add_object(content)
+    stream = BytesIO()
+    writer.write(stream)
+    return stream.getvalue()
+
+
+def full_page_fills(page):
+    """Rectangles filled over (nearly) the whole page, what an opaque page background draws"""
+    width, height = float(page.mediabox.width), float(page.mediabox.height)
+    fills, rects = [], []
+    for operands, operator in ContentStream(page.get_contents(), page.pdf).operations:
+        if operator == b"re":
+            rects.append([float(value) for value in operands])
+        elif operator in (b"f", b"F", b"f*", b"B", b"B*"):
+            fills.extend(
+                rect for rect in rects if abs(rect[2]) >= width * 0.9 and abs(rect[3]) >= height * 0.9
+            )
+            rects = []
+        elif operator == b"n":
+            rects = []
+    return fills
+
+
+class TestWatermarkOverlay(unittest.TestCase):
+    """Test watermarks stamped onto rendered pdf pages"""
+
+    def setUp(self):
+        watermark._OVERLAY_CACHE.clear()
+
+    def test_page_labels(self):
+        self.assertEqual(get_page_labels("Original on First Page", 3), ["Original", None, None])
+        self.assertEqual(get_page_labels("Copy on All Pages", 2), ["Copy", "Copy"])
+        self.assertEqual(
+            get_page_labels("Original,Copy on Sequence", 3), ["Original", "Copy", "Original"]
+        )
+        self.assertEqual(get_page_labels("None", 2), [None, None])
+        self.assertEqual(get_page_labels("None", 2, text="Draft"), ["Draft", "Draft"])
+
+    def test_overlay_rendered_once_per_label_and_page_size(self):
+        with patch.object(watermark, "_render_overlay_pdf", return_value=make_pdf(1)) as render:
+            pdf = apply_watermark(make_pdf(4), "Original,Copy on Sequence")
+            apply_watermark(make_pdf(2), "Original,Copy on Sequence")
+
+        self.assertEqual(len(PdfReader(BytesIO(pdf)).pages), 4)
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(
+            {call.args[0] for call in render.call_args_list}, {"Original", "Copy"}
+        )
+
+    def test_no_watermark_returns_pdf_unchanged(self):
+        pdf = make_pdf(2)
+        with patch.object(watermark, "_render_overlay_pdf") as render:
+            self.assertIs(apply_watermark(pdf, "None"), pdf)
+        render.assert_not_called()
+
+    def test_page_text_survives_the_merge(self):
+        pdfkit = MagicMock()
+        pdfkit.from_string.return_value = make_text_pdf("Copy")
+        with patch.dict(sys.modules, {"pdfkit": pdfkit}):
+            pdf = apply_watermark(make_text_pdf("Invoice ACC-SINV-0001"), "Copy on All Pages")
+
+        # overlay is rendered without wkhtmltopdf's white page background
+        options = pdfkit.from_string.call_args.kwargs["options"]
+        self.assertIn("no-background", options)
+        self.assertNotIn("background", options)
+        text = PdfReader(BytesIO(pdf)).pages[0].extract_text()
+        self.assertIn("Invoice ACC-SINV-0001", text)
+        self.assertIn("Copy", text)
+
+    @unittest.skipUnless(shutil.which("wkhtmltopdf"), "wkhtmltopdf is not installed")
+    def test_overlay_page_is_transparent(self):
+        overlay = PdfReader(BytesIO(watermark.get_overlay_pdf("Copy", "Sarabun", "12", "Top Right", 595, 842)))
+
+        self.assertEqual(len(overlay.pages), 1)
+        self.assertEqual(full_page_fills(overlay.pages[0]), [])
+        self.assertIn("Copy", overlay.pages[0].extract_text())
+
+    def test_full_page_fill_is_detected(self):
+        page = PdfReader(BytesIO(make_text_pdf("Copy"))).pages[0]
+        self.assertEqual(full_page_fills(page), [])
+
+        writer = PdfWriter(clone_from=BytesIO(make_text_pdf("Copy")))
+        content = DecodedStreamObject()
+        content.set_data(b"1 1 1 rg 0 0 595 842 re f BT /F1 12 Tf 72 720 Td (Copy) Tj ET")
+        writer.pages[0][NameObject("/Contents")] = writer._add_object(content)
+        self.assertEqual(len(full_page_fills(writer.pages[0])), 1)
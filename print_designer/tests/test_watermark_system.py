@@ -293,6 +293,25 @@ class TestWatermarkSystem(unittest.TestCase):
         self.assertTrue(config["enabled"])  # Should return default settings
         self.assertEqual(config["source"], "default")
 
+    def test_cached_config_invalidated_on_save(self):
+        """Test that saving Watermark Settings bumps the cache version"""
+        from print_designer.api.watermark import (
+            get_cached_watermark_config,
+            get_watermark_config_version,
+        )
+
+        config = get_cached_watermark_config("Test Watermark Format")
+        self.assertEqual(config["font_size"], 24)
+        version = get_watermark_config_version()
+
+        settings = frappe.get_single("Watermark Settings")
+        settings.default_font_size = 32
+        settings.save()
+
+        self.assertGreater(get_watermark_config_version(), version)
+        config = get_cached_watermark_config("Test Watermark Format")
+        self.assertEqual(config["font_size"], 32)
+
     def tearDown(self):
         """Cleanup after each test"""
         frappe.db.rollback()
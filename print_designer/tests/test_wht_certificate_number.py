@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+import frappe
+from erpnext.accounts.doctype.payment_entry.test_payment_entry import create_payment_entry
+from erpnext.accounts.doctype.purchase_invoice.test_purchase_invoice import make_purchase_invoice
+from frappe.tests.utils import FrappeTestCase
+
+from print_designer.custom.withholding_tax import (
+    WHT_CERTIFICATE_NUMBER_FIELDS,
+    get_next_wht_sequence,
+    peek_certificate_number,
+)
+
+SERIES = "WHT-2099-10-"
+
+
+class TestWHTCertificateNumber(FrappeTestCase):
+    """Test the tabSeries backed WHT certificate number sequence"""
+
+    def setUp(self):
+        frappe.db.sql("DELETE FROM `tabSeries` WHERE `name` LIKE %s", "%WHT-2099-%")
+        for doctype, fieldname in WHT_CERTIFICATE_NUMBER_FIELDS:
+            frappe.db.sql(
+                f"UPDATE `tab{doctype}` SET `{fieldname}` = NULL WHERE `{fieldname}` LIKE %s",
+                f"{SERIES}%",
+            )
+
+        self.set_certificate_number(self.make_payment_entry(), "WHT-2099-10-0007")
+        self.set_certificate_number(self.make_payment_entry(), "WHT-2099-10-0012")
+        self.set_certificate_number(self.make_payment_entry(), "WHT-2099-10-DRAFT")
+        self.set_certificate_number(make_purchase_invoice(), "WHT-2099-10-0015")
+
+    def make_payment_entry(self):
+        return create_payment_entry(
+            party_type="Supplier",
+            party="_Test Supplier",
+            payment_type="Pay",
+            paid_from="_Test Bank - _TC",
+            paid_to="Creditors - _TC",
+            save=True,
+        )
+
+    def set_certificate_number(self, doc, number):
+        # written directly, the WHT validate hooks would number the document themselves
+        frappe.db.set_value(doc.doctype, doc.name, "custom_wht_certificate_number", number)
+
+    def get_series_current(self, series=SERIES):
+        current = frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s", series)
+        return current[0][0] if current else None
+
+    def test_first_numbers_continue_existing_certificates(self):
+        # seeded from the highest number of every table sharing the series
+        numbers = [get_next_wht_sequence(SERIES, WHT_CERTIFICATE_NUMBER_FIELDS) for _ in range(3)]
+
+        self.assertEqual(numbers, [16, 17, 18])
+        self.assertEqual(self.get_series_current(), 18)
+
+    def test_existing_series_is_not_rescanned(self):
+        frappe.db.sql("INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, %s)", (SERIES, 40))
+        # a higher number stored after the counter exists does not move it
+        self.set_certificate_number(make_purchase_invoice(), "WHT-2099-10-0099")
+
+        numbers = [get_next_wht_sequence(SERIES, WHT_CERTIFICATE_NUMBER_FIELDS) for _ in range(3)]
+
+        self.assertEqual(numbers, [41, 42, 43])
+        self.assertEqual(self.get_series_current(), 43)
+
+    def test_new_series_starts_at_one(self):
+        number = get_next_wht_sequence("WHT-2099-11-", WHT_CERTIFICATE_NUMBER_FIELDS)
+
+        self.assertEqual(number, 1)
+        self.assertEqual(self.get_series_current("WHT-2099-11-"), 1)
+
+    def test_printing_does_not_use_up_a_number(self):
+        with patch("print_designer.custom.withholding_tax.get_certificate_number_series", return_value=SERIES):
+            self.assertEqual(peek_certificate_number(), "WHT-2099-10-0016")
+            self.assertIsNone(self.get_series_current())
+
+            get_next_wht_sequence(SERIES, WHT_CERTIFICATE_NUMBER_FIELDS)
+            self.assertEqual(peek_certificate_number(), "WHT-2099-10-0017")
+            self.assertEqual(self.get_series_current(), 16)
@@ -0,0 +1,178 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+from erpnext.accounts.doctype.purchase_invoice.test_purchase_invoice import make_purchase_invoice
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate, nowdate
+
+from print_designer.custom import withholding_tax
+from print_designer.custom.withholding_tax import (
+    WHT_INCOME_TYPE_FIELD,
+    WHT_INCOME_TYPES,
+    IncomeTypeClassifier,
+    get_wht_tax_filing_data,
+    resolve_income_types,
+)
+
+
+class TestWHTIncomeType(unittest.TestCase):
+    """Test income type classification and bulk resolution used by annual WHT filing"""
+
+    def setUp(self):
+        withholding_tax._INCOME_TYPE_CLASSIFIERS.clear()
+        self.tables = {
+            "Purchase Invoice": [
+                frappe._dict(name="PINV-1", supplier="SUP-1", custom_is_withholding_tax=1),
+                frappe._dict(name="PINV-2", supplier="SUP-2", custom_is_withholding_tax=1),
+                frappe._dict(name="PINV-3", supplier="SUP-3", custom_is_withholding_tax=1),
+            ],
+            "Purchase Invoice Item": [
+                frappe._dict(parent="PINV-1", item_code="ITEM-OFFICE", description="Office rental March"),
+                frappe._dict(parent="PINV-2", item_code="ITEM-AD", description="Banner"),
+            ],
+            "Item": [("ITEM-OFFICE", "Buildings"), ("ITEM-AD", "Advertising")],
+            "Supplier": [("SUP-1", "Services"), ("SUP-2", "Services"), ("SUP-3", "Transportation")],
+            "Payment Entry": [frappe._dict(name="PE-1"), frappe._dict(name="PE-2")],
+            "Payment Entry Reference": [frappe._dict(parent="PE-1", reference_name="PINV-2")],
+        }
+
+        def get_all(doctype, filters=None, fields=None, order_by=None, as_list=False):
+            names = set((filters or {}).get("name", ["in", []])[1]) or None
+            parents = set((filters or {}).get("parent", ["in", []])[1]) or None
+            rows = []
+            for row in self.tables[doctype]:
+                key = row[0] if as_list else row.get("name")
+                if names is not None and key not in names:
+                    continue
+                if parents is not None and row.parent not in parents:
+                    continue
+                rows.append(row)
+            return rows
+
+        meta = MagicMock()
+        meta.has_field.return_value = False
+        for target, value in (("get_all", MagicMock(side_effect=get_all)), ("get_meta", lambda doctype: meta)):
+            patcher = patch.object(frappe, target, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_purchase_invoice_income_types(self):
+        income_types = resolve_income_types("Purchase Invoice", ["PINV-1", "PINV-2", "PINV-3"])
+
+        # item description, item group and supplier group, in that order
+        self.assertEqual(income_types["PINV-1"], WHT_INCOME_TYPES["rental"])
+        self.assertEqual(income_types["PINV-2"], WHT_INCOME_TYPES["advertising"])
+        self.assertEqual(income_types["PINV-3"], WHT_INCOME_TYPES["transportation"])
+        # one query per table, not per document
+        self.assertEqual(frappe.get_all.call_count, 4)
+
+    def test_payment_entry_follows_wht_invoice(self):
+        income_types = resolve_income_types("Payment Entry", ["PE-1", "PE-2"])
+
+        self.assertEqual(income_types["PE-1"], WHT_INCOME_TYPES["advertising"])
+        self.assertEqual(income_types["PE-2"], WHT_INCOME_TYPES["service"])
+
+    def test_keyword_priority(self):
+        classifier = IncomeTypeClassifier()
+
+        # the income type listed first wins, not the first keyword in the text
+        self.assertEqual(classifier.match("Transportation and rental"), WHT_INCOME_TYPES["rental"])
+        self.assertEqual(classifier.match("CONSULTING"), WHT_INCOME_TYPES["consulting"])
+        self.assertIsNone(classifier.match("Stationery"))
+        self.assertIsNone(classifier.match(None))
+
+    def test_classify_many_fetches_groups_once(self):
+        invoices = [
+            frappe._dict(
+                doctype="Purchase Invoice",
+                name=f"PINV-{i}",
+                supplier="SUP-1",
+                items=[frappe._dict(item_code="ITEM-AD", description="")],
+            )
+            for i in range(3)
+        ]
+        classifier = IncomeTypeClassifier()
+
+        self.assertEqual(classifier.classify_many(invoices), [WHT_INCOME_TYPES["advertising"]] * 3)
+        classifier.classify_many(invoices)
+        # item groups and supplier groups, fetched once for all invoices and then cached
+        self.assertEqual(frappe.get_all.call_count, 2)
+
+
+class TestWHTTaxFilingData(FrappeTestCase):
+    """Test the per income type totals of annual WHT filing against submitted documents"""
+
+    def setUp(self):
+        withholding_tax._INCOME_TYPE_CLASSIFIERS.clear()
+        self.company = "_Test Company"
+        self.tax_year = getdate(nowdate()).year
+
+    def get_breakdown(self):
+        breakdown = get_wht_tax_filing_data(self.tax_year, self.company)["income_type_breakdown"]
+        return {
+            income_type: (data["count"], data["total_payments"], data["total_wht"], len(data["documents"]))
+            for income_type, data in breakdown.items()
+        }
+
+    def make_wht_invoice(self, description, rate):
+        invoice = make_purchase_invoice(company=self.company, rate=rate, do_not_save=True)
+        invoice.items[0].description = description
+        invoice.custom_is_withholding_tax = 1
+        invoice.custom_withholding_tax_rate = 3
+        invoice.pd_custom_withholding_tax_amount = rate * 3 / 100
+        invoice.insert()
+        invoice.submit()
+        return invoice
+
+    def make_wht_payment(self, invoice):
+        payment = get_payment_entry("Purchase Invoice", invoice.name)
+        payment.reference_no = invoice.name
+        payment.reference_date = nowdate()
+        payment.custom_is_withholding_tax = 1
+        payment.custom_withholding_tax_rate = 3
+        payment.pd_custom_withholding_tax_amount = invoice.pd_custom_withholding_tax_amount
+        payment.insert()
+        payment.submit()
+        return payment
+
+    def get_stored_amounts(self, doc, amount_field):
+        """(payment, WHT) as stored, the WHT hooks may have recalculated them on submit"""
+        return frappe.db.get_value(doc.doctype, doc.name, [amount_field, "pd_custom_withholding_tax_amount"])
+
+    def test_totals_per_income_type(self):
+        before = self.get_breakdown()
+
+        rental = self.make_wht_invoice("Office rental", 10000)
+        advertising = self.make_wht_invoice("Advertising banner", 4000)
+        payment = self.make_wht_payment(rental)
+        # submitted before income types were stored on submit, resolved by the filing report
+        frappe.db.set_value("Purchase Invoice", advertising.name, WHT_INCOME_TYPE_FIELD, None)
+
+        after = self.get_breakdown()
+
+        # the payment follows the WHT invoice it pays
+        expected = {
+            WHT_INCOME_TYPES["rental"]: [
+                self.get_stored_amounts(rental, "grand_total"),
+                self.get_stored_amounts(payment, "paid_amount"),
+            ],
+            WHT_INCOME_TYPES["advertising"]: [self.get_stored_amounts(advertising, "grand_total")],
+        }
+        for income_type, amounts in expected.items():
+            count, total_payments, total_wht, documents = before.get(income_type, (0, 0, 0, 0))
+            self.assertEqual(
+                after[income_type],
+                (
+                    count + len(amounts),
+                    total_payments + sum(amount for amount, _ in amounts),
+                    total_wht + sum(wht for _, wht in amounts),
+                    documents + len(amounts),
+                ),
+            )
+
+        self.assertEqual(
+            frappe.db.get_value("Purchase Invoice", advertising.name, WHT_INCOME_TYPE_FIELD),
+            WHT_INCOME_TYPES["advertising"],
+        )
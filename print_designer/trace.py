@@ -0,0 +1,109 @@
+"""
+Leveled, sampled tracing for the print / PDF path.
+
+Disabled by default. Enable it from site config:
+
+    "print_designer_trace_level": "debug",       # error, warning, info or debug
+    "print_designer_trace_sample_rate": 0.1       # optional, fraction of requests to trace
+
+Messages are %-style format strings and are only formatted when the trace is emitted.
+Arguments can be callables (e.g. `lambda: doc.as_dict()`) to defer expensive work as well,
+so a disabled trace costs one dict lookup per call.
+Output goes to logs/print_designer/print_designer.log through print_designer.logger.
+"""
+
+import functools
+import logging
+import random
+import time
+
+import frappe
+
+LEVELS = {"error": 40, "warning": 30, "info": 20, "debug": 10}
+
+
+def _get_trace_level():
+    """Numeric level traced for the current request, 0 when tracing is off."""
+    local = frappe.local
+    level = getattr(local, "pd_trace_level", None)
+    if level is not None:
+        return level
+
+    conf = getattr(local, "conf", None) or {}
+    level = LEVELS.get(str(conf.get("print_designer_trace_level") or "").lower(), 0)
+    if level:
+        # sample whole requests so that one trace covers a complete print job
+        sample_rate = conf.get("print_designer_trace_sample_rate")
+        if sample_rate is not None and random.random() >= float(sample_rate):
+            level = 0
+
+    try:
+        local.pd_trace_level = level
+    except RuntimeError:
+        # no frappe context (e.g. plain unit tests), don't memoise
+        pass
+    return level
+
+
+def is_enabled(level="debug"):
+    current = _get_trace_level()
+    return bool(current) and LEVELS[level] >= current
+
+
+def _emit(level, message, args):
+    if args:
+        args = tuple(arg() if callable(arg) else arg for arg in args)
+        message = message % args
+
+    _get_trace_logger().log(LEVELS[level], message)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_trace_logger():
+    from print_designer.logger import get_logger
+
+    logger = get_logger("print_designer_trace")
+    # filtering is done by the trace level above, let everything through
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def debug(message, *args):
+    if is_enabled("debug"):
+        _emit("debug", message, args)
+
+
+def info(message, *args):
+    if is_enabled("info"):
+        _emit("info", message, args)
+
+
+def warning(message, *args):
+    if is_enabled("warning"):
+        _emit("warning", message, args)
+
+
+def error(message, *args):
+    if is_enabled("error"):
+        _emit("error", message, args)
+
+
+def timed(func):
+    """Trace the duration of `func` at info level."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not is_enabled("info"):
+            return func(*args, **kwargs)
+
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _emit(
+                "info",
+                "Function %s took %.4f seconds",
+                (func.__name__, time.perf_counter() - start_time),
+            )
+
+    return wrapper
@@ -6,6 +6,8 @@ Provides Jinja macro functions for delivery approval QR codes in print formats
 import frappe
 from jinja2 import Template
 
+from print_designer.utils.qr_file import get_qr_data_url
+
 def get_delivery_approval_qr_macro():
     """Get the delivery_approval_qr macro for use in Jinja templates"""
     macro_template = """
@@ -15,7 +17,7 @@ def get_delivery_approval_qr_macro():
                 <h3>Customer Approval Required</h3>
                 <div class="qr-code-container">
                     {% if delivery_note.approval_qr_code %}
-                        <img src="data:image/png;base64,{{ delivery_note.approval_qr_code }}" 
+                        <img src="{{ get_qr_data_url(delivery_note.approval_qr_code) }}" 
                              alt="Scan to approve delivery" 
                              style="width: 150px; height: 150px;">
                     {% endif %}
@@ -39,7 +41,9 @@ def get_delivery_approval_qr_macro():
         {% endif %}
     {%- endmacro %}
     """
-    return Template(macro_template)
+    template = Template(macro_template)
+    template.globals["get_qr_data_url"] = get_qr_data_url
+    return template
 
 def render_delivery_approval_qr(delivery_note_name):
     """
@@ -61,7 +65,7 @@ def render_delivery_approval_qr(delivery_note_name):
             html += '<h3>Customer Approval Required</h3>'
             html += '<div class="qr-code-container">'
             if qr_code:
-                html += f'<img src="data:image/png;base64,{qr_code}" alt="Scan to approve delivery" style="width: 150px; height: 150px;">'
+                html += f'<img src="{get_qr_data_url(qr_code)}" alt="Scan to approve delivery" style="width: 150px; height: 150px;">'
             html += '<p>Scan QR code to approve goods received</p>'
             html += '</div></div>'
             return html
@@ -104,7 +108,7 @@ def render_delivery_qr_compact(delivery_note_name):
         if status == 'Pending' and qr_code:
             return f'''
             <div style="text-align: center; margin: 10px 0;">
-                <img src="data:image/png;base64,{qr_code}" alt="Scan to approve" style="width: 100px; height: 100px;">
+                <img src="{get_qr_data_url(qr_code)}" alt="Scan to approve" style="width: 100px; height: 100px;">
                 <p style="margin: 5px 0; font-size: 12px;">Scan to approve delivery</p>
             </div>
             '''
@@ -184,7 +188,7 @@ def render_delivery_approval_summary(delivery_note_name):
         if status == 'Pending' and qr_code:
             html += f'''
                 <div style="text-align: right;">
-                    <img src="data:image/png;base64,{qr_code}" alt="Scan to approve" style="width: 80px; height: 80px;">
+                    <img src="{get_qr_data_url(qr_code)}" alt="Scan to approve" style="width: 80px; height: 80px;">
                 </div>'''
         
         html += '</div>'
@@ -245,7 +249,7 @@ def render_delivery_qr_with_instructions(delivery_note_name):
             <div style="text-align: center; padding: 20px; border: 2px dashed var(--primary-color); margin: 15px 0; border-radius: 10px; background-color: var(--bg-light);">
                 <h3 style="color: var(--primary-color); margin: 0 0 15px 0;">Customer Approval Required</h3>
                 <div style="display: inline-block; margin: 0 20px;">
-                    <img src="data:image/png;base64,{qr_code}" alt="Scan to approve delivery" style="width: 150px; height: 150px; border: 2px solid var(--primary-color); border-radius: 10px;">
+                    <img src="{get_qr_data_url(qr_code)}" alt="Scan to approve delivery" style="width: 150px; height: 150px; border: 2px solid var(--primary-color); border-radius: 10px;">
                 </div>
                 <div style="margin-top: 15px;">
                     <p style="margin: 5px 0; font-size: 14px; font-weight: bold; color: var(--text-color);">📱 Scan QR code with your mobile device</p>
@@ -276,7 +280,7 @@ def render_legacy_delivery_qr(delivery_note_name):
         if status == 'Pending' and qr_code:
             return f'''
             <div style="text-align: center; margin: 10px 0;">
-                <img src="data:image/png;base64,{qr_code}" alt="Scan to approve" style="width: 120px; height: 120px;">
+                <img src="{get_qr_data_url(qr_code)}" alt="Scan to approve" style="width: 120px; height: 120px;">
                 <p style="margin: 5px 0; font-size: 12px;">Scan to approve delivery</p>
             </div>
             '''
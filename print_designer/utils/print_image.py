@@ -0,0 +1,179 @@
+"""
+Print resolution derivatives of uploaded images (signatures, stamps, print format images).
+
+Uploads are often multi-MB phone photos, while a signature is printed a few cm wide.
+Templates call `get_print_image_url(file_url, width, height)` which returns a data URI
+of a downscaled copy, so the pdf renderer doesn't fetch and embed the full upload.
+
+Derivatives are rendered with Pillow in a few fixed sizes, kept in a process cache and in
+redis (shared by the workers), and keyed by the file's mtime so replaced files regenerate.
+Anything that can't be inlined (remote urls, svg, missing files, no Pillow) falls back
+to the original url. Private files are only inlined for users who can read them, the
+url of an image field is user editable and the renderer would otherwise bypass File
+permissions.
+"""
+
+import base64
+import os
+from io import BytesIO
+from urllib.parse import unquote
+
+import frappe
+
+# longest side in pixels, the smallest one covering the printed size is used
+PRINT_IMAGE_SIZES = (256, 512, 1024, 2048)
+# css px to image px, 96dpi css to ~300dpi print
+PRINT_SCALE = 3
+DEFAULT_PRINT_SIZE = 512
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp")
+# bigger derivatives are served by url, data uris that large only bloat the html
+MAX_INLINE_BYTES = 1024 * 1024
+
+_PRINT_IMAGE_CACHE = {}
+_PRINT_IMAGE_CACHE_SIZE = 256
+
+
+def get_print_image_url(file_url, width=None, height=None):
+    """
+    Jinja method: data uri of a print sized copy of `file_url`, or the absolute url if it
+    can't be inlined. `width` / `height` are the printed box size in px (e.g. 150 or "150px").
+    """
+    if not file_url:
+        return ""
+
+    data_uri = None
+    size = get_print_size(width, height)
+    if size and can_read_file(file_url):
+        try:
+            data_uri = get_print_image(file_url, size)
+        except Exception:
+            frappe.log_error(title="Print image derivative failed", message=frappe.get_traceback())
+
+    if data_uri:
+        return data_uri
+    if file_url.startswith(("http://", "https://", "data:")):
+        return file_url
+    return frappe.get_url() + file_url
+
+
+def get_print_size(width=None, height=None):
+    """Derivative size for a box of `width` x `height` css px, None if it needs the original"""
+    longest = max(_get_px(width), _get_px(height))
+    if not longest:
+        return DEFAULT_PRINT_SIZE
+
+    required = longest * PRINT_SCALE
+    return next((size for size in PRINT_IMAGE_SIZES if size >= required), None)
+
+
+def _get_px(value):
+    if isinstance(value, int | float):
+        return value
+    value = str(value or "").strip()
+    if value.endswith("px"):
+        value = value[:-2]
+    try:
+        return float(value)
+    except ValueError:
+        # %, em etc. can't be sized here
+        return 0
+
+
+def get_print_image(file_url, size=DEFAULT_PRINT_SIZE):
+    """Data uri of `file_url` downscaled to `size` px on its longest side, None if not possible"""
+    path = get_local_file_path(file_url)
+    if not path:
+        return None
+
+    key = (frappe.local.site, file_url, size, os.path.getmtime(path))
+    data_uri = _PRINT_IMAGE_CACHE.get(key)
+    if data_uri is not None:
+        return data_uri
+
+    redis_key = f"print_designer:print_image:{file_url}:{size}:{key[-1]}"
+    data_uri = frappe.cache().get_value(redis_key)
+    if data_uri is None:
+        data_uri = make_print_image(path, size) or ""
+        frappe.cache().set_value(redis_key, data_uri, expires_in_sec=7 * 24 * 60 * 60)
+
+    if len(_PRINT_IMAGE_CACHE) >= _PRINT_IMAGE_CACHE_SIZE:
+        _PRINT_IMAGE_CACHE.clear()
+    _PRINT_IMAGE_CACHE[key] = data_uri
+    return data_uri
+
+
+def can_read_file(file_url):
+    """Public files always, private files only with read permission on one of their File rows"""
+    if not file_url.startswith("/private/files/"):
+        return True
+
+    return any(
+        frappe.has_permission("File", "read", doc=file_name)
+        for file_name in frappe.get_all("File", filters={"file_url": file_url}, pluck="name")
+    )
+
+
+def get_local_file_path(file_url):
+    """Path of a public / private site file, None for anything else"""
+    if not file_url.lower().endswith(RASTER_EXTENSIONS):
+        return None
+
+    if file_url.startswith("/private/files/"):
+        folder, file_name = "private", file_url[len("/private/files/") :]
+    elif file_url.startswith("/files/"):
+        folder, file_name = "public", file_url[len("/files/") :]
+    else:
+        return None
+
+    files_path = os.path.realpath(frappe.get_site_path(folder, "files"))
+    path = os.path.realpath(os.path.join(files_path, unquote(file_name)))
+    if not path.startswith(files_path + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def make_print_image(path, size):
+    """Downscale the image at `path` and return it as a data uri"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA", "P") or "transparency" in image.info
+        stream = BytesIO()
+        if has_alpha:
+            # signatures and stamps are usually transparent png, keep the alpha
+            image.save(stream, format="PNG", optimize=True)
+            mime_type = "image/png"
+        else:
+            image.convert("RGB").save(stream, format="JPEG", quality=85, optimize=True)
+            mime_type = "image/jpeg"
+
+    data = stream.getvalue()
+    if len(data) > MAX_INLINE_BYTES:
+        return None
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode()}"
+
+
+def prepare_print_images(doc, method=None):
+    """Render print derivatives of a signature / stamp right after upload (background job)"""
+    file_urls = [doc.get(field) for field in ("signature_image", "stamp_image")]
+    file_urls = [file_url for file_url in file_urls if file_url]
+    if file_urls:
+        frappe.enqueue(
+            "print_designer.utils.print_image.make_print_images",
+            queue="short",
+            file_urls=file_urls,
+            enqueue_after_commit=True,
+        )
+
+
+def make_print_images(file_urls, sizes=(256, 512)):
+    # sizes used by the signature / stamp macros
+    for file_url in file_urls:
+        for size in sizes:
+            get_print_image(file_url, size)
@@ -0,0 +1,159 @@
+"""
+File backed QR code images for Sales Invoice / Delivery Note.
+
+QR codes used to be stored as base64 PNG in the document row, which bloats every read of
+the document. They are now written once as a private File attached to the document and
+the field holds the file url. Identical images share the file on disk (File dedupes by
+content hash) and regenerating an unchanged QR doesn't touch the File at all.
+
+Fields written before this change still hold base64, `get_qr_data_url` accepts both.
+"""
+
+import base64
+import hashlib
+import os
+from io import BytesIO
+
+import frappe
+
+from print_designer.utils.print_image import get_local_file_path
+
+# QR image fields written by save_qr_file, only their files are inlined by get_qr_data_url
+QR_FILE_FIELDS = {
+    "Sales Invoice": "custom_invoice_qr_image",
+    "Delivery Note": "custom_approval_qr_code",
+}
+
+_QR_DATA_URL_CACHE = {}
+_QR_DATA_URL_CACHE_SIZE = 256
+
+
+def make_qr_png(data, error_correction=None, box_size=10, border=4):
+    """PNG bytes of a QR code for `data`"""
+    buffer = BytesIO()
+    _make_qr(data, error_correction, box_size, border).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_qr_svg(data, error_correction=None, border=4):
+    """SVG bytes of a QR code for `data`, a single path, no raster encoding"""
+    import qrcode.image.svg
+
+    buffer = BytesIO()
+    _make_qr(data, error_correction, 10, border, qrcode.image.svg.SvgPathImage).save(buffer)
+    return buffer.getvalue()
+
+
+def _make_qr(data, error_correction, box_size, border, image_factory=None):
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=error_correction or qrcode.constants.ERROR_CORRECT_M,
+        box_size=box_size,
+        border=border,
+        image_factory=image_factory,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    if image_factory:
+        return qr.make_image()
+    return qr.make_image(fill_color="black", back_color="white")
+
+
+def save_qr_file(doctype, name, fieldname, content):
+    """Attach `content` as the QR file of `doctype` `name` and return its file url"""
+    return save_qr_files(doctype, fieldname, {name: content})[name]
+
+
+def save_qr_files(doctype, fieldname, contents):
+    """
+    Attach the QR images of `contents` ({name: png}) to their `doctype` documents and
+    return {name: file url}. The attached files are looked up in one query, only
+    documents whose image changed get a new File.
+    """
+    existing = {}
+    if contents:
+        for file in frappe.get_all(
+            "File",
+            filters={
+                "attached_to_doctype": doctype,
+                "attached_to_name": ["in", list(contents)],
+                "attached_to_field": fieldname,
+            },
+            fields=["name", "file_url", "content_hash", "attached_to_name"],
+        ):
+            existing.setdefault(file.attached_to_name, []).append(file)
+
+    file_urls = {}
+    for name, content in contents.items():
+        content_hash = hashlib.md5(content).hexdigest()
+        files = existing.get(name, [])
+        unchanged = next((file for file in files if file.content_hash == content_hash), None)
+        if unchanged:
+            file_urls[name] = unchanged.file_url
+            continue
+
+        for file in files:
+            frappe.delete_doc("File", file.name, ignore_permissions=True)
+
+        file = frappe.get_doc(
+            {
+                "doctype": "File",
+                "file_name": f"{name}-qr.png",
+                "attached_to_doctype": doctype,
+                "attached_to_name": name,
+                "attached_to_field": fieldname,
+                "is_private": 1,
+                "content": content,
+            }
+        )
+        file.save(ignore_permissions=True)
+        file_urls[name] = file.file_url
+
+    return file_urls
+
+
+def get_qr_data_url(value):
+    """
+    Jinja method: data uri for a QR field value, either a file url or legacy base64.
+    Private files can't be fetched by the pdf renderer, so they are always inlined,
+    but only QR files attached by save_qr_file: any other url is returned unchanged.
+    """
+    if not value:
+        return ""
+    if value.startswith("data:"):
+        return value
+    if not value.startswith(("/files/", "/private/files/")):
+        # legacy base64 stored in the field
+        return f"data:image/png;base64,{value}"
+
+    path = get_local_file_path(value)
+    if not path:
+        return ""
+
+    key = (frappe.local.site, value, os.path.getmtime(path))
+    data_url = _QR_DATA_URL_CACHE.get(key)
+    if data_url is None:
+        if not is_qr_file(value):
+            return value
+
+        with open(path, "rb") as f:
+            data_url = f"data:image/png;base64,{base64.b64encode(f.read()).decode()}"
+
+        if len(_QR_DATA_URL_CACHE) >= _QR_DATA_URL_CACHE_SIZE:
+            _QR_DATA_URL_CACHE.clear()
+        _QR_DATA_URL_CACHE[key] = data_url
+
+    return data_url
+
+
+def is_qr_file(file_url):
+    """Whether `file_url` is a QR image attached by save_qr_file"""
+    return any(
+        frappe.db.exists(
+            "File",
+            {"file_url": file_url, "attached_to_doctype": doctype, "attached_to_field": fieldname},
+        )
+        for doctype, fieldname in QR_FILE_FIELDS.items()
+    )
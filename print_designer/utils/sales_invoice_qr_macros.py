@@ -6,8 +6,10 @@ Provides Jinja macro functions for Thai e-Tax QR codes in print formats
 import frappe
 from frappe.utils import flt
 
+from print_designer.custom.sales_invoice_qr import get_invoice_qr
 
-def render_sales_invoice_qr(invoice_name, position="bottom-right", size=100):
+
+def render_sales_invoice_qr(invoice_name, position="bottom-right", size=100, image_format="png"):
     """
     Render Sales Invoice QR code for print format
 
@@ -17,27 +19,15 @@ def render_sales_invoice_qr(invoice_name, position="bottom-right", size=100):
         invoice_name: Sales Invoice document name
         position: 'bottom-right', 'bottom-left', 'inline' (default: 'bottom-right')
         size: QR code size in pixels (default: 100)
+        image_format: 'png' or 'svg' (default: 'png')
 
     Returns:
         HTML string with QR code and positioning styles
     """
     try:
-        invoice = frappe.get_doc("Sales Invoice", invoice_name)
-
-        # Check if QR display is enabled
-        show_qr = invoice.get("custom_show_qr_on_print")
-        if show_qr is not None and not show_qr:
-            return ""
-
-        # Get QR code
-        qr_code = invoice.get("custom_invoice_qr_code")
-        if not qr_code and invoice.docstatus == 1:
-            # Generate if not exists
-            from print_designer.custom.sales_invoice_qr import generate_sales_invoice_qr
-            qr_data = generate_sales_invoice_qr(invoice_name)
-            qr_code = qr_data.get("qr_code")
-
-        if not qr_code:
+        # Shared with the other QR macros on the page
+        qr = get_invoice_qr(invoice_name, image_format)
+        if not qr:
             return ""
 
         # Position styles
@@ -51,7 +41,7 @@ def render_sales_invoice_qr(invoice_name, position="bottom-right", size=100):
 
         return f'''
         <div class="sales-invoice-qr-code" style="{pos_style} text-align: center;">
-            <img src="data:image/png;base64,{qr_code}"
+            <img src="{qr.data_url}"
                  alt="Invoice QR Code"
                  style="width: {size}px; height: {size}px; border: 1px solid #ddd; padding: 3px; background: white;">
             <div style="font-size: 8px; color: #666; margin-top: 3px;">
@@ -64,7 +54,7 @@ def render_sales_invoice_qr(invoice_name, position="bottom-right", size=100):
         return ""
 
 
-def render_sales_invoice_qr_footer(invoice_name, size=80):
+def render_sales_invoice_qr_footer(invoice_name, size=80, image_format="png"):
     """
     Render Sales Invoice QR code for footer placement
 
@@ -73,31 +63,20 @@ def render_sales_invoice_qr_footer(invoice_name, size=80):
     Args:
         invoice_name: Sales Invoice document name
         size: QR code size in pixels (default: 80)
+        image_format: 'png' or 'svg' (default: 'png')
 
     Returns:
         HTML string suitable for footer placement
     """
     try:
-        invoice = frappe.get_doc("Sales Invoice", invoice_name)
-
-        # Check if QR display is enabled
-        show_qr = invoice.get("custom_show_qr_on_print")
-        if show_qr is not None and not show_qr:
-            return ""
-
-        # Get QR code
-        qr_code = invoice.get("custom_invoice_qr_code")
-        if not qr_code and invoice.docstatus == 1:
-            from print_designer.custom.sales_invoice_qr import generate_sales_invoice_qr
-            qr_data = generate_sales_invoice_qr(invoice_name)
-            qr_code = qr_data.get("qr_code")
-
-        if not qr_code:
+        # Shared with the other QR macros on the page
+        qr = get_invoice_qr(invoice_name, image_format)
+        if not qr:
             return ""
 
         return f'''
         <div class="sales-invoice-qr-footer" style="float: right; text-align: center; margin-left: 15px;">
-            <img src="data:image/png;base64,{qr_code}"
+            <img src="{qr.data_url}"
                  alt="Invoice QR"
                  style="width: {size}px; height: {size}px;">
             <div style="font-size: 7px; color: #888; margin-top: 2px;">e-Tax QR</div>
@@ -108,7 +87,7 @@ def render_sales_invoice_qr_footer(invoice_name, size=80):
         return ""
 
 
-def render_sales_invoice_verification_info(invoice_name):
+def render_sales_invoice_verification_info(invoice_name, image_format="png"):
     """
     Render complete verification block with QR code and invoice summary
 
@@ -116,32 +95,23 @@ def render_sales_invoice_verification_info(invoice_name):
 
     Args:
         invoice_name: Sales Invoice document name
+        image_format: 'png' or 'svg' (default: 'png')
 
     Returns:
         HTML string with QR code and invoice summary for verification
     """
     try:
-        invoice = frappe.get_doc("Sales Invoice", invoice_name)
-
-        # Check if QR display is enabled
-        show_qr = invoice.get("custom_show_qr_on_print")
-        if show_qr is not None and not show_qr:
+        # Shared with the other QR macros on the page
+        qr = get_invoice_qr(invoice_name, image_format)
+        if not qr:
             return ""
 
-        # Get QR code
-        qr_code = invoice.get("custom_invoice_qr_code")
-        if not qr_code and invoice.docstatus == 1:
-            from print_designer.custom.sales_invoice_qr import generate_sales_invoice_qr
-            qr_data = generate_sales_invoice_qr(invoice_name)
-            qr_code = qr_data.get("qr_code")
-
-        if not qr_code:
-            return ""
+        invoice = qr.invoice
 
         # Get company tax ID
         company_tax_id = ""
         if invoice.company:
-            company_tax_id = frappe.db.get_value("Company", invoice.company, "tax_id") or ""
+            company_tax_id = frappe.get_cached_value("Company", invoice.company, "tax_id") or ""
 
         # Format amounts
         grand_total = flt(invoice.grand_total, 2)
@@ -151,7 +121,7 @@ def render_sales_invoice_verification_info(invoice_name):
         return f'''
         <div class="invoice-verification-block" style="border: 1px solid #ddd; padding: 15px; margin: 15px 0; border-radius: 5px; display: flex; align-items: center; background: #fafafa;">
             <div style="flex: 0 0 120px; text-align: center;">
-                <img src="data:image/png;base64,{qr_code}"
+                <img src="{qr.data_url}"
                      alt="Invoice QR Code"
                      style="width: 100px; height: 100px; border: 1px solid #ccc; padding: 3px; background: white;">
                 <div style="font-size: 8px; color: #666; margin-top: 5px;">Thai e-Tax QR</div>
@@ -194,7 +164,7 @@ def render_sales_invoice_verification_info(invoice_name):
         return ""
 
 
-def render_sales_invoice_qr_compact(invoice_name, size=60):
+def render_sales_invoice_qr_compact(invoice_name, size=60, image_format="png"):
     """
     Render compact QR code for space-constrained print formats
 
@@ -203,31 +173,20 @@ def render_sales_invoice_qr_compact(invoice_name, size=60):
     Args:
         invoice_name: Sales Invoice document name
         size: QR code size in pixels (default: 60)
+        image_format: 'png' or 'svg' (default: 'png')
 
     Returns:
         HTML string with minimal QR code display
     """
     try:
-        invoice = frappe.get_doc("Sales Invoice", invoice_name)
-
-        # Check if QR display is enabled
-        show_qr = invoice.get("custom_show_qr_on_print")
-        if show_qr is not None and not show_qr:
-            return ""
-
-        # Get QR code
-        qr_code = invoice.get("custom_invoice_qr_code")
-        if not qr_code and invoice.docstatus == 1:
-            from print_designer.custom.sales_invoice_qr import generate_sales_invoice_qr
-            qr_data = generate_sales_invoice_qr(invoice_name)
-            qr_code = qr_data.get("qr_code")
-
-        if not qr_code:
+        # Shared with the other QR macros on the page
+        qr = get_invoice_qr(invoice_name, image_format)
+        if not qr:
             return ""
 
         return f'''
         <div style="display: inline-block; text-align: center;">
-            <img src="data:image/png;base64,{qr_code}"
+            <img src="{qr.data_url}"
                  alt="QR"
                  style="width: {size}px; height: {size}px;">
         </div>
@@ -237,7 +196,7 @@ def render_sales_invoice_qr_compact(invoice_name, size=60):
         return ""
 
 
-def get_sales_invoice_qr_data_url(invoice_name):
+def get_sales_invoice_qr_data_url(invoice_name, image_format="png"):
     """
     Get just the data URL for QR code image
     Useful for custom Jinja templates that need direct image source
@@ -247,27 +206,15 @@ def get_sales_invoice_qr_data_url(invoice_name):
 
     Args:
         invoice_name: Sales Invoice document name
+        image_format: 'png' or 'svg' (default: 'png')
 
     Returns:
         Data URL string or empty string if QR not available
     """
     try:
-        invoice = frappe.get_doc("Sales Invoice", invoice_name)
-
-        show_qr = invoice.get("custom_show_qr_on_print")
-        if show_qr is not None and not show_qr:
-            return ""
-
-        qr_code = invoice.get("custom_invoice_qr_code")
-        if not qr_code and invoice.docstatus == 1:
-            from print_designer.custom.sales_invoice_qr import generate_sales_invoice_qr
-            qr_data = generate_sales_invoice_qr(invoice_name)
-            qr_code = qr_data.get("qr_code")
-
-        if qr_code:
-            return f"data:image/png;base64,{qr_code}"
-
-        return ""
+        # Shared with the other QR macros on the page
+        qr = get_invoice_qr(invoice_name, image_format)
+        return qr.data_url if qr else ""
     except Exception as e:
         frappe.log_error(f"Error getting Sales Invoice QR data URL: {str(e)}")
         return ""
@@ -119,8 +119,19 @@ def log_signature_usage(signature_id, document_type, document_name, print_format
 def get_signature_for_document(doctype, docname, signature_type="Signature"):
     """Get appropriate signature for a document"""
     
+    # Print formats call this from several macros, resolve once per request
+    memo = getattr(frappe.local, "pd_document_signatures", None)
+    if memo is None:
+        memo = frappe.local.pd_document_signatures = {}
+
+    key = (doctype, docname, signature_type)
+    if key not in memo:
+        memo[key] = _get_signature_for_document(doctype, docname, signature_type)
+    return memo[key]
+
+def _get_signature_for_document(doctype, docname, signature_type):
     # Get document
-    doc = frappe.get_doc(doctype, docname)
+    doc = frappe.get_cached_doc(doctype, docname)
     
     # Try to get signature based on user or company
     signatures = []
@@ -160,4 +171,10 @@ def handle_signature_save(doc, method):
     # This is a wrapper function for the hooks system
     # We don't need to log usage here since this is just creating/updating the signature record
     # Usage logging should happen when the signature is actually used in a print format
-    pass
\ No newline at end of file
+    from print_designer.utils.print_image import prepare_print_images
+    from print_designer.utils.signature_stamp import clear_signature_cache
+
+    clear_signature_cache(doc)
+
+    # render print sized copies of a new / replaced image before it's first printed
+    prepare_print_images(doc)
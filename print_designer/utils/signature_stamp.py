@@ -1,6 +1,5 @@
 import json
 import os
-import re
 
 import frappe
 from frappe import _
@@ -83,52 +82,186 @@ def boot_session(bootinfo):
     }
 
 
+# the cached records of a doctype expire together, in case an invalidation is lost
+SIGNATURE_RECORDS_CACHE_TTL = 6 * 60 * 60
+
+SIGNATURE_RECORD_FIELDS = {
+    "Digital Signature": [
+        "name",
+        "modified",
+        "is_active",
+        "signature_image",
+        "title",
+        "description",
+        "company",
+        "department",
+        "designation",
+    ],
+    "Company Stamp": [
+        "name",
+        "modified",
+        "is_active",
+        "stamp_image",
+        "title",
+        "description",
+        "stamp_type",
+        "company",
+    ],
+}
+
+
+def _get_signature_records_key(doctype):
+    return f"print_designer:signature_records:{doctype}"
+
+
+def get_signature_records(doctype, names):
+    """
+    Digital Signature / Company Stamp records by name, missing names map to an empty dict.
+
+    Records are cached in redis (with their `modified`) and memoised for the request,
+    names that aren't cached yet are fetched together in one query.
+    handle_signature_save / clear_signature_cache drop the entry of a saved record.
+    """
+    memo = getattr(frappe.local, "pd_signature_records", None)
+    if memo is None:
+        memo = frappe.local.pd_signature_records = {}
+    cache_key = _get_signature_records_key(doctype)
+    records = {}
+    missing = []
+    for name in dict.fromkeys(names):
+        if not name:
+            continue
+        record = memo.get((doctype, name))
+        if record is None:
+            record = frappe.cache().hget(cache_key, name)
+        if record is None:
+            missing.append(name)
+        else:
+            records[name] = memo[(doctype, name)] = record
+
+    if missing:
+        fetched = {
+            row.name: row
+            for row in frappe.get_all(
+                doctype,
+                filters={"name": ["in", missing]},
+                fields=SIGNATURE_RECORD_FIELDS[doctype],
+            )
+        }
+        cache = frappe.cache()
+        for name in missing:
+            # cache unknown names too, after_insert clears them
+            record = fetched.get(name) or frappe._dict()
+            cache.hset(cache_key, name, record)
+            records[name] = memo[(doctype, name)] = record
+        if cache.ttl(cache.make_key(cache_key)) < 0:
+            cache.expire(cache.make_key(cache_key), SIGNATURE_RECORDS_CACHE_TTL)
+
+    return records
+
+
+def clear_signature_cache(doc, method=None):
+    """
+    Drop the cached record of a saved / deleted Digital Signature or Company Stamp.
+    Redis is cleared right away, so reads later in this transaction see the saved row,
+    and again after commit / rollback, as a concurrent reader may have cached the old
+    row (or this transaction the uncommitted one) in between.
+    """
+    if doc.doctype not in SIGNATURE_RECORD_FIELDS:
+        return
+
+    cache_key = _get_signature_records_key(doc.doctype)
+
+    def clear():
+        frappe.cache().hdel(cache_key, doc.name)
+
+    clear()
+    frappe.db.after_commit.add(clear)
+    frappe.db.after_rollback.add(clear)
+    memo = getattr(frappe.local, "pd_signature_records", None)
+    if memo:
+        memo.pop((doc.doctype, doc.name), None)
+
+
+def _get_signature_data(record):
+    if record.get("is_active") and record.get("signature_image"):
+        return {
+            "image_url": record.get("signature_image"),
+            "title": record.get("title"),
+            "description": record.get("description"),
+            "company": record.get("company"),
+            "department": record.get("department"),
+            "designation": record.get("designation"),
+        }
+
+
+def _get_stamp_data(record):
+    if record.get("is_active") and record.get("stamp_image"):
+        return {
+            "image_url": record.get("stamp_image"),
+            "title": record.get("title"),
+            "description": record.get("description"),
+            "stamp_type": record.get("stamp_type"),
+            "company": record.get("company"),
+        }
+
+
 @frappe.whitelist()
 def get_signature_image(signature_name):
     """Get signature image and details from Digital Signature doctype"""
     if not signature_name:
         return None
 
-    try:
-        signature_doc = frappe.get_doc("Digital Signature", signature_name)
-        log_to_print_designer(f"Retrieved signature doc: {signature_doc.name}")
-        if signature_doc.get("is_active") and signature_doc.get("signature_image"):
-            return {
-                "image_url": signature_doc.get("signature_image"),
-                "title": signature_doc.get("title"),
-                "description": signature_doc.get("description"),
-                "company": signature_doc.get("company"),
-                "department": signature_doc.get("department"),
-                "designation": signature_doc.get("designation"),
-            }
-    except frappe.DoesNotExistError:
+    record = get_signature_records("Digital Signature", [signature_name])[signature_name]
+    if not record:
         frappe.log_error(f"Digital Signature {signature_name} not found")
+        return None
 
-    return None
+    return _get_signature_data(record)
 
 
 @frappe.whitelist()
 def get_company_stamp_image(stamp_name):
     """Get company stamp image URL from Company Stamp doctype"""
-    log_to_print_designer(f"Getting company stamp: {stamp_name}")
     if not stamp_name:
         return None
 
-    try:
-        stamp_doc = frappe.get_doc("Company Stamp", stamp_name)
-        log_to_print_designer(f"Retrieved stamp doc: {stamp_doc.name}")
-        if stamp_doc.get("is_active") and stamp_doc.get("stamp_image"):
-            return {
-                "image_url": stamp_doc.get("stamp_image"),
-                "title": stamp_doc.get("title"),
-                "description": stamp_doc.get("description"),
-                "stamp_type": stamp_doc.get("stamp_type"),
-                "company": stamp_doc.get("company"),
-            }
-    except frappe.DoesNotExistError:
+    record = get_signature_records("Company Stamp", [stamp_name])[stamp_name]
+    if not record:
         frappe.log_error(f"Company Stamp {stamp_name} not found")
+        return None
 
-    return None
+    return _get_stamp_data(record)
+
+
+@frappe.whitelist()
+def get_signatures_and_stamps(digital_signatures=None, company_stamps=None):
+    """
+    Batch form of get_signature_image / get_company_stamp_image - Jinja method.
+    Resolves every signature and stamp a format uses with one query per doctype.
+    """
+    digital_signatures = frappe.parse_json(digital_signatures or [])
+    company_stamps = frappe.parse_json(company_stamps or [])
+
+    signatures = get_signature_records("Digital Signature", digital_signatures)
+    stamps = get_signature_records("Company Stamp", company_stamps)
+    return {
+        "signatures": {name: _get_signature_data(record) for name, record in signatures.items()},
+        "stamps": {name: _get_stamp_data(record) for name, record in stamps.items()},
+    }
+
+
+def prefetch_document_signatures(doc):
+    """Resolve all Digital Signatures / Company Stamps linked from `doc` and its rows at once"""
+    names = {doctype: [] for doctype in SIGNATURE_RECORD_FIELDS}
+    for row in [doc, *doc.get_all_children()]:
+        for field in row.meta.get_link_fields():
+            if field.options in names and row.get(field.fieldname):
+                names[field.options].append(row.get(field.fieldname))
+
+    for doctype, doctype_names in names.items():
+        if doctype_names:
+            get_signature_records(doctype, doctype_names)
 
 
 def get_signature_and_stamp_context(digital_signature=None, company_stamp=None):
@@ -138,7 +271,6 @@ def get_signature_and_stamp_context(digital_signature=None, company_stamp=None):
     # Add signature context
     if digital_signature:
         signature_data = get_signature_image(digital_signature)
-        log_to_print_designer(f"Signature data: {signature_data}")
         if signature_data:
             context.update(
                 {
@@ -151,7 +283,6 @@ def get_signature_and_stamp_context(digital_signature=None, company_stamp=None):
     # Add stamp context
     if company_stamp:
         stamp_data = get_company_stamp_image(company_stamp)
-        log_to_print_designer(f"Stamp data: {stamp_data}")
         if stamp_data:
             context.update(
                 {
@@ -178,6 +309,90 @@ def get_company_stamp_url(stamp_name):
     return stamp_data["image_url"] if stamp_data else None
 
 
+def get_watermark_style():
+    """Font family, font size and position of download watermarks from Print Settings"""
+    from print_designer.api.watermark import get_print_settings_watermark_config
+
+    try:
+        config = get_print_settings_watermark_config()
+        font_size = config["watermark_font_size"]
+        position = config["watermark_position"]
+        font_family = config["watermark_font_family"]
+    except Exception:
+        font_size = 12
+        position = "Top Right"
+        font_family = "Sarabun"
+
+    return font_family, font_size, position
+
+
+def render_watermarked_pdf(
+    doctype,
+    name,
+    format=None,
+    doc=None,
+    no_letterhead=0,
+    letterhead=None,
+    watermark_settings=None,
+    pdf_generator=None,
+    fallback=True,
+):
+    """
+    Render the print with the pdf generator configured for the Print Format and stamp
+    the watermark onto the finished pdf, so every page gets exactly its own Original / Copy label.
+    With `fallback`, WeasyPrint renders the print if the generator fails.
+    """
+    from frappe.utils.print_utils import get_print
+
+    from print_designer.pdf_generator.watermark import apply_watermark
+    from print_designer.pdf_generator_manager import PDFGeneratorManager
+
+    generator = PDFGeneratorManager.resolve_generator(format, pdf_generator)
+    # print formats render generator specific markup (e.g. chrome header / footer)
+    frappe.form_dict.pdf_generator = generator
+
+    # Get the HTML content
+    html_content = get_print(
+        doctype=doctype,
+        name=name,
+        print_format=format,
+        doc=doc,
+        no_letterhead=no_letterhead,
+        letterhead=letterhead,
+        as_pdf=False,
+    )
+
+    # Try the configured generator first, fallback to WeasyPrint if it fails
+    pdf_file = None
+    try:
+        pdf_file = PDFGeneratorManager.render_pdf(format, html_content, generator)
+        log_to_print_designer(f"PDF generated with {generator}")
+    except Exception as generator_error:
+        if not fallback:
+            raise
+        log_to_print_designer(f"{generator} failed: {generator_error}, trying WeasyPrint fallback")
+        try:
+            from print_designer.weasyprint_integration import get_pdf_with_weasyprint
+            pdf_file = get_pdf_with_weasyprint(html_content)
+            log_to_print_designer(f"PDF generated with WeasyPrint fallback")
+        except Exception as wp_error:
+            log_to_print_designer(f"WeasyPrint also failed: {wp_error}")
+            frappe.log_error(f"Both PDF generators failed. {generator}: {generator_error}, WeasyPrint: {wp_error}", "PDF Generation")
+            frappe.throw(f"PDF generation failed: {str(generator_error)}")
+
+    font_family, font_size, position = get_watermark_style()
+    log_to_print_designer(f"Watermark settings: {watermark_settings}")
+    log_to_print_designer(f"Print settings loaded: font_size={font_size}, position={position}, font_family={font_family}")
+
+    return apply_watermark(
+        pdf_file,
+        watermark_settings,
+        font_family=font_family,
+        font_size=font_size,
+        position=position,
+    )
+
+
 @frappe.whitelist()
 def download_pdf_with_signature_stamp(
     doctype,
@@ -236,271 +451,34 @@ def download_pdf_with_signature_stamp(
 
     # If no watermark settings in parameters, get from Print Settings
     if not watermark_settings:
+        from print_designer.api.watermark import get_print_settings_watermark_config
+
         try:
-            print_settings = frappe.get_single("Print Settings")
-            watermark_settings = print_settings.get("watermark_settings", "None")
+            watermark_settings = get_print_settings_watermark_config()["watermark_settings"]
         except Exception:
             watermark_settings = "None"
 
     # Handle watermark settings for PDF generation
     if watermark_settings and watermark_settings != "None":
-        # We need to override the HTML generation to include watermarks
-        # First, get the HTML using frappe.get_print (without PDF)
-        from frappe.utils.print_utils import get_print
-
-        # Get the HTML content
-        html_content = get_print(
-            doctype=doctype,
-            name=name,
-            print_format=format,
+        pdf_file = render_watermarked_pdf(
+            doctype,
+            name,
+            format=format,
             doc=doc,
             no_letterhead=no_letterhead,
             letterhead=letterhead,
-            as_pdf=False,
+            watermark_settings=watermark_settings,
+            pdf_generator=pdf_generator,
         )
 
-        # Get watermark configuration from Print Settings
-        try:
-            print_settings = frappe.get_single("Print Settings")
-            font_size = print_settings.get("watermark_font_size", 12)
-            position = print_settings.get("watermark_position", "Top Right")
-            font_family = print_settings.get("watermark_font_family", "Sarabun")
-        except Exception:
-            font_size = 12
-            position = "Top Right"
-            font_family = "Sarabun"
-
-        # Get watermark text from multiple sources
-        pd_custom_watermark_text = ""
-
-        log_to_print_designer(f"Watermark settings: {watermark_settings}")
-        log_to_print_designer(f"Print settings loaded: font_size={font_size}, position={position}, font_family={font_family}")
-
-        # First, check the traditional watermark_settings from Print Settings
-        if watermark_settings == "Original on First Page":
-            pd_custom_watermark_text = _("Original")
-            # pd_custom_watermark_text = "Original"
-        elif watermark_settings == "Copy on All Pages":
-            pd_custom_watermark_text = _("Copy")
-            # pd_custom_watermark_text = "Copy"
-        elif watermark_settings == "Original,Copy on Sequence":
-            # For sequence watermarks, we'll use CSS to handle different text per page
-            pd_custom_watermark_text = "sequence"  # Special marker for sequence handling
-            log_to_print_designer("Sequence watermarks detected - implementing page-specific watermarks")
-
-        # Then, check for dynamic watermark from document field (if available)
-        # BUT ONLY if no watermark setting was explicitly chosen (to prevent override)
-        if not pd_custom_watermark_text and watermark_settings == "None":
-            try:
-                doc = frappe.get_cached_doc(doctype, name)
-                log_to_print_designer(f"Checking document {doctype}/{name} for dynamic watermark")
-                dynamic_watermark = doc.get("pd_custom_watermark_text")
-                if dynamic_watermark and dynamic_watermark != "None":
-                    if isinstance(dynamic_watermark, (list, tuple)):
-                        dynamic_watermark = ", ".join(
-                            str(item) for item in dynamic_watermark
-                        )
-                    pd_custom_watermark_text = frappe._(str(dynamic_watermark))
-                    log_to_print_designer(f"Using dynamic watermark: {pd_custom_watermark_text}")
-            except Exception as e:
-                log_to_print_designer(f"Error getting dynamic watermark: {e}")
-
-        if pd_custom_watermark_text:
-            # Calculate position CSS based on selection (CSS 2.1 compatible only)
-            # Use same positioning as print preview for consistency
-            position_css = ""
-            if position == "Top Right":
-                position_css = (
-                    "top: 70px; right: 70px;"  # Below page numbers, same as preview
-                )
-            elif position == "Top Left":
-                position_css = "top: 70px; left: 20px;"
-            elif position == "Bottom Right":
-                position_css = "bottom: 20px; right: 70px;"
-            elif position == "Bottom Left":
-                position_css = "bottom: 20px; left: 20px;"
-            else:  # Center - use margin-based centering for CSS 2.1 compatibility
-                position_css = "top: 45%; left: 45%; width: 100px; margin-left: -50px;"
-
-            # Add watermark CSS and HTML (CSS 2.1 compatible only)
-            if pd_custom_watermark_text == "sequence":
-                # Special handling for sequence watermarks
-                # We'll inject multiple watermarks strategically placed in the HTML
-                watermark_html = f"""
-                <style>
-                    .watermark-sequence {{
-                        position: absolute;
-                        {position_css}
-                        font-size: {font_size}px;
-                        color: #000000;
-                        font-weight: normal;
-                        font-family: {font_family}, sans-serif;
-                        z-index: 1000;
-                    }}
-                </style>
-                """
-                # We'll handle the actual insertion differently for sequence watermarks
-            else:
-                # Regular watermark handling
-                watermark_html = f"""
-                <style>
-                    .watermark {{
-                        position: absolute;
-                        {position_css}
-                        font-size: {font_size}px;
-                        color: #000000;
-                        font-weight: normal;
-                        font-family: {font_family}, sans-serif;
-                    }}
-                </style>
-                <div class="watermark">{pd_custom_watermark_text}</div>
-                """
-
-            # Insert watermark HTML inside header-html div where page numbers are located
-            if isinstance(html_content, str):
-                if pd_custom_watermark_text == "sequence":
-                    # Special handling for sequence watermarks
-                    # Insert CSS first
-                    if '<div id="header-html">' in html_content:
-                        html_content = html_content.replace(
-                            '<div id="header-html">',
-                            f'<div id="header-html">{watermark_html}',
-                        )
-                    elif "<head>" in html_content:
-                        html_content = html_content.replace(
-                            "</head>", f"{watermark_html}</head>"
-                        )
-                    elif "<body>" in html_content:
-                        html_content = html_content.replace(
-                            "<body>", f"<body>{watermark_html}"
-                        )
-                    else:
-                        html_content = watermark_html + html_content
-                    
-                    # Now insert sequence watermarks strategically
-                    # Look for page breaks and table breaks to determine where to place watermarks
-                    page_breaks = [
-                        'page-break-after: always;',
-                        'page-break-before: always;',
-                        'break-after: page;',
-                        'break-before: page;',
-                        '<div style="page-break-after:always">',
-                        '<div style="page-break-before:always">',
-                        'class="page-break"',
-                        'style="break-after: page"',
-                        'style="break-before: page"'
-                    ]
-                    
-                    # Add the first watermark (Original) at the beginning
-                    first_watermark = f'<div class="watermark-sequence">{_("Original")}</div>'
-                    
-                    # Insert first watermark at beginning of content
-                    if '<div class="print-format' in html_content:
-                        html_content = html_content.replace(
-                            '<div class="print-format',
-                            f'{first_watermark}\n<div class="print-format',
-                            1  # Only replace first occurrence
-                        )
-                    elif '<body>' in html_content:
-                        html_content = html_content.replace(
-                            '<body>',
-                            f'<body>{first_watermark}',
-                            1
-                        )
-                    
-                    # Look for page breaks and add Copy watermarks after them
-                    copy_watermark = f'<div class="watermark-sequence">{_("Copy")}</div>'
-                    
-                    # Insert Copy watermarks after page breaks
-                    for page_break in page_breaks:
-                        if page_break in html_content:
-                            # Count occurrences to add multiple Copy watermarks
-                            matches = re.findall(re.escape(page_break), html_content)
-                            for i, match in enumerate(matches):
-                                # Insert Copy watermark after each page break
-                                if 'page-break-after' in page_break or 'break-after' in page_break:
-                                    # Insert after the element with page-break-after
-                                    pattern = rf'({re.escape(page_break)}[^>]*>)'
-                                    replacement = rf'\1{copy_watermark}'
-                                    html_content = re.sub(pattern, replacement, html_content, count=1)
-                                elif 'page-break-before' in page_break or 'break-before' in page_break:
-                                    # Insert before the element with page-break-before
-                                    pattern = rf'({re.escape(page_break)})'
-                                    replacement = rf'{copy_watermark}\1'
-                                    html_content = re.sub(pattern, replacement, html_content, count=1)
-                            break  # Stop after finding the first page break type
-                    
-                    # If no explicit page breaks found, try to detect implicit page breaks
-                    # by looking for large content blocks (tables, divs) and add Copy watermarks
-                    if not any(pb in html_content for pb in page_breaks):
-                        # Look for large table rows or content sections
-                        if '</table>' in html_content:
-                            # Add Copy watermark after large tables (potential page breaks)
-                            table_count = html_content.count('</table>')
-                            if table_count > 0:
-                                # Add Copy watermark after the first major table
-                                html_content = html_content.replace('</table>', f'</table>{copy_watermark}', 1)
-                        elif '<div class="print-format' in html_content and html_content.count('<div') > 10:
-                            # For complex layouts, add Copy watermark in the middle
-                            div_positions = [m.start() for m in re.finditer('<div', html_content)]
-                            if len(div_positions) > 5:
-                                middle_pos = div_positions[len(div_positions)//2]
-                                html_content = html_content[:middle_pos] + copy_watermark + html_content[middle_pos:]
-                
-                else:
-                    # Regular watermark handling
-                    if '<div id="header-html">' in html_content:
-                        # Insert watermark right after the header-html opening tag
-                        html_content = html_content.replace(
-                            '<div id="header-html">',
-                            f'<div id="header-html">{watermark_html}',
-                        )
-                    elif '<div class="print-format' in html_content:
-                        # Fallback: insert before print-format div
-                        html_content = html_content.replace(
-                            '<div class="print-format',
-                            f'{watermark_html}\n<div class="print-format',
-                        )
-                    elif "</body>" in html_content:
-                        # Last resort: before closing body tag
-                        html_content = html_content.replace(
-                            "</body>", f"{watermark_html}</body>"
-                        )
-                    else:
-                        # Final fallback: append at the end
-                        html_content += watermark_html
-            else:
-                # If html_content is not a string, convert to string before appending watermark
-                html_content = str(html_content) + watermark_html
-
-        # Now generate PDF from the modified HTML
-        # Try wkhtmltopdf first, fallback to WeasyPrint if it fails
-        pdf_file = None
-        try:
-            from frappe.utils.pdf import get_pdf
-            pdf_file = get_pdf(html_content)
-            log_to_print_designer(f"PDF generated with wkhtmltopdf (with watermark)")
-        except Exception as wk_error:
-            log_to_print_designer(f"wkhtmltopdf failed: {wk_error}, trying WeasyPrint fallback")
-            try:
-                from print_designer.weasyprint_integration import get_pdf_with_weasyprint
-                pdf_file = get_pdf_with_weasyprint(html_content)
-                log_to_print_designer(f"PDF generated with WeasyPrint fallback (with watermark)")
-            except Exception as wp_error:
-                log_to_print_designer(f"WeasyPrint also failed: {wp_error}")
-                frappe.log_error(f"Both PDF generators failed. wkhtmltopdf: {wk_error}, WeasyPrint: {wp_error}", "PDF Generation")
-                frappe.throw(f"PDF generation failed: {str(wk_error)}")
-
         # Set response similar to original download_pdf
-        if not doc:
-            doc = frappe.get_doc(doctype, name)
         frappe.local.response.filename = "{name}.pdf".format(
             name=name.replace(" ", "-").replace("/", "-")
         )
         frappe.local.response.filecontent = pdf_file
         frappe.local.response.type = "pdf"
 
-        log_to_print_designer(f"PDF generated successfully with watermark: {pd_custom_watermark_text}")
+        log_to_print_designer(f"PDF generated successfully with watermark: {watermark_settings}")
         return pdf_file
 
     # If no watermarks needed, use original function
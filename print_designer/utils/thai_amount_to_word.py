@@ -110,21 +110,16 @@ def is_thai_format(print_format_name=None, doc=None):
 
     # Use the new centralized language detection from pdf.py
     try:
-        from print_designer.pdf import get_effective_language, is_thai_language
-
-        effective_lang = get_effective_language(print_format_name)
-        result = is_thai_language(effective_lang)
-
-        if result:
-            print(
-                f"Using Thai formatting based on effective language: {effective_lang}"
-            )
-        else:
-            print(
-                f"NOT using Thai formatting - effective language is: {effective_lang}"
-            )
-
-        return result
+        from print_designer import trace
+        from print_designer.pdf import get_print_language_context
+
+        language_context = get_print_language_context(print_format_name)
+        trace.debug(
+            "Thai formatting %s, effective language is: %s",
+            "enabled" if language_context.is_thai else "disabled",
+            language_context.language,
+        )
+        return language_context.is_thai
 
     except ImportError:
         # Fallback to old logic if pdf.py is not available
@@ -0,0 +1,158 @@
+"""
+Thai WHT / Retention calculation engine
+
+Shared by the Quotation, Sales Order and Sales Invoice calculations, the Purchase
+Invoice / Purchase Order WHT overrides and the customer WHT recalculation job.
+`calculate_thai_tax` is a pure function: line amounts and rates in, every
+pd_custom_* amount out, rounded with Thai commercial rounding (half away from
+zero). It doesn't read or write documents, so many documents can be evaluated
+in one pass with `calculate_thai_tax_batch` for previews and recomputes.
+"""
+
+import frappe
+from frappe.utils import cint, flt
+
+# Document fields set from the result of calculate_thai_tax
+THAI_TAX_FIELDS = [
+    "pd_custom_withholding_tax_amount",
+    "pd_custom_retention_amount",
+    "pd_custom_net_total_after_wht",
+    "pd_custom_net_after_wht_retention",
+    "pd_custom_payment_amount",
+]
+
+# Current amounts kept by `keep_close_amounts` when within 0.01 of the calculated value
+KEEP_CLOSE_FIELDS = ["pd_custom_withholding_tax_amount", "pd_custom_net_total_after_wht"]
+
+
+def thai_round(value, precision=2):
+    """
+    Thai commercial rounding: 100.505 -> 100.51, 100.504 -> 100.50.
+    Same as the thai_flt the per doctype calculations used, frappe's Commercial Rounding
+    nudges the value by its last binary digit so noise (100.505 is stored as 100.50499...)
+    doesn't round down, at any magnitude.
+    """
+    return flt(value, precision, rounding_method="Commercial Rounding")
+
+
+def get_wht_base(line_amounts, wht_lines=None):
+    """Sum of the line amounts subject to WHT, `wht_lines` flags each line (all lines if None)"""
+    if wht_lines is None:
+        return sum(flt(amount) for amount in line_amounts)
+    return sum(flt(amount) for amount, subject in zip(line_amounts, wht_lines) if subject)
+
+
+def calculate_thai_tax(
+    line_amounts,
+    grand_total,
+    wht_rate=0,
+    retention_rate=0,
+    wht_lines=None,
+    retention_base=None,
+    subject_to_wht=True,
+    subject_to_retention=False,
+    current=None,
+    keep_close_amounts=False,
+    precision=2,
+):
+    """
+    WHT, retention and payment amounts of one document
+
+    Args:
+        line_amounts: amounts before VAT, the WHT and retention base
+        grand_total: document total including VAT
+        wht_rate / retention_rate: percentages
+        wht_lines: per line flag, only flagged lines are subject to WHT (e.g. service items)
+        retention_base: retention base when it isn't the sum of `line_amounts`
+        subject_to_wht / subject_to_retention: document flags
+        current: current KEEP_CLOSE_FIELDS values of the document
+        keep_close_amounts: keep current amounts within 0.01 of the calculated value
+        precision: currency precision
+
+    Returns:
+        {fieldname: value} of THAI_TAX_FIELDS, plus `wht_base_amount` and
+        `deductions_exceed_total` (payment amount was negative and is set to zero)
+    """
+    current = current or {}
+
+    def kept(fieldname, expected):
+        value = flt(current.get(fieldname))
+        if keep_close_amounts and value and abs(value - expected) <= 0.01:
+            return value
+        return expected
+
+    grand_total = flt(grand_total)
+    wht_rate = flt(wht_rate)
+    retention_rate = flt(retention_rate)
+    wht_base = get_wht_base(line_amounts, wht_lines)
+    if retention_base is None:
+        retention_base = get_wht_base(line_amounts)
+
+    wht_amount = 0
+    if subject_to_wht and wht_rate and wht_base:
+        wht_amount = kept("pd_custom_withholding_tax_amount", thai_round(wht_base * wht_rate / 100, precision))
+
+    retention_amount = 0
+    if subject_to_retention and retention_rate and retention_base:
+        retention_amount = thai_round(flt(retention_base) * retention_rate / 100, precision)
+
+    net_total_after_wht = kept("pd_custom_net_total_after_wht", thai_round(grand_total - wht_amount, precision))
+    if subject_to_retention and retention_amount > 0:
+        net_after_wht_retention = thai_round(grand_total - wht_amount - retention_amount, precision)
+        payment_amount = net_after_wht_retention
+    else:
+        net_after_wht_retention = 0
+        payment_amount = net_total_after_wht
+
+    return {
+        "pd_custom_withholding_tax_amount": wht_amount,
+        "pd_custom_retention_amount": retention_amount,
+        "pd_custom_net_total_after_wht": net_total_after_wht,
+        "pd_custom_net_after_wht_retention": net_after_wht_retention,
+        "pd_custom_payment_amount": max(payment_amount, 0),
+        "wht_base_amount": wht_base,
+        "deductions_exceed_total": payment_amount < 0,
+    }
+
+
+def calculate_thai_tax_batch(documents, precision=2):
+    """calculate_thai_tax of every document (dicts of its arguments), in order"""
+    return [calculate_thai_tax(precision=precision, **document) for document in documents]
+
+
+def get_sales_tax_arguments(values, keep_close_amounts=False):
+    """
+    calculate_thai_tax arguments of a Quotation / Sales Order / Sales Invoice (doc or row):
+    WHT and retention are calculated on net_total
+    """
+    return {
+        "line_amounts": [values.get("net_total")],
+        "grand_total": values.get("grand_total"),
+        "wht_rate": values.get("pd_custom_withholding_tax_pct"),
+        "retention_rate": values.get("pd_custom_retention_pct"),
+        "subject_to_wht": values.get("pd_custom_subject_to_wht"),
+        "subject_to_retention": values.get("pd_custom_subject_to_retention"),
+        "current": {fieldname: values.get(fieldname) for fieldname in KEEP_CLOSE_FIELDS},
+        "keep_close_amounts": keep_close_amounts,
+    }
+
+
+def get_currency_precision():
+    """currency_precision of System Settings (2 if not set), read once per request"""
+    precision = getattr(frappe.local, "pd_currency_precision", None)
+    if precision is None:
+        precision = frappe.local.pd_currency_precision = cint(frappe.db.get_default("currency_precision")) or 2
+    return precision
+
+
+def get_service_item_flags(items):
+    """Per item: Item.pd_custom_is_service_item, fetched in one query"""
+    item_codes = list({item.item_code for item in items if item.get("item_code")})
+    service_items = set()
+    if item_codes and frappe.get_meta("Item").has_field("pd_custom_is_service_item"):
+        service_items = set(
+            frappe.get_all(
+                "Item", filters={"name": ["in", item_codes], "pd_custom_is_service_item": 1}, pluck="name"
+            )
+        )
+    return [item.get("item_code") in service_items for item in items]